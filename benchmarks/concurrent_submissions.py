@@ -0,0 +1,143 @@
+"""
+Measure registration submissions per second and the error rate with
+several worker processes writing to one SQLite file:
+
+    python benchmarks/concurrent_submissions.py --processes 4 --threads 4
+
+Each process is like a gunicorn worker with --threads. Every configuration
+starts from a fresh copy of a migrated database:
+
+- stock: Django's SQLite backend, rollback journal, DEFERRED transactions
+- tuned: talent_event_backend.sqlite3 with the PRAGMAs and IMMEDIATE
+  transactions of settings.py, no write gate
+- tuned+gate: the same, with SQLITE_WRITE_GATE
+
+Submissions go through the submit view (without a photo).
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'talent_event_backend.settings')
+
+MODES = ['stock', 'tuned', 'tuned+gate']
+
+
+def setup(db_path, mode):
+    """Django set up on `db_path` for `mode`"""
+    import django
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    database['NAME'] = db_path
+    if mode == 'stock':
+        database['ENGINE'] = 'django.db.backends.sqlite3'
+        database['OPTIONS'] = {}
+    settings.SQLITE_WRITE_GATE = mode == 'tuned+gate'
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    settings.LOGGING_CONFIG = None
+    django.setup()
+
+
+def worker(args):
+    """One process: submit from --threads threads for --duration seconds"""
+    setup(args.db, args.mode)
+    from django.test import Client
+    from django.urls import reverse
+
+    submit_url = reverse('submit_registration')
+    confirmation_url = reverse('confirmation')
+    results = []  # (ok, seconds) per submission
+
+    def submit(thread):
+        client = Client()
+        index = 0
+        while time.time() < args.start_at:
+            time.sleep(0.001)
+        deadline = args.start_at + args.duration
+        while time.time() < deadline:
+            index += 1
+            started = time.perf_counter()
+            response = client.post(submit_url, {
+                'fullName': f'Bench {args.worker} {thread} {index}',
+                'gender': 'female', 'dateOfBirth': '01-01-2000',
+                'ageGroup': '21-40', 'event': 'singing', 'Talent': 'Vocals',
+                'city': 'Surat', 'terms': 'yes',
+                'whatsappNumber': f'9{args.worker:02d}{thread:02d}{index:05d}',
+            })
+            results.append((response.get('Location') == confirmation_url,
+                            time.perf_counter() - started))
+
+    threads = [threading.Thread(target=submit, args=(thread,))
+               for thread in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps(results))
+
+
+def run(mode, template, args):
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'db.sqlite3')
+        shutil.copy(template, db_path)
+        start_at = time.time() + 2  # after every process has set up Django
+        processes = [
+            subprocess.Popen(
+                [sys.executable, __file__, '--worker', str(worker_id),
+                 '--mode', mode, '--db', db_path, '--start-at', str(start_at),
+                 '--threads', str(args.threads), '--duration', str(args.duration)],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            for worker_id in range(args.processes)]
+        results = []
+        for process in processes:
+            output, _ = process.communicate()
+            results += json.loads(output)
+
+    latencies = sorted(seconds for ok, seconds in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    p50 = statistics.median(latencies) * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(f'{mode:<11} {len(latencies) / args.duration:7.1f} submissions/s  '
+          f'errors {errors:>5} ({errors / max(len(results), 1):6.1%})  '
+          f'p50 {p50:6.1f} ms  p99 {p99:7.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--worker', type=int)
+    parser.add_argument('--db')
+    parser.add_argument('--start-at', type=float)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        worker(args)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = os.path.join(directory, 'db.sqlite3')
+        setup(template, 'stock')
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+        print(f'{args.processes} processes x {args.threads} threads, '
+              f'{args.duration:.0f}s each')
+        for mode in (args.mode,) if args.mode else MODES:
+            run(mode, template, args)
+
+
+if __name__ == '__main__':
+    main()
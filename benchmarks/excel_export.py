@@ -0,0 +1,102 @@
+"""
+Compare the old in-memory Excel export with the write-only export.
+
+Each mode runs in its own process so peak RSS is measured independently:
+
+    python benchmarks/excel_export.py --rows 50000
+
+Point DJANGO_SETTINGS_MODULE at a settings module whose database holds at
+least --rows registrations.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'talent_event_backend.settings')
+
+
+def legacy_export(queryset, output):
+    """The export as it was: every cell kept in memory, widths by rescanning"""
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from registration.exports import EXPORT_HEADERS
+
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Talent Event Registrations"
+    for col_num, header in enumerate(EXPORT_HEADERS, 1):
+        cell = worksheet.cell(row=1, column=col_num)
+        cell.value = header
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill(
+            start_color="366092", end_color="366092", fill_type="solid")
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+
+    for row_num, registration in enumerate(queryset.order_by('serial_number'), 2):
+        data = [
+            registration.serial_number, registration.registration_id,
+            registration.full_name, registration.get_gender_display(),
+            registration.date_of_birth, registration.get_age_group_display(),
+            registration.get_event_display(),
+            registration.talent_details or 'Not provided', registration.city,
+            registration.whatsapp_number, registration.get_terms_display(),
+            registration.created_at.strftime('%Y-%m-%d %H:%M'),
+            registration.photo_size_mb,
+            'Active' if registration.is_active else 'Inactive'
+        ]
+        for col_num, value in enumerate(data, 1):
+            cell = worksheet.cell(row=row_num, column=col_num)
+            cell.value = value
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+
+    for column in worksheet.columns:
+        max_length = max(len(str(cell.value)) for cell in column)
+        worksheet.column_dimensions[column[0].column_letter].width = min(
+            max_length + 2, 50)
+    workbook.save(output)
+
+
+def run(mode, rows):
+    import django
+    django.setup()
+    from registration import exports
+    from registration.models import TalentEventRegistration
+
+    cutoff = TalentEventRegistration.objects.order_by(
+        'serial_number').values_list('serial_number', flat=True)[rows - 1]
+    queryset = TalentEventRegistration.objects.filter(serial_number__lte=cutoff)
+
+    started = time.monotonic()
+    with tempfile.TemporaryFile() as output:
+        if mode == 'legacy':
+            legacy_export(queryset, output)
+        else:
+            exports.write_xlsx(queryset, output)
+        size = output.tell()
+    elapsed = time.monotonic() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'{mode:<10} {queryset.count():>7} rows  {elapsed:6.1f}s  '
+          f'peak RSS {peak_mb:6.0f} MB  file {size / (1024 * 1024):.1f} MB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--mode', choices=['legacy', 'write-only'])
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.rows)
+        return
+    for mode in ('legacy', 'write-only'):
+        subprocess.run([sys.executable, __file__, '--mode', mode,
+                        '--rows', str(args.rows)], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare serial and read-ahead photo ZIP builds on a synthetic media
+directory:
+
+    python benchmarks/photo_zip.py --files 5000 --latency-ms 2
+
+--latency-ms adds a delay to every file open to mimic a network volume;
+with 0 the files are read from the local page cache.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'talent_event_backend.settings')
+
+
+def make_media(root, files, size):
+    """Write `files` random photos of `size` bytes and return their entries"""
+    entries = []
+    for index in range(files):
+        name = f'participant_photos/{index // 256:02x}/{index:05d}.jpg'
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        entries.append((index + 1, f'Participant {index}', 'Singing', name))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--size-kb', type=int, default=64)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--window', type=int, default=16)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.core.files.storage import FileSystemStorage
+    from registration import exports
+
+    class SlowStorage(FileSystemStorage):
+        def _open(self, name, mode='rb'):
+            time.sleep(args.latency_ms / 1000)
+            return super()._open(name, mode)
+
+    with tempfile.TemporaryDirectory() as root:
+        entries = make_media(root, args.files, args.size_kb * 1024)
+        storage = SlowStorage(location=root)
+        print(f'{args.files} files of {args.size_kb} KB, '
+              f'{args.latency_ms} ms per open')
+
+        for label, threads in (('serial', 1), ('read-ahead', args.threads)):
+            started = time.monotonic()
+            size = sum(len(chunk) for chunk in exports.zip_photos(
+                entries, storage, threads=threads, window=args.window))
+            elapsed = time.monotonic() - started
+            print(f'{label:<11} threads={threads:<2} {elapsed:6.2f}s  '
+                  f'{size / (1024 * 1024):.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
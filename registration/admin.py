@@ -1,15 +1,22 @@
 from django.contrib import admin
-from django.http import HttpResponse
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied
+from django.http import (
+    FileResponse, Http404, HttpRequest, HttpResponseRedirect, QueryDict,
+    StreamingHttpResponse)
+from django.urls import path, reverse
 from django.utils.html import format_html
 from django.db.models import Count
-import csv
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-import zipfile
-import os
+import tempfile
 from django.conf import settings
 from django.contrib import messages
-from .models import TalentEventRegistration, RegistrationActivity, EventStatistics
+from django.utils import timezone
+from . import exports, replicas, search
+from .changelist import (
+    CounterFieldListFilter, CountingPaginator, KeysetChangeList)
+from .models import (
+    TalentEventRegistration, RegistrationActivity, EventStatistics,
+    StatisticCounter, StatisticRollup, Job, ExportJob, City, CityAlias)
 
 
 @admin.register(TalentEventRegistration)
@@ -18,38 +25,41 @@ class TalentEventRegistrationAdmin(admin.ModelAdmin):
 
     list_display = [
         'serial_number', 'full_name', 'gender', 'date_of_birth', 'event', 'age_group',
-        'city', 'whatsapp_number', 'talent_preview', 'photo_preview', 'created_at', 'is_active'
+        'canonical_city', 'whatsapp_number', 'talent_preview', 'photo_preview', 'created_at', 'is_active'
     ]
 
+    list_select_related = ['canonical_city']
+
+    # Event, age group and city options are counted by the statistic counters
     list_filter = [
-        'event', 'age_group', 'gender', 'city', 'terms', 'is_active', 'created_at'
+        ('event', CounterFieldListFilter), ('age_group', CounterFieldListFilter),
+        'gender', ('canonical_city', CounterFieldListFilter), 'terms', 'is_active', 'created_at'
     ]
 
+    # Searched through the search index, see get_search_results()
     search_fields = [
-        'serial_number', 'full_name', 'whatsapp_number', 'city', 'id'
+        'serial_number', 'full_name', 'whatsapp_number', 'city', 'talent_details', 'id'
     ]
+    search_help_text = (
+        'Serial number, registration ID (BK2025-0001), name, city, '
+        'WhatsApp number or talent details')
 
     ordering = ['serial_number']  # Order by serial number (1, 2, 3, 4...)
 
+    # Large results get estimated/cached counts and keyset pages
+    paginator = CountingPaginator
+
     readonly_fields = [
-        'id', 'serial_number', 'created_at', 'updated_at',
-        'ip_address', 'user_agent', 'photo_size_mb'
+        'id', 'serial_number', 'canonical_city', 'whatsapp_e164', 'created_at',
+        'updated_at', 'ip_address', 'user_agent', 'photo_size_mb', 'photo_width',
+        'photo_height'
     ]
 
     actions = ['make_active', 'make_inactive',
                'export_to_csv', 'export_to_excel', 'download_photos_zip']
 
     def save_model(self, request, obj, form, change):
-        """Override save to ensure serial number is assigned"""
-        # Auto-assign serial number if it's a new object (not editing existing)
-        if not change and not obj.serial_number:
-            last_registration = TalentEventRegistration.objects.order_by(
-                'serial_number').last()
-            if last_registration and last_registration.serial_number:
-                obj.serial_number = last_registration.serial_number + 1
-            else:
-                obj.serial_number = 1
-
+        """Fill request metadata; the serial number is allocated by the model"""
         # Set IP address from request
         if not obj.ip_address:
             obj.ip_address = self.get_client_ip(request)
@@ -60,6 +70,23 @@ class TalentEventRegistrationAdmin(admin.ModelAdmin):
 
         super().save_model(request, obj, form, change)
 
+    def get_search_results(self, request, queryset, search_term):
+        return search.search(queryset, search_term), False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            # Actions; exports pick their database themselves
+            return super().changelist_view(request, extra_context)
+        with replicas.replica_reads(request):
+            response = super().changelist_view(request, extra_context)
+            # The results are read while rendering
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
     def get_client_ip(self, request):
         """Get client IP address from request"""
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -77,13 +104,13 @@ class TalentEventRegistrationAdmin(admin.ModelAdmin):
             'fields': ('full_name', 'gender', 'date_of_birth', 'age_group')
         }),
         ('Event Information', {
-            'fields': ('event', 'talent_details', 'city')
+            'fields': ('event', 'talent_details', 'city', 'canonical_city')
         }),
         ('Contact Information', {
-            'fields': ('whatsapp_number',)
+            'fields': ('whatsapp_number', 'whatsapp_e164')
         }),
         ('Photo Upload', {
-            'fields': ('photo', 'photo_size_mb')
+            'fields': ('photo', 'photo_size_mb', ('photo_width', 'photo_height'))
         }),
         ('Terms & Conditions', {
             'fields': ('terms',)
@@ -102,8 +129,11 @@ class TalentEventRegistrationAdmin(admin.ModelAdmin):
         """Display photo preview in admin"""
         if obj.photo:
             return format_html(
-                '<img src="{}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 5px;" />',
-                obj.photo.url
+                '<picture><source srcset="{}" type="image/webp" />'
+                '<img src="{}" loading="lazy" style="width: 50px; height: 50px; object-fit: cover; border-radius: 5px;" />'
+                '</picture>',
+                obj.thumbnail_url(64, 'webp'),
+                obj.thumbnail_url(64, 'jpg')
             )
         return "No Photo"
     photo_preview.short_description = "Photo Preview"
@@ -127,221 +157,132 @@ class TalentEventRegistrationAdmin(admin.ModelAdmin):
 
     def make_active(self, request, queryset):
         """Mark registrations as active"""
-        updated = queryset.update(is_active=True)
+        updated = queryset.update(is_active=True, updated_at=timezone.now())
         self.message_user(
             request, f'{updated} registrations marked as active.')
     make_active.short_description = "Mark selected registrations as active"
 
     def make_inactive(self, request, queryset):
         """Mark registrations as inactive"""
-        updated = queryset.update(is_active=False)
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
         self.message_user(
             request, f'{updated} registrations marked as inactive.')
     make_inactive.short_description = "Mark selected registrations as inactive"
 
+    def queue_export(self, request, queryset, kind):
+        """
+        Hand a large export to the job worker and show the user's exports;
+        returns None when the export is small enough to build right away
+        """
+        limit = getattr(settings, 'EXPORT_INLINE_LIMIT', 2000)
+        if queryset.count() <= limit:
+            return None
+
+        export = ExportJob.objects.request(
+            kind, queryset, self.export_selection(request), request.user)
+        if export.reused:
+            messages.success(
+                request, 'The same data was exported before; the file is ready below.')
+        else:
+            messages.info(
+                request, f'{export.get_kind_display()} export queued. It will '
+                'appear here when it is ready.')
+        return HttpResponseRedirect(
+            reverse('admin:registration_exportjob_changelist'))
+
+    @staticmethod
+    def export_selection(request):
+        """What an action on the changelist was applied to, as plain data"""
+        selection = {'filters': request.GET.urlencode()}
+        if request.POST.get('select_across', '0') == '0':
+            selection['pks'] = request.POST.getlist(
+                helpers.ACTION_CHECKBOX_NAME)
+        return selection
+
+    def selection_queryset(self, selection, user):
+        """
+        The registrations of an export_selection(), the way the changelist
+        selects them for `user`
+        """
+        request = HttpRequest()
+        request.method = 'GET'
+        request.path = reverse(
+            'admin:registration_talenteventregistration_changelist')
+        request.GET = QueryDict(selection['filters'])
+        request.user = user
+        queryset = self.get_changelist_instance(request).get_queryset(request)
+        if 'pks' in selection:
+            queryset = queryset.filter(pk__in=selection['pks'])
+        return queryset
+
     def export_to_excel(self, request, queryset):
         """Export selected registrations to Excel with serial number ordering"""
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="talent_registrations.xlsx"'
-
-        # Create workbook and worksheet
-        workbook = openpyxl.Workbook()
-        worksheet = workbook.active
-        worksheet.title = "Talent Event Registrations"
-
-        # Define headers
-        headers = [
-            'Serial No.', 'Registration ID', 'Full Name', 'Gender', 'Date of Birth',
-            'Age Group', 'Event', 'Talent Details', 'City', 'WhatsApp Number', 'Terms Agreed',
-            'Registration Date', 'Photo Size (MB)', 'Active Status'
-        ]
-
-        # Style for headers
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(
-            start_color="366092", end_color="366092", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
-
-        # Write headers
-        for col_num, header in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=col_num)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-
-        # Order queryset by serial number (1, 2, 3...)
-        ordered_queryset = queryset.order_by('serial_number')
-
-        # Write data rows
-        for row_num, registration in enumerate(ordered_queryset, 2):
-            data = [
-                registration.serial_number,
-                registration.registration_id,
-                registration.full_name,
-                registration.get_gender_display(),
-                registration.date_of_birth,
-                registration.get_age_group_display(),
-                registration.get_event_display(),
-                registration.talent_details or 'Not provided',
-                registration.city,
-                registration.whatsapp_number,
-                registration.get_terms_display(),
-                registration.created_at.strftime('%Y-%m-%d %H:%M'),
-                registration.photo_size_mb,
-                'Active' if registration.is_active else 'Inactive'
-            ]
-
-            for col_num, value in enumerate(data, 1):
-                cell = worksheet.cell(row=row_num, column=col_num)
-                cell.value = value
-                cell.alignment = Alignment(
-                    horizontal="center", vertical="center")
-
-        # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-
-        workbook.save(response)
-        return response
+        queryset = queryset.using(replicas.read_alias(request))
+        queued = self.queue_export(request, queryset, 'xlsx')
+        if queued:
+            return queued
+
+        # Spool to disk rather than memory; the file is removed once sent
+        spool = tempfile.TemporaryFile()
+        exports.write_xlsx(queryset, spool)
+        spool.seek(0)
+        return FileResponse(
+            spool, as_attachment=True, filename='talent_registrations.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
     export_to_excel.short_description = "Export selected to Excel (Serial order)"
 
     def export_to_csv(self, request, queryset):
         """Export selected registrations to CSV with serial number ordering"""
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="talent_registrations.csv"'
+        return self.csv_response(queryset.using(replicas.read_alias(request)))
 
-        writer = csv.writer(response)
-
-        # Write headers
-        writer.writerow([
-            'Serial No.', 'Registration ID', 'Full Name', 'Gender', 'Date of Birth',
-            'Age Group', 'Event', 'Talent Details', 'City', 'WhatsApp Number', 'Terms Agreed',
-            'Registration Date', 'Photo Size (MB)', 'Active Status'
-        ])
-
-        # Order queryset by serial number (1, 2, 3...)
-        ordered_queryset = queryset.order_by('serial_number')
-
-        # Write data rows
-        for registration in ordered_queryset:
-            writer.writerow([
-                registration.serial_number,
-                registration.registration_id,
-                registration.full_name,
-                registration.get_gender_display(),
-                registration.date_of_birth,
-                registration.get_age_group_display(),
-                registration.get_event_display(),
-                registration.talent_details or 'Not provided',
-                registration.city,
-                registration.whatsapp_number,
-                registration.get_terms_display(),
-                registration.created_at.strftime('%Y-%m-%d %H:%M'),
-                registration.photo_size_mb,
-                'Active' if registration.is_active else 'Inactive'
-            ])
+    export_to_csv.short_description = "Export selected to CSV (Serial order)"
 
+    def csv_response(self, queryset):
+        """Stream the CSV export; rows are written as they are read"""
+        response = StreamingHttpResponse(
+            exports.stream_csv(queryset), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="talent_registrations.csv"'
         return response
 
-    export_to_csv.short_description = "Export selected to CSV (Serial order)"
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('export-csv/',
+                 self.admin_site.admin_view(self.export_all_csv_view),
+                 name='%s_%s_export_csv' % info),
+        ] + super().get_urls()
+
+    def export_all_csv_view(self, request):
+        """Export every registration matching the current filters and search"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        with replicas.replica_reads(request):
+            changelist = self.get_changelist_instance(request)
+            queryset = changelist.get_queryset(request)
+        return self.csv_response(queryset.using(replicas.read_alias(request)))
 
     def download_photos_zip(self, request, queryset):
         """Download photos of selected registrations as a ZIP file"""
-        import tempfile
-        from datetime import datetime
-
+        queryset = queryset.using(replicas.read_alias(request))
         # Filter queryset to only include registrations with photos
-        queryset_with_photos = queryset.filter(
-            photo__isnull=False).exclude(photo='')
-
-        if not queryset_with_photos.exists():
+        if not queryset.exclude(photo='').exclude(photo__isnull=True).exists():
             messages.warning(
                 request, 'No photos found for the selected registrations.')
             return
 
-        # Create a temporary file for the ZIP
-        temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-
-        try:
-            with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                photos_count = 0
-
-                # Order by serial number for consistent naming
-                ordered_queryset = queryset_with_photos.order_by(
-                    'serial_number')
-
-                for registration in ordered_queryset:
-                    if registration.photo and os.path.exists(registration.photo.path):
-                        # Get file extension
-                        _, ext = os.path.splitext(registration.photo.name)
-
-                        # Create a meaningful filename: SerialNo_FullName_Event.ext
-                        safe_name = "".join(c for c in registration.full_name if c.isalnum() or c in (
-                            ' ', '-', '_')).rstrip()
-                        safe_event = "".join(c for c in registration.get_event_display(
-                        ) if c.isalnum() or c in (' ', '-', '_')).rstrip()
-
-                        filename = f"{registration.serial_number:03d}_{safe_name}_{safe_event}{ext}"
-                        filename = filename.replace(' ', '_')
-
-                        # Add file to ZIP
-                        zip_file.write(registration.photo.path, filename)
-                        photos_count += 1
-
-                # Add a summary text file
-                summary_content = f"""Talent Event Registration Photos Summary
-=====================================
-
-Total Photos: {photos_count}
-Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Export by: {request.user.username if request.user.is_authenticated else 'Unknown'}
-
-File Naming Convention:
-SerialNumber_FullName_EventCategory.extension
-
-Registrations Included:
-"""
-
-                for registration in ordered_queryset:
-                    if registration.photo and os.path.exists(registration.photo.path):
-                        summary_content += f"- {registration.serial_number:03d}: {registration.full_name} ({registration.get_event_display()})\n"
-
-                zip_file.writestr('README.txt', summary_content)
-
-            # Prepare response
-            with open(temp_zip.name, 'rb') as zip_data:
-                response = HttpResponse(
-                    zip_data.read(), content_type='application/zip')
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                response[
-                    'Content-Disposition'] = f'attachment; filename="talent_event_photos_{timestamp}.zip"'
-
-            messages.success(
-                request, f'Successfully downloaded {photos_count} photos in ZIP file.')
-            return response
-
-        except Exception as e:
-            messages.error(request, f'Error creating ZIP file: {str(e)}')
-
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_zip.name)
-            except:
-                pass
+        queued = self.queue_export(request, queryset, 'zip')
+        if queued:
+            return queued
+
+        exported_by = (request.user.username
+                       if request.user.is_authenticated else 'Unknown')
+        response = StreamingHttpResponse(
+            exports.stream_photos_zip(queryset, exported_by),
+            content_type='application/zip')
+        timestamp = timezone.localtime().strftime('%Y%m%d_%H%M%S')
+        response['Content-Disposition'] = f'attachment; filename="talent_event_photos_{timestamp}.zip"'
+        return response
 
     download_photos_zip.short_description = "Download photos as ZIP file"
 
@@ -382,6 +323,16 @@ class EventStatisticsAdmin(admin.ModelAdmin):
 
     ordering = ['-date']
 
+    actions = ['refresh_from_counters']
+
+    def refresh_from_counters(self, request, queryset):
+        """Rebuild the selected snapshots from the live statistic counters"""
+        for stats in queryset:
+            EventStatistics.refresh(stats.date)
+        self.message_user(
+            request, f'{queryset.count()} statistics snapshots refreshed.')
+    refresh_from_counters.short_description = "Refresh selected from live counters"
+
     def get_top_event(self, obj):
         """Get the most popular event for the day"""
         if obj.registrations_by_event:
@@ -401,6 +352,163 @@ class EventStatisticsAdmin(admin.ModelAdmin):
     get_top_age_group.short_description = "Top Age Group"
 
 
+class CityAliasInline(admin.TabularInline):
+    model = CityAlias
+    extra = 1
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the city dictionary. New spellings are added as
+    aliases; cities created for a misspelling are merged with the
+    merge_cities command.
+    """
+
+    list_display = ['name', 'alias_list', 'created_at']
+
+    search_fields = ['name', 'aliases__key']
+
+    inlines = [CityAliasInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('aliases')
+
+    def alias_list(self, obj):
+        return ', '.join(alias.key for alias in obj.aliases.all())
+    alias_list.short_description = "Aliases"
+
+
+@admin.register(StatisticCounter)
+class StatisticCounterAdmin(admin.ModelAdmin):
+    """Read-only admin interface for StatisticCounter"""
+
+    list_display = ['date', 'dimension', 'value', 'count']
+
+    list_filter = ['dimension', 'date']
+
+    search_fields = ['value']
+
+    ordering = ['-date', 'dimension', '-count']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StatisticRollup)
+class StatisticRollupAdmin(admin.ModelAdmin):
+    """Read-only admin interface for StatisticRollup"""
+
+    list_display = ['granularity', 'period', 'dimension', 'value', 'count']
+
+    list_filter = ['granularity', 'dimension']
+
+    search_fields = ['value']
+
+    ordering = ['granularity', '-period', 'dimension', '-count']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin interface for background jobs"""
+
+    list_display = [
+        'id', 'name', 'status', 'attempts', 'run_after', 'created_at', 'finished_at'
+    ]
+
+    list_filter = ['status', 'name']
+
+    readonly_fields = [
+        'name', 'payload', 'attempts', 'locked_at', 'last_error',
+        'created_at', 'finished_at'
+    ]
+
+    ordering = ['-created_at']
+
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        """Put failed jobs back in the queue"""
+        updated = queryset.filter(status='failed').update(
+            status='pending', attempts=0, run_after=timezone.now(),
+            finished_at=None)
+        self.message_user(request, f'{updated} jobs queued for retry.')
+    retry_jobs.short_description = "Retry selected failed jobs"
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """The current user's background exports, downloadable when done"""
+
+    list_display = [
+        'id', 'kind', 'status', 'progress', 'total', 'created_at',
+        'finished_at', 'download_link'
+    ]
+
+    list_filter = ['kind', 'status']
+
+    readonly_fields = [
+        'kind', 'status', 'total', 'processed', 'file_size', 'reused',
+        'error', 'created_at', 'finished_at', 'download_link'
+    ]
+
+    exclude = ['requested_by']
+
+    ordering = ['-created_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(requested_by=request.user)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def progress(self, obj):
+        if obj.status == 'running':
+            return f"{obj.progress_percent}% ({obj.processed}/{obj.total})"
+        return obj.get_status_display()
+    progress.short_description = "Progress"
+
+    def download_link(self, obj):
+        if obj.status != 'done' or not obj.file:
+            return "-"
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return format_html(
+            '<a href="{}">Download {}</a>',
+            reverse('admin:%s_%s_download' % info, args=[obj.pk]),
+            obj.download_name)
+    download_link.short_description = "File"
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('<int:export_id>/download/',
+                 self.admin_site.admin_view(self.download_view),
+                 name='%s_%s_download' % info),
+        ] + super().get_urls()
+
+    def download_view(self, request, export_id):
+        """Send a finished export file to the user who requested it"""
+        export = self.get_queryset(request).filter(
+            pk=export_id, status='done').first()
+        if export is None or not self.has_view_permission(request, export):
+            raise Http404
+        return FileResponse(
+            export.file.open('rb'), as_attachment=True,
+            filename=export.download_name)
+
+
 # Customize admin site
 admin.site.site_header = "Bhudev Kalakaar 2025 Admin"
 admin.site.site_title = "Talent Event Admin"
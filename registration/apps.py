@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RegistrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'registration'
+
+    def ready(self):
+        # Register background task handlers and signal receivers
+        from . import signals, tasks  # noqa: F401
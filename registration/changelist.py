@@ -0,0 +1,227 @@
+"""
+Registration changelist for large tables.
+
+Counting stops after ADMIN_KEYSET_THRESHOLD rows. Larger results get an
+estimated count (no filters or search) or a COUNT(*) cached for
+ADMIN_COUNT_CACHE_TIMEOUT seconds, and when they are sorted by serial
+number they are paged by keyset (``?after=<serial>`` / ``?before=<serial>``)
+instead of OFFSET, so every page costs the same however deep it is.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.admin import ChoicesFieldListFilter
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Max, Sum
+from django.utils.functional import cached_property
+
+from .models import StatisticCounter
+
+# Counter dimension of each registration field
+FIELD_DIMENSIONS = {
+    field: dimension for dimension, field in StatisticCounter.DIMENSION_FIELDS.items()}
+
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+KEYSET_VARS = (AFTER_VAR, BEFORE_VAR)
+
+
+def count_rows(queryset):
+    """
+    (count, approximate) for `queryset`: exact up to ADMIN_KEYSET_THRESHOLD
+    rows, estimated or cached above it
+    """
+    threshold = getattr(settings, 'ADMIN_KEYSET_THRESHOLD', 10000)
+    queryset = queryset.order_by()
+    filtered = bool(queryset.query.where)
+    if filtered:
+        sql, params = queryset.query.sql_with_params()
+        key = 'admin_count:' + hashlib.sha256(f'{sql}|{params!r}'.encode()).hexdigest()
+        count = cache.get(key)
+        if count is not None:
+            return count, True
+
+    count = queryset[:threshold + 1].count()
+    if count <= threshold:
+        return count, False
+    if not filtered:
+        # Serial numbers are never reused, so the highest one is a close
+        # (upper) estimate that comes straight from the index
+        estimate = queryset.aggregate(highest=Max('serial_number'))['highest']
+        return max(estimate or 0, count), True
+
+    count = queryset.count()
+    cache.set(key, count, getattr(settings, 'ADMIN_COUNT_CACHE_TIMEOUT', 60))
+    return count, True
+
+
+class CountingPaginator(Paginator):
+    """Paginator whose count of a large result is estimated or cached"""
+
+    approximate = False
+
+    @cached_property
+    def count(self):
+        count, self.approximate = count_rows(self.object_list)
+        return count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList paging large results sorted by serial number by keyset.
+    Expects the admin's paginator to be a CountingPaginator.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.after = self._serial_param(request, AFTER_VAR)
+        self.before = self._serial_param(request, BEFORE_VAR)
+        super().__init__(request, *args, **kwargs)
+
+    @staticmethod
+    def _serial_param(request, name):
+        try:
+            return int(request.GET[name])
+        except (KeyError, ValueError):
+            return None
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for name in KEYSET_VARS:
+            lookup_params.pop(name, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Any other change (filters, search, sorting) starts from the top
+        if not new_params or not any(name in new_params for name in KEYSET_VARS):
+            remove = [*(remove or []), *KEYSET_VARS]
+        return super().get_query_string(new_params, remove)
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page)
+        result_count = paginator.count
+        if self.model_admin.show_full_result_count:
+            full_result_count = (
+                result_count if not (self.has_active_filters or self.query)
+                else count_rows(self.root_queryset)[0])
+        else:
+            full_result_count = None
+
+        self.count_is_approximate = paginator.approximate
+        self.descending = self._serial_ordering(request)
+        self.keyset = paginator.approximate and self.descending is not None
+        if self.keyset:
+            result_list = self._keyset_page()
+            can_show_all = False
+            multi_page = True
+        else:
+            self.next_url = self.previous_url = self.first_url = None
+            can_show_all = result_count <= self.list_max_show_all
+            multi_page = result_count > self.list_per_page
+            if (self.show_all and can_show_all) or not multi_page:
+                result_list = self.queryset._clone()
+            else:
+                try:
+                    result_list = paginator.page(self.page_num).object_list
+                except InvalidPage:
+                    raise IncorrectLookupParameters
+
+        self.result_count = result_count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = not self.show_full_result_count or bool(
+            full_result_count)
+        self.full_result_count = full_result_count
+        self.result_list = result_list
+        self.can_show_all = can_show_all
+        self.multi_page = multi_page
+        self.paginator = paginator
+
+    def _serial_ordering(self, request):
+        """False/True when sorted by ascending/descending serial number, else None"""
+        ordering = self.get_ordering(request, self.queryset)
+        if ordering and ordering[0] == 'serial_number':
+            return False
+        if ordering and ordering[0] == '-serial_number':
+            return True
+        return None
+
+    def _beyond(self, serial_number, forward=True):
+        """Rows after (or before) `serial_number` in display order"""
+        lookup = 'gt' if forward != self.descending else 'lt'
+        return self.queryset.filter(**{f'serial_number__{lookup}': serial_number})
+
+    def _keyset_page(self):
+        per_page = self.list_per_page
+        if self.before is not None:
+            serials = list(self._beyond(self.before, forward=False).reverse()
+                           .values_list('serial_number', flat=True)[:per_page])
+            page = self.queryset.filter(serial_number__in=serials)
+        elif self.after is not None:
+            page = self._beyond(self.after)[:per_page]
+        else:
+            page = self.queryset[:per_page]
+
+        rows = list(page)
+        first = rows[0].serial_number if rows else None
+        last = rows[-1].serial_number if rows else None
+        has_next = last is not None and self._beyond(last).exists()
+        has_previous = (self.after is not None or self.before is not None) and (
+            first is None or self._beyond(first, forward=False).exists())
+
+        self.next_url = (self.get_query_string(
+            {AFTER_VAR: last}, [BEFORE_VAR, PAGE_VAR]) if has_next else None)
+        self.previous_url = self.first_url = None
+        if has_previous:
+            self.first_url = self.get_query_string(remove=[PAGE_VAR])
+            if first is not None:
+                self.previous_url = self.get_query_string(
+                    {BEFORE_VAR: first}, [AFTER_VAR, PAGE_VAR])
+        return page
+
+
+class CounterFieldListFilter(ChoicesFieldListFilter):
+    """
+    Filter on a dimension of the statistic counters (event, age group or
+    city). Options and their counts are summed from the counters rather
+    than grouped over the registrations; they cover every counted
+    registration, whatever other filters are applied.
+    """
+
+    def totals(self):
+        return dict(
+            StatisticCounter.objects.filter(
+                dimension=FIELD_DIMENSIONS.get(self.field_path, self.field_path))
+            .values_list('value').annotate(total=Sum('count')).order_by())
+
+    def options(self, totals):
+        """(value, label) pairs: the field's choices or the counted values"""
+        if self.field.flatchoices:
+            return self.field.flatchoices
+        values = [value for value in totals if totals[value] > 0]
+        if self.field.is_relation:
+            # Counted by primary key (e.g. City id)
+            objects = self.field.related_model._default_manager.in_bulk(
+                [int(value) for value in values if value.isdigit()])
+            labels = {str(pk): str(obj) for pk, obj in objects.items()}
+        else:
+            labels = {value: value for value in values}
+        return sorted(labels.items(), key=lambda item: item[1])
+
+    def choices(self, changelist):
+        totals = self.totals()
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(
+                remove=[self.lookup_kwarg, self.lookup_kwarg_isnull]),
+            'display': 'All',
+        }
+        for value, label in self.options(totals):
+            yield {
+                'selected': str(value) == self.lookup_val,
+                'query_string': changelist.get_query_string(
+                    {self.lookup_kwarg: value}, [self.lookup_kwarg_isnull]),
+                'display': f'{label} ({totals.get(value, 0)})',
+            }
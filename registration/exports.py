@@ -0,0 +1,342 @@
+"""
+Registration exports.
+
+Rows are read with values_list() in server-side chunks and choice labels
+come from dicts built once per export, so an export never holds more than
+one chunk of rows in memory however many registrations it covers.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import os
+import zipfile
+
+from django.conf import settings
+from django.db.models import Max
+from django.db.models.functions import Length
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
+
+from .models import TalentEventRegistration
+
+EXPORT_HEADERS = [
+    'Serial No.', 'Registration ID', 'Full Name', 'Gender', 'Date of Birth',
+    'Age Group', 'Event', 'Talent Details', 'City', 'WhatsApp Number', 'Terms Agreed',
+    'Registration Date', 'Photo Size (MB)', 'Active Status'
+]
+
+EXPORT_FIELDS = [
+    'serial_number', 'full_name', 'gender', 'date_of_birth', 'age_group',
+    'event', 'talent_details', 'city', 'whatsapp_number', 'terms',
+    'created_at', 'photo_bytes', 'photo', 'is_active'
+]
+
+CHUNK_SIZE = 2000
+
+# Excel column widths are capped at this many characters
+MAX_COLUMN_WIDTH = 50
+
+# Photo formats that are already compressed and are stored as they are
+STORED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+# Bytes handed to the ZIP writer at a time
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+def choice_labels(field_name):
+    """Value -> display label dict for a choice field"""
+    return dict(TalentEventRegistration._meta.get_field(field_name).flatchoices)
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Yield one list of display values per registration, in serial order.
+    `progress` is called with the number of rows read so far.
+    """
+    genders = choice_labels('gender')
+    age_groups = choice_labels('age_group')
+    events = choice_labels('event')
+    terms_labels = choice_labels('terms')
+    storage = TalentEventRegistration._meta.get_field('photo').storage
+
+    rows = (queryset.order_by('serial_number')
+            .values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size))
+    for count, (serial_number, full_name, gender, date_of_birth, age_group,
+                event, talent_details, city, whatsapp_number, terms,
+                created_at, photo_bytes, photo, is_active) in enumerate(rows, 1):
+        if progress is not None:
+            progress(count)
+        if photo_bytes is None and photo:
+            # Not backfilled yet (see the backfill_photo_metadata command)
+            try:
+                photo_bytes = storage.size(photo)
+            except OSError:
+                photo_bytes = None
+        photo_size_mb = (round(photo_bytes / (1024 * 1024), 2)
+                         if photo_bytes is not None else 0)
+        yield [
+            serial_number,
+            f"BK2025-{str(serial_number).zfill(4)}",
+            full_name,
+            genders.get(gender, gender),
+            date_of_birth,
+            age_groups.get(age_group, age_group),
+            events.get(event, event),
+            talent_details or 'Not provided',
+            city,
+            whatsapp_number,
+            terms_labels.get(terms, terms),
+            created_at.strftime('%Y-%m-%d %H:%M'),
+            photo_size_mb,
+            'Active' if is_active else 'Inactive'
+        ]
+
+
+class Echo:
+    """File-like object whose write() hands the written line back"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, chunk_size=CHUNK_SIZE, progress=None):
+    """Yield the CSV export of `queryset` line by line, header first"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for row in export_rows(queryset, chunk_size, progress):
+        yield writer.writerow(row)
+
+
+def column_widths(queryset):
+    """
+    Width of every export column: the longest header or value plus two,
+    capped at MAX_COLUMN_WIDTH. Write-only sheets need the widths before
+    the first row, so free text lengths come from one aggregate query and
+    the rest from the choice labels and fixed formats.
+    """
+    lengths = queryset.order_by().aggregate(
+        serial_number=Max('serial_number'),
+        full_name=Max(Length('full_name')),
+        date_of_birth=Max(Length('date_of_birth')),
+        talent_details=Max(Length('talent_details')),
+        city=Max(Length('city')),
+        whatsapp_number=Max(Length('whatsapp_number')),
+        photo_bytes=Max('photo_bytes'),
+    )
+    serial_digits = len(str(lengths['serial_number'] or 0))
+    photo_mb = round((lengths['photo_bytes'] or 0) / (1024 * 1024), 2)
+
+    def longest_label(field_name):
+        return max(len(str(label)) for label in choice_labels(field_name).values())
+
+    values = [
+        serial_digits,
+        len('BK2025-') + max(serial_digits, 4),
+        lengths['full_name'] or 0,
+        longest_label('gender'),
+        lengths['date_of_birth'] or 0,
+        longest_label('age_group'),
+        longest_label('event'),
+        max(lengths['talent_details'] or 0, len('Not provided')),
+        lengths['city'] or 0,
+        lengths['whatsapp_number'] or 0,
+        longest_label('terms'),
+        len('YYYY-MM-DD HH:MM'),
+        # Photos not backfilled yet are assumed to be below the largest one
+        len(f'{photo_mb:.2f}'),
+        len('Inactive'),
+    ]
+    return [min(max(len(header), value) + 2, MAX_COLUMN_WIDTH)
+            for header, value in zip(EXPORT_HEADERS, values)]
+
+
+def write_xlsx(queryset, output, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Write the Excel export of `queryset` to the file object `output` with
+    a write-only workbook. One styled cell per column is reused for every
+    row, so rows are serialized as they are read and styles are shared.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Talent Event Registrations")
+    for col_num, width in enumerate(column_widths(queryset), 1):
+        worksheet.column_dimensions[get_column_letter(col_num)].width = width
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(
+        start_color="366092", end_color="366092", fill_type="solid")
+    centered = Alignment(horizontal="center", vertical="center")
+
+    header = []
+    for title in EXPORT_HEADERS:
+        cell = WriteOnlyCell(worksheet, value=title)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = centered
+        header.append(cell)
+    worksheet.append(header)
+
+    cells = []
+    for _ in EXPORT_HEADERS:
+        cell = WriteOnlyCell(worksheet)
+        cell.alignment = centered
+        cells.append(cell)
+    for row in export_rows(queryset, chunk_size, progress):
+        for cell, value in zip(cells, row):
+            cell.value = value
+        worksheet.append(cells)
+
+    workbook.save(output)
+
+
+class ZipBuffer:
+    """Unseekable file object collecting what zipfile writes until taken"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def safe_filename_part(value):
+    return "".join(
+        c for c in value if c.isalnum() or c in (' ', '-', '_')).rstrip()
+
+
+def read_ahead(items, load, threads, window):
+    """
+    Yield (item, load(item)) in the order of `items` while up to `window`
+    later items are loaded on `threads` worker threads
+    """
+    if threads <= 1:
+        for item in items:
+            yield item, load(item)
+        return
+
+    pool = ThreadPoolExecutor(max_workers=threads)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, pool.submit(load, item)))
+            if len(pending) >= window:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def read_photo(storage, name):
+    """Content of a stored photo, or None when the file is missing"""
+    try:
+        with storage.open(name, 'rb') as source:
+            return source.read()
+    except OSError:
+        return None
+
+
+def stream_photos_zip(queryset, exported_by='Unknown', progress=None):
+    """Yield a ZIP archive of the photos of `queryset` (see zip_photos)"""
+    events = choice_labels('event')
+    rows = (queryset.exclude(photo='').exclude(photo__isnull=True)
+            .order_by('serial_number')
+            .values_list('serial_number', 'full_name', 'event', 'photo')
+            .iterator(chunk_size=CHUNK_SIZE))
+    entries = ((serial_number, full_name, events.get(event, event), photo)
+               for serial_number, full_name, event, photo in rows)
+    yield from zip_photos(
+        entries, TalentEventRegistration._meta.get_field('photo').storage,
+        exported_by, progress)
+
+
+def zip_photos(entries, storage, exported_by='Unknown', progress=None,
+               threads=None, window=None):
+    """
+    Yield a ZIP archive of the photos in `entries` ((serial number, full
+    name, event label, photo name) tuples) while it is being built.
+
+    Photos are read ahead by PHOTO_ZIP_READ_THREADS threads, holding at most
+    PHOTO_ZIP_READ_AHEAD files in memory, and written one by one in entry
+    order; README.txt is collected in the same pass. Already compressed
+    image formats are stored rather than deflated.
+    """
+    if threads is None:
+        threads = getattr(settings, 'PHOTO_ZIP_READ_THREADS', 4)
+    if window is None:
+        window = getattr(settings, 'PHOTO_ZIP_READ_AHEAD', 16)
+    exported_at = timezone.localtime()
+    date_time = exported_at.timetuple()[:6]
+
+    buffer = ZipBuffer()
+    archive = zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED)
+    included = []
+
+    loaded = read_ahead(
+        entries, lambda entry: read_photo(storage, entry[3]), threads, window)
+    for count, (entry, content) in enumerate(loaded, 1):
+        if progress is not None:
+            progress(count)
+        if content is None:
+            # File missing on disk; leave it out of the archive
+            continue
+
+        serial_number, full_name, event_label, photo = entry
+        ext = os.path.splitext(photo)[1]
+        filename = (f"{serial_number:03d}_{safe_filename_part(full_name)}_"
+                    f"{safe_filename_part(event_label)}{ext}").replace(' ', '_')
+        info = zipfile.ZipInfo(filename, date_time)
+        info.compress_type = (zipfile.ZIP_STORED if ext.lower() in STORED_EXTENSIONS
+                              else zipfile.ZIP_DEFLATED)
+
+        content = memoryview(content)
+        with archive.open(info, 'w') as target:
+            for start in range(0, len(content), ZIP_CHUNK_SIZE):
+                target.write(content[start:start + ZIP_CHUNK_SIZE])
+                if buffer.chunks:
+                    yield buffer.take()
+        yield buffer.take()
+        included.append(
+            f"- {serial_number:03d}: {full_name} ({event_label})\n")
+
+    archive.writestr('README.txt', f"""Talent Event Registration Photos Summary
+=====================================
+
+Total Photos: {len(included)}
+Export Date: {exported_at.strftime('%Y-%m-%d %H:%M:%S')}
+Export by: {exported_by}
+
+File Naming Convention:
+SerialNumber_FullName_EventCategory.extension
+
+Registrations Included:
+""" + ''.join(included))
+    archive.close()
+    yield buffer.take()
+
+
+def write_export(kind, queryset, output, exported_by='Unknown', progress=None):
+    """Write a 'csv', 'xlsx' or 'zip' export of `queryset` to a binary file"""
+    if kind == 'xlsx':
+        write_xlsx(queryset, output, progress=progress)
+    elif kind == 'csv':
+        for line in stream_csv(queryset, progress=progress):
+            output.write(line.encode('utf-8'))
+    elif kind == 'zip':
+        for chunk in stream_photos_zip(queryset, exported_by, progress):
+            output.write(chunk)
+    else:
+        raise ValueError(f"Unknown export kind '{kind}'")
@@ -0,0 +1,176 @@
+"""
+Live registration feed (Server-Sent Events).
+
+One FeedHub per process polls the database for every subscriber at once:
+each tick reads the stats version counter (one primary key lookup) and
+only when it moved fetches the newly counted registrations. The resulting
+events are put on a bounded queue per subscriber. A subscriber that falls
+FEED_QUEUE_SIZE events behind loses its backlog and is told to resync
+instead, so one slow screen never holds events in memory for the rest.
+
+The feed needs an ASGI server (e.g. ``uvicorn talent_event_backend.asgi:application``).
+"""
+import asyncio
+from collections import Counter
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import RegistrationActivity, StatisticCounter
+
+logger = logging.getLogger(__name__)
+
+# Registrations fetched per poll
+POLL_LIMIT = 500
+
+# Queue item telling a subscriber it missed events and must resync
+RESYNC = object()
+
+
+def format_event(event, data, event_id=None):
+    """One SSE message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class FeedHub:
+    """Fans events from a single database poller out to all subscribers"""
+
+    def __init__(self, interval=None, queue_size=None):
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.polls = 0
+        self._task = None
+        self._version = None
+        self._last_activity = None
+
+    def subscribe(self):
+        """Register a subscriber and return its event queue"""
+        queue_size = self.queue_size or getattr(settings, 'FEED_QUEUE_SIZE', 100)
+        queue = asyncio.Queue(maxsize=queue_size)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        """Forget a subscriber; the poller stops with the last one"""
+        self.subscribers.discard(queue)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, message):
+        """Hand `message` to every subscriber without ever waiting"""
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too slow: drop what it has not read and make it resync
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    async def _run(self):
+        interval = self.interval or getattr(settings, 'FEED_POLL_INTERVAL', 1.0)
+        # New subscribers start from a fresh snapshot; don't replay what
+        # was counted while nobody listened
+        self._version = self._last_activity = None
+        while True:
+            try:
+                messages = await sync_to_async(self.poll)()
+            except Exception as e:
+                logger.error(f"Feed poll failed: {e}")
+                messages = []
+            for message in messages:
+                self.publish(message)
+            await asyncio.sleep(interval)
+
+    def poll(self):
+        """Messages for registrations counted since the previous poll"""
+        self.polls += 1
+        version = StatisticCounter.objects.version()
+        if version == self._version:
+            return []
+        self._version = version
+
+        activities = RegistrationActivity.objects.filter(
+            activity_type='registration')
+        if self._last_activity is None:
+            # First poll: start from now rather than replaying history
+            self._last_activity = activities.order_by('-pk').values_list(
+                'pk', flat=True).first() or 0
+            return []
+
+        new = list(activities.filter(pk__gt=self._last_activity)
+                   .select_related('registration__canonical_city')
+                   .order_by('pk')[:POLL_LIMIT])
+        if not new:
+            return []
+        self._last_activity = new[-1].pk
+        if len(new) == POLL_LIMIT:
+            # More may be waiting; look again on the next tick
+            self._version = None
+
+        messages = []
+        delta = {'total_registrations': len(new), 'registrations_by_event': Counter(),
+                 'registrations_by_age_group': Counter(),
+                 'registrations_by_city': Counter()}
+        for activity in new:
+            registration = activity.registration
+            delta['registrations_by_event'][registration.event] += 1
+            delta['registrations_by_age_group'][registration.age_group] += 1
+            delta['registrations_by_city'][registration.city_name] += 1
+            messages.append(format_event('registration', {
+                'id': str(registration.id),
+                'registration_id': registration.registration_id,
+                'full_name': registration.full_name,
+                'event': registration.event,
+                'age_group': registration.age_group,
+                'city': registration.city_name,
+                'photo_thumbnail': registration.thumbnail_url(400, 'jpg'),
+                'created_at': registration.created_at.isoformat(),
+            }, event_id=activity.pk))
+        messages.append(format_event('counters', {
+            key: dict(value) if isinstance(value, Counter) else value
+            for key, value in delta.items()
+        }))
+        return messages
+
+
+hub = FeedHub()
+
+
+async def stream(snapshot, feed_hub=None):
+    """
+    SSE body for one subscriber: the current stats from `snapshot()` (a
+    JSON string), then live events, with keepalive comments while idle.
+    Ends after FEED_MAX_DURATION seconds; browsers reconnect on their own.
+    """
+    feed_hub = feed_hub or hub
+    keepalive = getattr(settings, 'FEED_KEEPALIVE', 15)
+    deadline = time.monotonic() + getattr(settings, 'FEED_MAX_DURATION', 1800)
+    queue = feed_hub.subscribe()
+    try:
+        yield 'retry: 3000\n\n'
+        yield f'event: snapshot\ndata: {await sync_to_async(snapshot)()}\n\n'
+        while time.monotonic() < deadline:
+            try:
+                message = await asyncio.wait_for(queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message is RESYNC:
+                yield f'event: snapshot\ndata: {await sync_to_async(snapshot)()}\n\n'
+            else:
+                yield message
+    finally:
+        feed_hub.unsubscribe(queue)
@@ -0,0 +1,119 @@
+"""
+Small database-backed job queue.
+
+Tasks are plain functions registered with ``@register('name')``. ``enqueue``
+stores a Job row in the caller's transaction, so the job exists exactly when
+the work that produced it was committed. The ``run_jobs`` management command
+claims due jobs with a conditional UPDATE (safe across several workers),
+retries failures with exponential backoff and re-claims jobs whose worker
+died mid-run, which gives at-least-once delivery. Tasks must therefore be
+idempotent. Tasks that may run longer than JOBS_VISIBILITY_TIMEOUT call
+``heartbeat()`` now and then so they are not handed to another worker.
+"""
+from datetime import timedelta
+import logging
+import threading
+import traceback
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+# The job being run by this thread, for heartbeat()
+_current = threading.local()
+
+
+def register(name):
+    """Decorator registering a function as the handler for task `name`"""
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, run_after=None, **payload):
+    """Queue task `name` with JSON-serializable keyword arguments"""
+    if name not in _tasks:
+        raise ValueError(f"Unknown task '{name}'")
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=getattr(settings, 'JOBS_MAX_ATTEMPTS', 5),
+        run_after=run_after or timezone.now(),
+    )
+
+
+def queue_depth():
+    """Number of jobs waiting to run or currently running"""
+    return Job.objects.filter(status__in=['pending', 'running']).count()
+
+
+def _due_jobs(now):
+    visibility = timedelta(
+        seconds=getattr(settings, 'JOBS_VISIBILITY_TIMEOUT', 300))
+    return Job.objects.filter(
+        Q(status='pending', run_after__lte=now) |
+        # A running job whose worker stopped reporting is handed out again
+        Q(status='running', locked_at__lt=now - visibility)
+    )
+
+
+def claim(job_id, now):
+    """Take ownership of a due job; False if another worker got it first"""
+    return _due_jobs(now).filter(pk=job_id).update(
+        status='running', locked_at=now, attempts=F('attempts') + 1) == 1
+
+
+def heartbeat():
+    """Mark the job running in this thread as alive (see the module docs)"""
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is not None:
+        Job.objects.filter(pk=job_id, status='running').update(
+            locked_at=timezone.now())
+
+
+def run_job(job):
+    """Run one claimed job and record its outcome"""
+    _current.job_id = job.pk
+    try:
+        _tasks[job.name](**job.payload)
+    except Exception as e:
+        job.refresh_from_db(fields=['attempts'])
+        failed = job.attempts >= job.max_attempts
+        delay = min(2 ** job.attempts, 3600)
+        Job.objects.filter(pk=job.pk).update(
+            status='failed' if failed else 'pending',
+            run_after=timezone.now() + timedelta(seconds=delay),
+            locked_at=None,
+            last_error=traceback.format_exc(),
+            finished_at=timezone.now() if failed else None,
+        )
+        logger.error(f"Job {job} failed (attempt {job.attempts}): {e}")
+        return False
+    finally:
+        _current.job_id = None
+
+    Job.objects.filter(pk=job.pk).update(
+        status='done', locked_at=None, finished_at=timezone.now())
+    return True
+
+
+def run_pending(limit=20):
+    """Claim and run up to `limit` due jobs; returns how many were run"""
+    now = timezone.now()
+    candidates = _due_jobs(now).order_by('run_after').values_list(
+        'pk', flat=True)[:limit]
+
+    processed = 0
+    for job_id in list(candidates):
+        if not claim(job_id, now):
+            continue
+        run_job(Job.objects.get(pk=job_id))
+        processed += 1
+    return processed
@@ -0,0 +1,109 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from registration import search
+from registration.models import TalentEventRegistration, Sequence
+
+
+class Command(BaseCommand):
+    help = ('Assign missing serial numbers and compact all serials to 1..N '
+            'in registration (created_at) order. Registrations submitted '
+            'while this runs keep working but are numbered after the '
+            'temporary block, so run it in a quiet period for a gap-free result.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Rows updated per transaction (default: 2000)')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Show the serial number changes without applying them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+
+        rows = (TalentEventRegistration.objects
+                .order_by('created_at', 'pk')
+                .values_list('pk', 'serial_number'))
+        changes = []
+        total = 0
+        for total, (pk, serial_number) in enumerate(rows.iterator(chunk_size=5000), 1):
+            if serial_number != total:
+                changes.append((pk, serial_number, total))
+
+        self.stdout.write(
+            f'{total} registrations read, {len(changes)} serial numbers to change '
+            f'({self._rate(total, started)}).')
+
+        if options['dry_run']:
+            for pk, old, new in changes[:50]:
+                self.stdout.write(f'  {old if old is not None else "-"} -> {new}  ({pk})')
+            if len(changes) > 50:
+                self.stdout.write(f'  ... and {len(changes) - 50} more')
+            return
+        if not changes:
+            self.stdout.write(self.style.SUCCESS('Serial numbers are already compact.'))
+            return
+
+        sequence = TalentEventRegistration.SERIAL_SEQUENCE
+        current_max = TalentEventRegistration.objects.aggregate(
+            value=Max('serial_number'))['value'] or 0
+        # New submissions must never receive a number in 1..N, and the
+        # temporary block below must not clash with anything
+        Sequence.objects.advance(sequence, max(total, current_max))
+        temp_start = TalentEventRegistration.allocate_serial_numbers(len(changes))
+        reserved_until = temp_start + len(changes) - 1
+
+        # Phase 1 frees the target numbers by moving the rows that change
+        # into the reserved block; phase 2 writes the final numbers. Each
+        # batch commits on its own so live submissions never wait long.
+        phase_started = time.monotonic()
+        self._update(
+            [(pk, temp_start + i) for i, (pk, _, _) in enumerate(changes)],
+            batch_size)
+        self._update([(pk, new) for pk, _, new in changes], batch_size)
+        self.stdout.write(
+            f'Updated {len(changes)} rows twice '
+            f'({self._rate(2 * len(changes), phase_started)}).')
+
+        # Hand the reserved block back unless someone allocated after it
+        Sequence.objects.filter(name=sequence, value=reserved_until).update(
+            value=TalentEventRegistration.objects.aggregate(
+                value=Max('serial_number'))['value'] or 0)
+
+        # The search index is keyed by serial number
+        search.get_backend().rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Assigned serial numbers 1..{total} in '
+            f'{time.monotonic() - started:.2f}s.'))
+
+    def _update(self, assignments, batch_size):
+        # One primary-key UPDATE per row via executemany; much faster than
+        # bulk_update's CASE WHEN chains for large batches
+        meta = TalentEventRegistration._meta
+        quote = connection.ops.quote_name
+        sql = (f'UPDATE {quote(meta.db_table)} '
+               f'SET {quote(meta.get_field("serial_number").column)} = %s, '
+               f'{quote(meta.get_field("updated_at").column)} = %s '
+               f'WHERE {quote(meta.pk.column)} = %s')
+        # Renumbered rows count as changed (e.g. for cached exports)
+        updated_at = meta.get_field('updated_at').get_db_prep_value(
+            timezone.now(), connection)
+        for start in range(0, len(assignments), batch_size):
+            params = [
+                (serial_number, updated_at,
+                 meta.pk.get_db_prep_value(pk, connection))
+                for pk, serial_number in assignments[start:start + batch_size]
+            ]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+
+    def _rate(self, rows, since):
+        elapsed = time.monotonic() - since
+        return f'{rows / elapsed:,.0f} rows/s' if elapsed > 0 else 'instant'
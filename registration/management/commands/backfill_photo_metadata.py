@@ -0,0 +1,68 @@
+import time
+
+from django.core.files.images import get_image_dimensions
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from registration.models import TalentEventRegistration
+
+
+class Command(BaseCommand):
+    help = 'Store photo byte size and dimensions for registrations missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Registrations updated per query (default: 500)')
+
+    def handle(self, *args, **options):
+        storage = TalentEventRegistration._meta.get_field('photo').storage
+        queryset = (TalentEventRegistration.objects.exclude(photo='')
+                    .filter(photo_bytes__isnull=True)
+                    .only('pk', 'photo').order_by('pk'))
+        started = time.monotonic()
+        updated = missing = 0
+        last_pk = None
+
+        while True:
+            batch_queryset = queryset
+            if last_pk is not None:
+                batch_queryset = queryset.filter(pk__gt=last_pk)
+            batch = list(batch_queryset[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            # Content-addressed photos may be shared; read each file once
+            metadata = {}
+            for registration in batch:
+                name = registration.photo.name
+                if name not in metadata:
+                    metadata[name] = self._read(storage, name)
+                if metadata[name] is None:
+                    missing += 1
+                    continue
+                (registration.photo_bytes, registration.photo_width,
+                 registration.photo_height) = metadata[name]
+
+            filled = [r for r in batch if r.photo_bytes is not None]
+            # Exports show the photo size; a new updated_at invalidates them
+            now = timezone.now()
+            for registration in filled:
+                registration.updated_at = now
+            TalentEventRegistration.objects.bulk_update(
+                filled, ['photo_bytes', 'photo_width', 'photo_height', 'updated_at'])
+            updated += len(filled)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored photo metadata for {updated} registrations in '
+            f'{elapsed:.1f}s ({missing} missing files skipped).'))
+
+    def _read(self, storage, name):
+        if not storage.exists(name):
+            self.stderr.write(f'Missing file: {name}')
+            return None
+        with storage.open(name, 'rb') as photo:
+            width, height = get_image_dimensions(photo, close=False)
+        return storage.size(name), width, height
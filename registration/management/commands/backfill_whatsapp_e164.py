@@ -0,0 +1,132 @@
+import itertools
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from registration.models import TalentEventRegistration, normalize_whatsapp
+
+
+class Command(BaseCommand):
+    help = ('Store the E.164 WhatsApp number of registrations missing it and '
+            'recompute their duplicate keys (migration 0018 does this once; '
+            'use --all after changing WHATSAPP_DEFAULT_COUNTRY_CODE). '
+            'Registrations that turn out to duplicate an earlier one lose '
+            'their duplicate key and are listed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Registrations updated per transaction (default: 1000)')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every registration, e.g. after changing '
+                 'WHATSAPP_DEFAULT_COUNTRY_CODE')
+
+    def handle(self, *args, **options):
+        queryset = TalentEventRegistration.objects.only(
+            'pk', 'serial_number', 'full_name', 'whatsapp_number')
+        if not options['all']:
+            queryset = queryset.filter(whatsapp_e164__isnull=True)
+        started = time.monotonic()
+        updated = invalid = 0
+        duplicates = {}
+        seen = set()  # keys given to a registration by this run
+
+        # In serial number order, so the earliest registration keeps its key
+        for batch in itertools.chain(
+                self._batches(queryset.filter(serial_number__isnull=False),
+                              'serial_number', options['batch_size']),
+                self._batches(queryset.filter(serial_number__isnull=True),
+                              'pk', options['batch_size'])):
+            with transaction.atomic():
+                batch_duplicates, demoted = self._normalize(batch, seen)
+                self._update(batch, demoted)
+            for registration in batch_duplicates + demoted:
+                duplicates.setdefault(registration.pk, registration)
+            updated += len(batch)
+            invalid += sum(1 for r in batch if r.whatsapp_e164 is None)
+
+        for registration in duplicates.values():
+            self.stderr.write(
+                f'Duplicate: {registration.registration_id} '
+                f'({registration.full_name}, {registration.whatsapp_number})')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Normalized {updated} WhatsApp numbers in {elapsed:.1f}s '
+            f'({invalid} not valid, {len(duplicates)} duplicates).'))
+
+    def _batches(self, queryset, field, batch_size):
+        """Lists of registrations ordered by `field`, batch_size at a time"""
+        queryset = queryset.order_by(field)
+        last = None
+        while True:
+            batch_queryset = queryset
+            if last is not None:
+                batch_queryset = queryset.filter(**{f'{field}__gt': last})
+            batch = list(batch_queryset[:batch_size])
+            if not batch:
+                return
+            last = getattr(batch[-1], field)
+            yield batch
+
+    def _update(self, batch, demoted):
+        # Old keys go first, so a key never has two holders mid-batch
+        TalentEventRegistration.objects.filter(
+            pk__in=[r.pk for r in batch + demoted]).update(duplicate_key=None)
+        # One prepared UPDATE per row: much cheaper than bulk_update's CASE
+        # expressions for a column that differs on every row
+        meta = TalentEventRegistration._meta
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {quote(meta.db_table)} SET whatsapp_e164 = %s, '
+                f'duplicate_key = %s WHERE {quote(meta.pk.column)} = %s',
+                [(r.whatsapp_e164, r.duplicate_key,
+                  meta.pk.get_db_prep_value(r.pk, connection)) for r in batch])
+
+    @staticmethod
+    def _order(registration):
+        """Position of a registration in the order the batches run in"""
+        serial_number = registration.serial_number
+        return (serial_number is None, serial_number or 0, str(registration.pk))
+
+    def _normalize(self, batch, seen):
+        """
+        Set the number and key of each registration. Returns the batch's
+        duplicates, and the registrations outside the batch that lose their
+        key to an earlier one in it.
+        """
+        for registration in batch:
+            registration.whatsapp_e164 = normalize_whatsapp(
+                registration.whatsapp_number)
+            registration.duplicate_key = TalentEventRegistration.build_duplicate_key(
+                registration.full_name, registration.whatsapp_number)
+
+        # Keys already held by registrations outside this batch
+        holders = {
+            holder.duplicate_key: holder
+            for holder in TalentEventRegistration.objects.filter(
+                duplicate_key__in={r.duplicate_key for r in batch} - {None},
+            ).exclude(pk__in=[r.pk for r in batch]).only(
+                'pk', 'serial_number', 'full_name', 'whatsapp_number',
+                'duplicate_key')
+        }
+
+        duplicates, demoted = [], []
+        for registration in batch:
+            key = registration.duplicate_key
+            if not key:
+                continue
+            holder = holders.pop(key, None)
+            if key in seen or (
+                    holder and self._order(holder) < self._order(registration)):
+                registration.duplicate_key = None
+                duplicates.append(registration)
+                continue
+            if holder:
+                # A later registration holds the key and is the duplicate
+                holder.duplicate_key = None
+                demoted.append(holder)
+            seen.add(key)
+        return duplicates, demoted
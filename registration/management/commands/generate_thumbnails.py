@@ -0,0 +1,68 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from registration import photos
+from registration.models import TalentEventRegistration
+
+
+class Command(BaseCommand):
+    help = 'Generate photo thumbnails for registrations that are missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 2,
+            help='Number of worker processes (default: CPU count)')
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Registrations flagged per database update (default: 200)')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regenerate thumbnails that already exist')
+
+    def handle(self, *args, **options):
+        queryset = TalentEventRegistration.objects.exclude(photo='')
+        if not options['force']:
+            queryset = queryset.filter(has_thumbnails=False)
+        photo_names = list(queryset.values_list('photo', flat=True).distinct())
+
+        if not photo_names:
+            self.stdout.write('All photos already have thumbnails.')
+            return
+
+        self.stdout.write(
+            f"Generating thumbnails for {len(photo_names)} photos "
+            f"with {options['workers']} workers...")
+        started = time.monotonic()
+        done, failed = [], 0
+
+        settings_module = os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'talent_event_backend.settings')
+        with ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=photos.init_worker,
+                initargs=(settings_module,)) as pool:
+            results = pool.map(photos.generate_in_worker, photo_names,
+                               chunksize=8)
+            for photo_name, error in results:
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{photo_name}: {error}')
+                    continue
+                done.append(photo_name)
+                if len(done) >= options['batch_size']:
+                    self._mark_done(done)
+                    done = []
+        self._mark_done(done)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {len(photo_names)} photos in {elapsed:.1f}s '
+            f'({failed} failed).'))
+
+    def _mark_done(self, photo_names):
+        if photo_names:
+            TalentEventRegistration.objects.filter(
+                photo__in=photo_names).update(has_thumbnails=True)
@@ -0,0 +1,202 @@
+import csv
+import itertools
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from registration import search
+from registration.models import (
+    TalentEventRegistration, RegistrationActivity, StatisticCounter, City,
+    normalize_whatsapp)
+from registration.serializers import RegistrationImportSerializer
+
+# Form field names accepted as aliases of the model field names
+FIELD_ALIASES = {
+    'fullName': 'full_name',
+    'dateOfBirth': 'date_of_birth',
+    'ageGroup': 'age_group',
+    'Talent': 'talent_details',
+    'whatsappNumber': 'whatsapp_number',
+}
+
+
+class Command(BaseCommand):
+    help = ('Import offline registrations from a CSV or JSONL file. Rows are '
+            'validated like API submissions, duplicates (same name and '
+            'WhatsApp number) are skipped and rejected rows are written to a '
+            'reject file.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSONL file')
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='Input format (default: from the file extension)')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows inserted per transaction (default: 1000)')
+        parser.add_argument(
+            '--rejects',
+            help='Where to write rejected rows (default: <path>.rejects.csv)')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validate and report without inserting anything')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        input_format = options['format'] or (
+            'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        rejects_path = options['rejects'] or f'{path}.rejects.csv'
+
+        self.dry_run = options['dry_run']
+        self.source = os.path.basename(path)
+        self.seen_keys = {}
+        started = time.monotonic()
+        imported = self.rejected = 0
+
+        with open(path, newline='', encoding='utf-8-sig') as infile, \
+                open(rejects_path, 'w', newline='', encoding='utf-8') as rejects_file:
+            self.rejects = csv.writer(rejects_file)
+            self.rejects.writerow(['line', 'error', 'row'])
+
+            rows = self._read(infile, input_format)
+            while True:
+                chunk = list(itertools.islice(rows, options['batch_size']))
+                if not chunk:
+                    break
+                imported += self._insert(self._validate(chunk))
+
+        elapsed = time.monotonic() - started
+        verb = 'Validated' if self.dry_run else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {imported} registrations in {elapsed:.1f}s; '
+            f'{self.rejected} rejected (see {rejects_path}).'))
+
+    def _read(self, infile, input_format):
+        """Yield (line number, row dict) pairs without loading the file"""
+        if input_format == 'csv':
+            reader = csv.DictReader(infile)
+            for row in reader:
+                yield reader.line_num, self._normalize_keys(row)
+            return
+
+        for line_number, line in enumerate(infile, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                self._reject(line_number, f'Invalid JSON: {e}', line.strip())
+                continue
+            if not isinstance(row, dict):
+                self._reject(line_number, 'Expected a JSON object', line.strip())
+                continue
+            yield line_number, self._normalize_keys(row)
+
+    def _normalize_keys(self, row):
+        return {FIELD_ALIASES.get(key, key): value
+                for key, value in row.items() if key}
+
+    def _reject(self, line_number, error, row):
+        if not isinstance(row, str):
+            row = json.dumps(row, ensure_ascii=False)
+        self.rejected += 1
+        self.rejects.writerow([line_number, error, row])
+
+    def _validate(self, chunk):
+        """
+        Validate a chunk and drop duplicates, both within the file and
+        against the database (one query per chunk)
+        """
+        candidates = []
+        for line_number, row in chunk:
+            serializer = RegistrationImportSerializer(data=row)
+            if not serializer.is_valid():
+                errors = '; '.join(
+                    f'{field}: {" ".join(str(e) for e in messages)}'
+                    for field, messages in serializer.errors.items())
+                self._reject(line_number, errors, row)
+                continue
+
+            data = serializer.validated_data
+            key = TalentEventRegistration.build_duplicate_key(
+                data['full_name'], data['whatsapp_number'])
+            if key in self.seen_keys:
+                self._reject(
+                    line_number,
+                    f'Duplicate of line {self.seen_keys[key]} in this file', row)
+                continue
+            self.seen_keys[key] = line_number
+            candidates.append((line_number, row, key, data))
+
+        existing = self._existing_serials([key for _, _, key, _ in candidates])
+        valid = []
+        for line_number, row, key, data in candidates:
+            if key in existing:
+                self._reject(
+                    line_number,
+                    f'Already registered (Registration #{existing[key]})', row)
+            else:
+                valid.append((line_number, row, key, data))
+        return valid
+
+    def _existing_serials(self, keys):
+        return dict(TalentEventRegistration.objects.filter(
+            duplicate_key__in=keys).values_list('duplicate_key', 'serial_number'))
+
+    def _insert(self, valid):
+        """Insert a validated chunk with a pre-allocated serial number block"""
+        if self.dry_run:
+            return len(valid)
+
+        for attempt in range(2):
+            if not valid:
+                return 0
+            try:
+                with transaction.atomic():
+                    first_serial = TalentEventRegistration.allocate_serial_numbers(
+                        len(valid))
+                    now = timezone.now()
+                    cities = City.objects.resolve_many(
+                        [data['city'] for _, _, _, data in valid])
+                    registrations = TalentEventRegistration.objects.bulk_create([
+                        TalentEventRegistration(
+                            serial_number=first_serial + index,
+                            duplicate_key=key,
+                            whatsapp_e164=normalize_whatsapp(data['whatsapp_number']),
+                            canonical_city=cities[data['city']],
+                            created_at=now,
+                            user_agent=f'import:{self.source}',
+                            **data)
+                        for index, (_, _, key, data) in enumerate(valid)
+                    ])
+                    RegistrationActivity.objects.bulk_create([
+                        RegistrationActivity(
+                            registration=registration,
+                            activity_type='registration',
+                            description=f"Registration imported for {registration.full_name}",
+                            metadata={'source': self.source, 'line': line_number})
+                        for registration, (line_number, _, _, _)
+                        in zip(registrations, valid)
+                    ])
+                    StatisticCounter.objects.add_registrations(registrations)
+                    # bulk_create sends no post_save, so index here
+                    search.index_registrations(registrations)
+                return len(valid)
+            except IntegrityError:
+                # A live submission took one of our rows meanwhile; drop the
+                # new duplicates and retry the chunk once
+                existing = self._existing_serials([key for _, _, key, _ in valid])
+                for line_number, row, key, _ in valid:
+                    if key in existing:
+                        self._reject(
+                            line_number,
+                            f'Already registered (Registration #{existing[key]})', row)
+                valid = [item for item in valid if item[2] not in existing]
+                if attempt or not existing:
+                    raise
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.models import City
+
+
+class Command(BaseCommand):
+    help = ('Merge cities into one, e.g. a misspelling into the canonical '
+            'city. Registrations and aliases move to the target; the '
+            'statistic counters and the search index are rebuilt.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', help='Name of the city to keep')
+        parser.add_argument('sources', nargs='+', help='Names of the cities to merge into it')
+
+    def handle(self, *args, **options):
+        try:
+            target = City.objects.get(name=options['target'])
+        except City.DoesNotExist:
+            raise CommandError(f"City not found: {options['target']}")
+        sources = list(City.objects.filter(name__in=options['sources']))
+        missing = set(options['sources']) - {city.name for city in sources}
+        if missing:
+            raise CommandError(f"Cities not found: {', '.join(sorted(missing))}")
+
+        City.objects.merge(target, sources)
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {', '.join(city.name for city in sources)} into {target.name}."))
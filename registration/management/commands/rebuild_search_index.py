@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from registration import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the registration search index from the registrations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Registrations indexed per batch (default: 2000)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        backend = search.get_backend()
+        indexed = backend.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} registrations with {type(backend).__name__} in '
+            f'{time.monotonic() - started:.1f}s.'))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from registration.models import StatisticCounter
+
+
+class Command(BaseCommand):
+    help = ('Recompute the daily statistic counters and the hourly/weekly '
+            'rollups from the registrations in one aggregate pass')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        daily, rollups = StatisticCounter.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {daily} daily counters and {rollups} rollups in '
+            f'{time.monotonic() - started:.1f}s.'))
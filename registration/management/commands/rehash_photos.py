@@ -0,0 +1,127 @@
+import os
+import shutil
+import time
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from registration import photos
+from registration.models import TalentEventRegistration, PhotoBlob
+
+
+class Command(BaseCommand):
+    help = ('Move existing participant photos to content-addressed names '
+            'and rebuild the photo reference counts')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Registrations updated per transaction (default: 500)')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Show what would be moved without changing anything')
+
+    def handle(self, *args, **options):
+        self.storage = TalentEventRegistration._meta.get_field('photo').storage
+        self.dry_run = options['dry_run']
+        started = time.monotonic()
+
+        legacy_names = [
+            name for name in TalentEventRegistration.objects.exclude(photo='')
+            .values_list('photo', flat=True).distinct().order_by('photo')
+            if not self.storage.is_content_addressed(name)
+        ]
+        self.stdout.write(f'{len(legacy_names)} photos to rehash.')
+
+        moved = missing = 0
+        for start in range(0, len(legacy_names), options['batch_size']):
+            batch = legacy_names[start:start + options['batch_size']]
+            renames = {}
+            for name in batch:
+                new_name = self._link(name)
+                if new_name is None:
+                    missing += 1
+                else:
+                    renames[name] = new_name
+            if not self.dry_run:
+                self._relink(renames)
+            moved += len(renames)
+
+        if not self.dry_run:
+            self._recount()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would rehash" if self.dry_run else "Rehashed"} {moved} photos '
+            f'in {elapsed:.1f}s ({missing} missing files skipped).'))
+
+    def _link(self, name):
+        """Hard link (or copy) a legacy file to its content address"""
+        path = self.storage.path(name)
+        if not os.path.exists(path):
+            self.stderr.write(f'Missing file: {name}')
+            return None
+
+        with open(path, 'rb') as f:
+            new_name = self.storage.content_name(name, File(f))
+        self.stdout.write(f'  {name} -> {new_name}')
+        if self.dry_run:
+            return new_name
+
+        new_path = self.storage.path(new_name)
+        if not os.path.exists(new_path):
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            try:
+                os.link(path, new_path)
+            except OSError:
+                shutil.copy2(path, new_path)
+        return new_name
+
+    def _relink(self, renames):
+        """Point registrations at the new names, then drop the old files"""
+        with transaction.atomic():
+            registrations = list(
+                TalentEventRegistration.objects.filter(photo__in=list(renames))
+                .only('pk', 'photo'))
+            now = timezone.now()
+            for registration in registrations:
+                registration.photo.name = renames[registration.photo.name]
+                registration.has_thumbnails = False
+                registration.updated_at = now
+            TalentEventRegistration.objects.bulk_update(
+                registrations, ['photo', 'has_thumbnails', 'updated_at'])
+            PhotoBlob.objects.filter(name__in=list(renames)).delete()
+
+        # Only remove old files once the database no longer refers to them
+        for old_name in renames:
+            photos.delete_derivatives(old_name, self.storage)
+            if self.storage.exists(old_name):
+                self.storage.delete(old_name)
+
+    def _recount(self):
+        """Rebuild PhotoBlob reference counts from the registrations"""
+        references = dict(
+            TalentEventRegistration.objects.exclude(photo='')
+            .values_list('photo').annotate(refs=Count('pk')).order_by())
+        with transaction.atomic():
+            existing = set(PhotoBlob.objects.values_list('name', flat=True))
+            PhotoBlob.objects.bulk_create([
+                PhotoBlob(name=name, refcount=refs)
+                for name, refs in references.items() if name not in existing
+            ], batch_size=500)
+            blobs = list(PhotoBlob.objects.all())
+            for blob in blobs:
+                blob.refcount = references.get(blob.name, 0)
+                if blob.refcount:
+                    blob.released_at = None
+            PhotoBlob.objects.bulk_update(
+                blobs, ['refcount', 'released_at'], batch_size=500)
+            for blob in blobs:
+                if not blob.refcount:
+                    PhotoBlob.objects.discard(blob.name)
+        self.stdout.write(
+            'Photo references recounted; run generate_thumbnails to rebuild '
+            'thumbnails for moved photos.')
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from registration import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (registration follow-up work)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the jobs that are due now and exit')
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Jobs claimed per polling round (default: 20)')
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Seconds to wait when the queue is empty (default: 1)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Job worker started, queue depth: {jobs.queue_depth()}')
+        try:
+            while True:
+                processed = jobs.run_pending(limit=options['batch_size'])
+                if processed:
+                    self.stdout.write(
+                        f'Processed {processed} jobs, queue depth: {jobs.queue_depth()}')
+                if options['once'] and not processed:
+                    break
+                if not processed:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Job worker stopped'))
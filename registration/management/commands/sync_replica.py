@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from registration import replicas
+
+
+class Command(BaseCommand):
+    help = ('Stamp the replication heartbeat on the primary and, when both '
+            'are SQLite, copy the primary to the replica (DATABASE_REPLICA). '
+            'Other replicas are kept up to date by the database server; the '
+            'heartbeat tells how far behind they are.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Repeat every INTERVAL seconds instead of syncing once')
+
+    def handle(self, *args, **options):
+        alias = replicas.replica()
+        if not alias:
+            raise CommandError('DATABASE_REPLICA is not set.')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        copy = primary.vendor == replica.vendor == 'sqlite'
+
+        try:
+            while True:
+                started = time.monotonic()
+                replicas.stamp_heartbeat()
+                if copy:
+                    replicas.copy_sqlite(replica.settings_dict['NAME'])
+                    self.stdout.write(
+                        f'Copied the primary to {replica.settings_dict["NAME"]} '
+                        f'in {time.monotonic() - started:.1f}s.')
+                else:
+                    self.stdout.write('Stamped the replication heartbeat.')
+                if options['interval'] is None:
+                    break
+                time.sleep(max(0.0, options['interval'] - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
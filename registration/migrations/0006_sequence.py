@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:34
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_serial_sequence(apps, schema_editor):
+    """Start the serial sequence at the highest serial number in use"""
+    Sequence = apps.get_model('registration', 'Sequence')
+    TalentEventRegistration = apps.get_model(
+        'registration', 'TalentEventRegistration')
+    db = schema_editor.connection.alias
+
+    current = TalentEventRegistration.objects.using(db).aggregate(
+        value=Max('serial_number'))['value'] or 0
+    Sequence.objects.using(db).update_or_create(
+        name='registration_serial', defaults={'value': current})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0005_auto_20250808_1502'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sequence',
+                'verbose_name_plural': 'Sequences',
+            },
+        ),
+        migrations.RunPython(seed_serial_sequence, migrations.RunPython.noop),
+    ]
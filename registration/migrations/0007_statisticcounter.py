@@ -0,0 +1,67 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:35
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.functions import TruncDate
+
+
+def backfill_counters(apps, schema_editor):
+    """Count existing registrations into the per-day counters"""
+    StatisticCounter = apps.get_model('registration', 'StatisticCounter')
+    TalentEventRegistration = apps.get_model(
+        'registration', 'TalentEventRegistration')
+    RegistrationActivity = apps.get_model('registration', 'RegistrationActivity')
+    db = schema_editor.connection.alias
+
+    # Same rule as StatisticCounter.objects.rebuild(): only registrations
+    # with a 'registration' activity are counted
+    counted = RegistrationActivity.objects.using(db).filter(
+        registration=OuterRef('pk'), activity_type='registration')
+
+    counters = {}
+    rows = (TalentEventRegistration.objects.using(db)
+            .filter(Exists(counted))
+            .annotate(day=TruncDate('created_at'))
+            .values_list('day', 'event', 'age_group', 'city')
+            .annotate(total=Count('pk'))
+            .order_by())
+    for day, event, age_group, city, total in rows:
+        for dimension, value in (('total', ''), ('event', event),
+                                 ('age_group', age_group), ('city', city)):
+            key = (day, dimension, value)
+            counters[key] = counters.get(key, 0) + total
+
+    StatisticCounter.objects.using(db).bulk_create([
+        StatisticCounter(date=day, dimension=dimension, value=value, count=count)
+        for (day, dimension, value), count in counters.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0006_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatisticCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('dimension', models.CharField(choices=[('total', 'Total Registrations'), ('event', 'Event'), ('age_group', 'Age Group'), ('city', 'City')], max_length=20)),
+                ('value', models.CharField(blank=True, default='', max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistic Counter',
+                'verbose_name_plural': 'Statistic Counters',
+                'ordering': ['-date', 'dimension', 'value'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statisticcounter',
+            constraint=models.UniqueConstraint(fields=('date', 'dimension', 'value'), name='unique_statistic_counter'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:36
+
+from django.db import migrations, models
+import re
+
+
+def fill_duplicate_keys(apps, schema_editor):
+    """
+    Compute duplicate keys for existing rows. If older data already holds
+    duplicates, only the earliest registration keeps the key.
+    """
+    TalentEventRegistration = apps.get_model(
+        'registration', 'TalentEventRegistration')
+    db = schema_editor.connection.alias
+
+    seen = set()
+    batch = []
+    rows = TalentEventRegistration.objects.using(db).order_by(
+        'serial_number', 'created_at').only('full_name', 'whatsapp_number')
+    for registration in rows.iterator(chunk_size=1000):
+        name = ' '.join((registration.full_name or '').split()).casefold()
+        digits = re.sub(r'\D', '', registration.whatsapp_number or '')
+        key = f'{name}|{digits}' if name and digits else None
+        if key in seen:
+            continue
+        seen.add(key)
+        registration.duplicate_key = key
+        batch.append(registration)
+        if len(batch) >= 1000:
+            TalentEventRegistration.objects.using(db).bulk_update(
+                batch, ['duplicate_key'])
+            batch = []
+    TalentEventRegistration.objects.using(db).bulk_update(
+        batch, ['duplicate_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0007_statisticcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='talenteventregistration',
+            name='duplicate_key',
+            field=models.CharField(blank=True, editable=False, max_length=220, null=True, verbose_name='Duplicate Check Key'),
+        ),
+        migrations.RunPython(fill_duplicate_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='talenteventregistration',
+            name='duplicate_key',
+            field=models.CharField(blank=True, editable=False, max_length=220, null=True, unique=True, verbose_name='Duplicate Check Key'),
+        ),
+        migrations.RemoveIndex(
+            model_name='talenteventregistration',
+            name='registratio_full_na_7808d0_idx',
+        ),
+    ]
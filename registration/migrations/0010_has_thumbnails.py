@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='talenteventregistration',
+            name='has_thumbnails',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Thumbnails Generated'),
+        ),
+    ]
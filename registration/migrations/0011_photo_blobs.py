@@ -0,0 +1,50 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:41
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.utils.timezone
+import registration.models
+import registration.storage
+
+
+def count_photo_references(apps, schema_editor):
+    """Create a blob row for every photo file already in use"""
+    PhotoBlob = apps.get_model('registration', 'PhotoBlob')
+    TalentEventRegistration = apps.get_model(
+        'registration', 'TalentEventRegistration')
+    db = schema_editor.connection.alias
+
+    references = (TalentEventRegistration.objects.using(db).exclude(photo='')
+                  .values_list('photo').annotate(refs=Count('pk')).order_by())
+    PhotoBlob.objects.using(db).bulk_create([
+        PhotoBlob(name=name, refcount=refs) for name, refs in references
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0010_has_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhotoBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Photo Blob',
+                'verbose_name_plural': 'Photo Blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='talenteventregistration',
+            name='photo',
+            field=models.ImageField(storage=registration.storage.photo_storage, upload_to=registration.models.participant_photo_path, verbose_name='Participant Photo'),
+        ),
+        migrations.RunPython(count_photo_references, migrations.RunPython.noop),
+    ]
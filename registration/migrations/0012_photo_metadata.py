@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0011_photo_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='talenteventregistration',
+            name='photo_bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Photo Size (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='talenteventregistration',
+            name='photo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Photo Height'),
+        ),
+        migrations.AddField(
+            model_name='talenteventregistration',
+            name='photo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Photo Width'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import registration.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('registration', '0012_photo_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel'), ('zip', 'Photos ZIP')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('cache_key', models.CharField(editable=False, max_length=64)),
+                ('watermark', models.CharField(editable=False, max_length=100)),
+                ('query', models.BinaryField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('file', models.FileField(blank=True, editable=False, storage=registration.storage.export_storage, upload_to='')),
+                ('file_size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('reused', models.BooleanField(default=False, help_text='Served from an earlier export of the same data')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='registration_exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export',
+                'verbose_name_plural': 'My Exports',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['cache_key', 'watermark'], name='registratio_cache_k_dc5fc7_idx')],
+            },
+        ),
+    ]
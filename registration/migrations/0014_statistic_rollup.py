@@ -0,0 +1,79 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:00
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    """Count existing registrations into the hourly and weekly rollups"""
+    StatisticRollup = apps.get_model('registration', 'StatisticRollup')
+    TalentEventRegistration = apps.get_model(
+        'registration', 'TalentEventRegistration')
+    RegistrationActivity = apps.get_model('registration', 'RegistrationActivity')
+    db = schema_editor.connection.alias
+
+    # Same rule as StatisticCounter.objects.rebuild(): only registrations
+    # with a 'registration' activity are counted
+    counted = RegistrationActivity.objects.using(db).filter(
+        registration=OuterRef('pk'), activity_type='registration')
+
+    rollups = {}
+    rows = (TalentEventRegistration.objects.using(db)
+            .filter(Exists(counted))
+            .annotate(hour=TruncHour('created_at'))
+            .values_list('hour', 'event', 'age_group', 'city')
+            .annotate(total=Count('pk'))
+            .order_by())
+    for hour, event, age_group, city, total in rows:
+        local = timezone.localtime(hour)
+        monday = local.date() - timedelta(days=local.weekday())
+        periods = {
+            'hour': local,
+            'week': timezone.make_aware(datetime.combine(monday, time.min)),
+        }
+        for dimension, value in (('total', ''), ('event', event),
+                                 ('age_group', age_group), ('city', city)):
+            for granularity, period in periods.items():
+                key = (granularity, period, dimension, value)
+                rollups[key] = rollups.get(key, 0) + total
+
+    StatisticRollup.objects.using(db).bulk_create([
+        StatisticRollup(granularity=granularity, period=period,
+                        dimension=dimension, value=value, count=count)
+        for (granularity, period, dimension, value), count in rollups.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0013_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatisticRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('week', 'Week')], max_length=10)),
+                ('period', models.DateTimeField()),
+                ('dimension', models.CharField(choices=[('total', 'Total Registrations'), ('event', 'Event'), ('age_group', 'Age Group'), ('city', 'City')], max_length=20)),
+                ('value', models.CharField(blank=True, default='', max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistic Rollup',
+                'verbose_name_plural': 'Statistic Rollups',
+                'ordering': ['granularity', '-period', 'dimension', 'value'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statisticrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'period', 'dimension', 'value'), name='unique_statistic_rollup'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+import re
+
+from django.db import migrations, OperationalError
+
+
+def create_search_index(apps, schema_editor):
+    """FTS5 search table on SQLite builds that have FTS5; filled from the registrations"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE registration_search USING fts5("
+                "full_name, city, whatsapp_number, talent_details, "
+                "tokenize = 'unicode61 remove_diacritics 2')")
+    except OperationalError:
+        # SQLite without FTS5: search falls back to LIKE
+        return
+
+    TalentEventRegistration = apps.get_model(
+        'registration', 'TalentEventRegistration')
+    rows = []
+    for serial_number, full_name, city, whatsapp_number, talent_details in (
+            TalentEventRegistration.objects.using(connection.alias)
+            .exclude(serial_number__isnull=True)
+            .values_list('serial_number', 'full_name', 'city',
+                         'whatsapp_number', 'talent_details')
+            .iterator()):
+        digits = re.sub(r'\D', '', whatsapp_number or '')
+        if len(digits) > 10:
+            digits = f'{digits} {digits[-10:]}'
+        rows.append((serial_number, full_name, city, digits, talent_details or ''))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO registration_search (rowid, full_name, city, '
+            'whatsapp_number, talent_details) VALUES (%s, %s, %s, %s, %s)', rows)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS registration_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0014_statistic_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
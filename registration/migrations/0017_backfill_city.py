@@ -0,0 +1,153 @@
+import re
+import unicodedata
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 2000
+
+# Known spellings of cities in the region, mapped to their canonical name
+KNOWN_ALIASES = {
+    'Ahmedabad': ['Amdavad', 'Ahmadabad', 'Amdavad City'],
+    'Vadodara': ['Baroda'],
+    'Bharuch': ['Broach'],
+    'Valsad': ['Bulsar'],
+    'Mehsana': ['Mahesana'],
+    'Morbi': ['Morvi'],
+    'Surat': [],
+    'Rajkot': [],
+    'Bhavnagar': [],
+    'Jamnagar': [],
+    'Junagadh': [],
+    'Gandhinagar': [],
+    'Anand': [],
+    'Navsari': [],
+    'Vapi': [],
+}
+
+
+def normalize_city(name):
+    # Same as models.normalize_city at the time of this migration
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', name.casefold()).split())
+
+
+class Resolver:
+    """Historical-model version of City.objects.resolve with a local cache"""
+
+    def __init__(self, apps, db):
+        self.City = apps.get_model('registration', 'City')
+        self.CityAlias = apps.get_model('registration', 'CityAlias')
+        self.db = db
+        self.cache = dict(self.CityAlias.objects.using(db).values_list('key', 'city_id'))
+
+    def __call__(self, name):
+        key = normalize_city(name)
+        if not key:
+            return None
+        if key not in self.cache:
+            display = ' '.join(name.split())
+            if display.islower() or display.isupper():
+                display = display.title()
+            city, _ = self.City.objects.using(self.db).get_or_create(name=display)
+            self.CityAlias.objects.using(self.db).create(key=key, city=city)
+            self.cache[key] = city.pk
+        return self.cache[key]
+
+
+def backfill_cities(apps, schema_editor):
+    db = schema_editor.connection.alias
+    TalentEventRegistration = apps.get_model('registration', 'TalentEventRegistration')
+    StatisticCounter = apps.get_model('registration', 'StatisticCounter')
+    StatisticRollup = apps.get_model('registration', 'StatisticRollup')
+    resolve = Resolver(apps, db)
+
+    with transaction.atomic(using=db):
+        for name, aliases in KNOWN_ALIASES.items():
+            city_id = resolve(name)
+            for alias in aliases:
+                key = normalize_city(alias)
+                if key not in resolve.cache:
+                    resolve.CityAlias.objects.using(db).create(key=key, city_id=city_id)
+                    resolve.cache[key] = city_id
+
+    # One short transaction per batch so live registrations are not blocked
+    registrations = TalentEventRegistration.objects.using(db).order_by('pk')
+    last_pk = None
+    while True:
+        batch = registrations.filter(canonical_city__isnull=True)
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(batch.values_list('pk', 'city')[:BATCH_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        with transaction.atomic(using=db):
+            by_city = {}
+            for pk, city in rows:
+                city_id = resolve(city)
+                if city_id is not None:
+                    by_city.setdefault(city_id, []).append(pk)
+            for city_id, pks in by_city.items():
+                TalentEventRegistration.objects.using(db).filter(
+                    pk__in=pks).update(canonical_city_id=city_id)
+
+    # City counters and rollups are keyed by City id from now on
+    with transaction.atomic(using=db):
+        for model, fields in ((StatisticCounter, ('date',)),
+                              (StatisticRollup, ('granularity', 'period'))):
+            merged = {}
+            for row in model.objects.using(db).filter(dimension='city').values(
+                    *fields, 'value', 'count'):
+                city_id = resolve(row['value'])
+                key = tuple(row[field] for field in fields) + (
+                    str(city_id) if city_id is not None else '',)
+                merged[key] = merged.get(key, 0) + row['count']
+            model.objects.using(db).filter(dimension='city').delete()
+            model.objects.using(db).bulk_create([
+                model(dimension='city', count=count,
+                      value=key[-1], **dict(zip(fields, key[:-1])))
+                for key, count in merged.items()
+            ], batch_size=500)
+
+    # Let searches for the canonical name find the registrations too
+    connection = schema_editor.connection
+    if (connection.vendor == 'sqlite'
+            and 'registration_search' in connection.introspection.table_names()):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE registration_search SET city = ("
+                " SELECT r.city || ' ' || c.name"
+                " FROM registration_talenteventregistration r"
+                " JOIN registration_city c ON c.id = r.canonical_city_id"
+                " WHERE r.serial_number = registration_search.rowid)"
+                " WHERE rowid IN ("
+                " SELECT r.serial_number FROM registration_talenteventregistration r"
+                " JOIN registration_city c ON c.id = r.canonical_city_id"
+                " WHERE r.city != c.name)")
+
+
+def restore_city_counters(apps, schema_editor):
+    """Key the city counters and rollups by city name again"""
+    db = schema_editor.connection.alias
+    City = apps.get_model('registration', 'City')
+    names = {str(pk): name for pk, name in City.objects.using(db).values_list('pk', 'name')}
+    for model_name in ('StatisticCounter', 'StatisticRollup'):
+        model = apps.get_model('registration', model_name)
+        for counter in model.objects.using(db).filter(dimension='city'):
+            if counter.value in names:
+                counter.value = names[counter.value]
+                counter.save(update_fields=['value'])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('registration', '0016_city'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_cities, restore_city_counters),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:18
+
+from django.conf import settings
+from django.db import migrations, models
+import re
+
+
+def normalize_whatsapp(number, country_code):
+    """models.normalize_whatsapp() as of this migration"""
+    number = (number or '').strip()
+    digits = re.sub(r'\D', '', number)
+    if number.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = country_code + digits[1:]
+    elif len(digits) == 10:
+        digits = country_code + digits
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    return f'+{digits}'
+
+
+def fill_whatsapp_e164(apps, schema_editor):
+    """
+    Store the E.164 number of existing rows and rebuild their duplicate
+    keys on it. If older rows turn out to be duplicates, only the earliest
+    registration keeps the key (as in 0008).
+    """
+    TalentEventRegistration = apps.get_model(
+        'registration', 'TalentEventRegistration')
+    meta = TalentEventRegistration._meta
+    connection = schema_editor.connection
+    country_code = getattr(settings, 'WHATSAPP_DEFAULT_COUNTRY_CODE', '91')
+
+    seen = set()
+    updates = []
+    rows = TalentEventRegistration.objects.using(connection.alias).order_by(
+        'serial_number', 'created_at').values_list(
+            'pk', 'full_name', 'whatsapp_number')
+    for pk, full_name, whatsapp_number in rows.iterator(chunk_size=1000):
+        e164 = normalize_whatsapp(whatsapp_number, country_code)
+        name = ' '.join((full_name or '').split()).casefold()
+        number = e164 or re.sub(r'\D', '', whatsapp_number or '')
+        key = f'{name}|{number}' if name and number else None
+        if key in seen:
+            key = None
+        seen.add(key)
+        updates.append(
+            (e164, key, meta.pk.get_db_prep_value(pk, connection)))
+
+    # Old keys are dropped first so a new key never meets an old one. One
+    # prepared UPDATE per row is much cheaper than bulk_update here.
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(meta.db_table)} SET duplicate_key = NULL')
+        cursor.executemany(
+            f'UPDATE {quote(meta.db_table)} SET whatsapp_e164 = %s, '
+            f'duplicate_key = %s WHERE {quote(meta.pk.column)} = %s',
+            updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0017_backfill_city'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='talenteventregistration',
+            name='whatsapp_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True, verbose_name='WhatsApp Number (E.164)'),
+        ),
+        migrations.RunPython(fill_whatsapp_e164, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='talenteventregistration',
+            index=models.Index(fields=['whatsapp_e164'], name='registratio_whatsap_a6d1a8_idx'),
+        ),
+    ]
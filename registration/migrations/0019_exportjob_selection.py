@@ -0,0 +1,31 @@
+# Generated by Django 4.2.16 on 2026-10-17 09:40
+
+from django.db import migrations, models
+
+
+def fail_unbuilt_exports(apps, schema_editor):
+    """Exports still waiting for a build have no selection to rebuild from"""
+    ExportJob = apps.get_model('registration', 'ExportJob')
+    ExportJob.objects.filter(status__in=['pending', 'running']).update(
+        status='failed',
+        error='This export was requested before an upgrade; please export again.')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0018_whatsapp_e164'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='selection',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.RunPython(fail_unbuilt_exports, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='exportjob',
+            name='query',
+        ),
+    ]
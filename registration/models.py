@@ -1,20 +1,230 @@
-from django.db import models
+from django.db import models, transaction, connections, IntegrityError
+from django.conf import settings
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.core.files.images import get_image_dimensions
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+import hashlib
+import unicodedata
 import uuid
 import os
+import re
+
+from .storage import export_storage, photo_storage
 
 
 def participant_photo_path(instance, filename):
-    """Generate file path for participant photos"""
+    """
+    Generate file path for participant photos. The photo storage replaces
+    the file name with the SHA-256 of the content.
+    """
     ext = filename.split('.')[-1]
     filename = f'{uuid.uuid4()}.{ext}'
     return os.path.join('participant_photos', filename)
 
 
+class SequenceManager(models.Manager):
+    """Hands out values from named counter rows"""
+
+    def allocate(self, name, count=1, start=0):
+        """
+        Atomically reserve `count` consecutive values from sequence `name`
+        and return the first one. `start` (a value or a callable) seeds the
+        sequence the first time it is used.
+        """
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+
+        with transaction.atomic(using=self.db):
+            for _ in range(2):
+                if connection.features.can_return_columns_from_insert:
+                    # Single round trip on SQLite >= 3.35 and PostgreSQL
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f'UPDATE {table} SET value = value + %s '
+                            f'WHERE name = %s RETURNING value',
+                            [count, name])
+                        row = cursor.fetchone()
+                    if row:
+                        return row[0] - count + 1
+                elif self.filter(name=name).update(value=F('value') + count):
+                    return self.get(name=name).value - count + 1
+
+                # First use of this sequence: seed it, then retry the update.
+                # A concurrent worker may win the insert, which is fine.
+                try:
+                    with transaction.atomic(using=self.db):
+                        self.create(
+                            name=name, value=start() if callable(start) else start)
+                except IntegrityError:
+                    pass
+
+        raise RuntimeError(f"Could not allocate from sequence '{name}'")
+
+    def advance(self, name, value):
+        """Make sure sequence `name` won't hand out `value` or anything below"""
+        with transaction.atomic(using=self.db):
+            _, created = self.get_or_create(name=name, defaults={'value': value})
+            if not created:
+                self.filter(name=name, value__lt=value).update(value=value)
+
+
+class Sequence(models.Model):
+    """Named counter used to allocate gap-free numbers such as serials"""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    objects = SequenceManager()
+
+    class Meta:
+        verbose_name = "Sequence"
+        verbose_name_plural = "Sequences"
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+def normalize_city(name):
+    """
+    Lookup key of a city name: case, accents, punctuation and spacing are
+    ignored, so "Ahmedabad", "ahmedabad " and "AHMEDABAD." share a key
+    """
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', name.casefold()).split())
+
+
+def normalize_whatsapp(number, country_code=None):
+    """
+    E.164 form ('+919876543210') of a typed WhatsApp number, or None if it
+    can't be one. Numbers without a country code ('98765 43210' or
+    '098765 43210') get WHATSAPP_DEFAULT_COUNTRY_CODE.
+    """
+    number = (number or '').strip()
+    digits = re.sub(r'\D', '', number)
+    if country_code is None:
+        country_code = getattr(settings, 'WHATSAPP_DEFAULT_COUNTRY_CODE', '91')
+    if number.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]  # international call prefix
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = country_code + digits[1:]  # trunk prefix
+    elif len(digits) == 10:
+        digits = country_code + digits
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+    return f'+{digits}'
+
+
+class CityManager(models.Manager):
+    """Interns free-text city names as City rows"""
+
+    def resolve(self, name):
+        """City for the typed `name`, created on first sight; None if blank"""
+        return self.resolve_many([name]).get(name)
+
+    def resolve_many(self, names):
+        """Mapping of each typed name to its City (one query when all are known)"""
+        keys = {name: normalize_city(name) for name in set(names)}
+        cities = {
+            alias.key: alias.city for alias in CityAlias.objects.using(self.db)
+            .select_related('city').filter(key__in=set(keys.values()) - {''})
+        }
+        for name, key in keys.items():
+            if key and key not in cities:
+                cities[key] = self._create(name, key)
+        return {name: cities.get(key) for name, key in keys.items()}
+
+    def _create(self, name, key):
+        display = ' '.join(name.split())
+        if display.islower() or display.isupper():
+            display = display.title()
+        for _ in range(2):
+            try:
+                with transaction.atomic(using=self.db):
+                    city, _ = self.get_or_create(name=display)
+                    CityAlias.objects.using(self.db).create(key=key, city=city)
+                return city
+            except IntegrityError:
+                # Another process added the alias first
+                alias = CityAlias.objects.using(self.db).select_related(
+                    'city').filter(key=key).first()
+                if alias:
+                    return alias.city
+        raise RuntimeError(f"Could not resolve city '{name}'")
+
+    def names(self, ids):
+        """City names by id, for counter values (ids as strings)"""
+        ids = [int(value) for value in ids if str(value).isdigit()]
+        return {str(pk): name for pk, name in self.using(self.db).filter(
+            pk__in=ids).values_list('pk', 'name')}
+
+    def merge(self, target, sources):
+        """
+        Move the registrations and aliases of `sources` to `target` and
+        delete them. The counters and search index are rebuilt.
+        """
+        from . import search
+
+        sources = [city for city in sources if city.pk != target.pk]
+        with transaction.atomic(using=self.db):
+            TalentEventRegistration.objects.using(self.db).filter(
+                canonical_city__in=sources).update(
+                    canonical_city=target, updated_at=timezone.now())
+            CityAlias.objects.using(self.db).filter(
+                city__in=sources).update(city=target)
+            self.using(self.db).filter(pk__in=[city.pk for city in sources]).delete()
+        StatisticCounter.objects.db_manager(self.db).rebuild()
+        search.get_backend(self.db).rebuild()
+
+
+class City(models.Model):
+    """Canonical city; registrations point here instead of repeating free text"""
+
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = CityManager()
+
+    class Meta:
+        verbose_name = "City"
+        verbose_name_plural = "Cities"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class CityAlias(models.Model):
+    """A spelling of a city (as normalize_city key) that maps to a City"""
+
+    key = models.CharField(max_length=100, unique=True)
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        verbose_name = "City Alias"
+        verbose_name_plural = "City Aliases"
+        ordering = ['key']
+
+    def __str__(self):
+        return f"{self.key} -> {self.city.name}"
+
+    def save(self, *args, **kwargs):
+        self.key = normalize_city(self.key)
+        super().save(*args, **kwargs)
+
+
 class TalentEventRegistration(models.Model):
     """Model for storing talent event registration data"""
 
+    # Name of the Sequence row that hands out serial numbers
+    SERIAL_SEQUENCE = 'registration_serial'
+
     # Choices for various fields
     GENDER_CHOICES = [
         ('male', 'Male'),
@@ -64,14 +274,40 @@ class TalentEventRegistration(models.Model):
         help_text="Details about talent (instruments, awards, shows, etc.)")
     city = models.CharField(
         max_length=100, verbose_name="Current Residence City")
+    # The typed city interned as a City, resolved through its aliases on save
+    canonical_city = models.ForeignKey(
+        City, null=True, blank=True, editable=False, on_delete=models.PROTECT,
+        related_name='registrations', verbose_name="City")
 
     # Contact Information
     whatsapp_number = models.CharField(
         max_length=15, verbose_name="WhatsApp Number")
+    # The number as E.164 (see normalize_whatsapp), set on save
+    whatsapp_e164 = models.CharField(
+        max_length=16, null=True, blank=True, editable=False,
+        verbose_name="WhatsApp Number (E.164)")
+
+    # Normalized name + E.164 WhatsApp number; unique so that duplicate
+    # detection is a single insert-or-fail
+    duplicate_key = models.CharField(
+        max_length=220, unique=True, null=True, blank=True, editable=False,
+        verbose_name="Duplicate Check Key")
 
     # Photo Upload
     photo = models.ImageField(
-        upload_to=participant_photo_path, verbose_name="Participant Photo")
+        upload_to=participant_photo_path, storage=photo_storage,
+        verbose_name="Participant Photo")
+    has_thumbnails = models.BooleanField(
+        default=False, editable=False, verbose_name="Thumbnails Generated")
+
+    # Photo metadata stored at upload time so lists and exports never stat
+    # or open the file
+    photo_bytes = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, verbose_name="Photo Size (bytes)")
+    photo_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, verbose_name="Photo Width")
+    photo_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, verbose_name="Photo Height")
 
     # Terms and Conditions
     terms = models.CharField(
@@ -100,8 +336,7 @@ class TalentEventRegistration(models.Model):
             models.Index(fields=['event']),
             models.Index(fields=['age_group']),
             models.Index(fields=['city']),
-            # Index for faster duplicate checking
-            models.Index(fields=['full_name', 'whatsapp_number']),
+            models.Index(fields=['whatsapp_e164']),
         ]
 
     def __str__(self):
@@ -112,54 +347,153 @@ class TalentEventRegistration(models.Model):
         """Generate a human-readable registration ID using serial number"""
         return f"BK2025-{str(self.serial_number).zfill(4)}"
 
+    @property
+    def city_name(self):
+        """Canonical city name, or the typed city until it is resolved"""
+        if self.canonical_city_id is not None:
+            return self.canonical_city.name
+        return self.city
+
     @property
     def photo_size_mb(self):
-        """Get photo size in MB"""
+        """Get photo size in MB from the stored byte count"""
+        if self.photo_bytes is not None:
+            return round(self.photo_bytes / (1024 * 1024), 2)
         if self.photo:
+            # Not backfilled yet (see the backfill_photo_metadata command)
             return round(self.photo.size / (1024 * 1024), 2)
         return 0
 
+    def read_photo_metadata(self):
+        """Fill photo_bytes/width/height from the (possibly unsaved) photo"""
+        if not self.photo:
+            self.photo_bytes = self.photo_width = self.photo_height = None
+            return
+        self.photo_bytes = self.photo.size
+        self.photo_width, self.photo_height = get_image_dimensions(self.photo)
+
+    def store_photo(self):
+        """
+        Write a newly uploaded photo to the photo storage now rather than
+        in save(), so the copy and hash run outside the write transaction.
+        save() still treats it as a new photo.
+        """
+        if not self.photo or self.photo._committed:
+            return
+        self.read_photo_metadata()
+        self.photo.save(self.photo.name, self.photo.file, save=False)
+        self._stored_photo = self.photo.name
+
+    def thumbnail_url(self, size=64, ext='webp'):
+        """URL of a resized photo, falling back to the original"""
+        from .photos import derivative_name
+
+        if not self.photo:
+            return ''
+        if not self.has_thumbnails:
+            return self.photo.url
+        return self.photo.storage.url(
+            derivative_name(self.photo.name, size, ext))
+
+    @classmethod
+    def allocate_serial_numbers(cls, count=1):
+        """Reserve a block of `count` serial numbers and return the first"""
+        def current_max():
+            return cls.objects.aggregate(
+                value=Max('serial_number'))['value'] or 0
+
+        return Sequence.objects.allocate(
+            cls.SERIAL_SEQUENCE, count=count, start=current_max)
+
+    @staticmethod
+    def build_duplicate_key(full_name, whatsapp_number):
+        """
+        Normalized identity used for duplicate detection: the case-folded,
+        whitespace-collapsed name and the E.164 WhatsApp number (its bare
+        digits if it has no E.164 form)
+        """
+        name = ' '.join((full_name or '').split()).casefold()
+        number = (normalize_whatsapp(whatsapp_number)
+                  or re.sub(r'\D', '', whatsapp_number or ''))
+        if not name or not number:
+            return None
+        return f'{name}|{number}'
+
+    def duplicate_message(self, existing):
+        """Error shown when `existing` already uses this name and number"""
+        return f'Warning: A participant with both the same name "{self.full_name}" and WhatsApp number "{self.whatsapp_number}" already exists (Registration #{existing.serial_number}). If this is a different person, please use a different name or contact support.'
+
     def clean(self):
         """Custom validation for the model"""
         super().clean()
 
         # Check for duplicate BOTH full_name AND whatsapp_number combination
-        # Only show warning if BOTH fields match exactly
-        if self.full_name and self.whatsapp_number:
+        # using the indexed normalization key
+        key = self.build_duplicate_key(self.full_name, self.whatsapp_number)
+        if key:
             existing = TalentEventRegistration.objects.filter(
-                full_name__iexact=self.full_name.strip(),
-                whatsapp_number=self.whatsapp_number.strip()
-            )
-
-            # Exclude current instance if editing
-            if self.pk:
-                existing = existing.exclude(pk=self.pk)
-
-            if existing.exists():
-                existing_user = existing.first()
-                raise ValidationError({
-                    '__all__': f'Warning: A participant with both the same name "{self.full_name}" and WhatsApp number "{self.whatsapp_number}" already exists (Registration #{existing_user.serial_number}). If this is a different person, please use a different name or contact support.'
-                })
+                duplicate_key=key).exclude(pk=self.pk).first()
+            if existing:
+                raise ValidationError({'__all__': self.duplicate_message(existing)})
 
     def save(self, *args, **kwargs):
-        """Custom save method with validation and auto serial number"""
-        # Run clean validation first
-        self.clean()
-
+        """
+        Custom save method with auto serial number. Duplicates are caught
+        by the unique duplicate_key constraint instead of a prior SELECT.
+        """
         # Validate terms agreement
         if self.terms != 'yes':
             raise ValueError("Terms and conditions must be agreed to register")
 
-        # Auto-generate serial number if not set
-        if not self.serial_number:
-            last_registration = TalentEventRegistration.objects.order_by(
-                'serial_number').last()
-            if last_registration:
-                self.serial_number = last_registration.serial_number + 1
-            else:
-                self.serial_number = 1
+        self.whatsapp_e164 = normalize_whatsapp(self.whatsapp_number)
+        self.duplicate_key = self.build_duplicate_key(
+            self.full_name, self.whatsapp_number)
+        self.canonical_city = City.objects.resolve(self.city)
 
-        super().save(*args, **kwargs)
+        # A newly uploaded photo (see store_photo) needs fresh thumbnails
+        stored_photo = getattr(self, '_stored_photo', None)
+        new_photo = bool(self.photo) and (
+            not self.photo._committed or self.photo.name == stored_photo)
+        if new_photo:
+            self.has_thumbnails = False
+            if not self.photo._committed:
+                self.read_photo_metadata()
+
+        # Allocate the serial number in the same transaction as the insert,
+        # so a failed insert rolls the counter back and leaves no gap
+        allocated = not self.serial_number
+        try:
+            with transaction.atomic(using=kwargs.get('using')):
+                if allocated:
+                    self.serial_number = self.allocate_serial_numbers()
+                # The stored row, whose photo reference and statistics move
+                previous = None
+                if not self._state.adding:
+                    previous = TalentEventRegistration.objects.filter(
+                        pk=self.pk).only(
+                            'photo', 'created_at',
+                            *StatisticCounter.DIMENSION_FIELDS.values()).first()
+                super().save(*args, **kwargs)
+                if previous is not None:
+                    StatisticCounter.objects.db_manager(
+                        kwargs.get('using')).move_registration(previous, self)
+                if new_photo:
+                    PhotoBlob.objects.retain(self.photo.name)
+                    if (previous and previous.photo
+                            and previous.photo.name != self.photo.name):
+                        PhotoBlob.objects.release(previous.photo.name)
+                    from . import jobs
+                    jobs.enqueue('process_photo',
+                                 registration_id=str(self.pk))
+            self._stored_photo = None
+        except IntegrityError:
+            if allocated:
+                self.serial_number = None
+            existing = TalentEventRegistration.objects.filter(
+                duplicate_key=self.duplicate_key).exclude(pk=self.pk).first()
+            if self.duplicate_key and existing:
+                raise ValidationError({'__all__': self.duplicate_message(existing)})
+            raise
 
 
 class RegistrationActivity(models.Model):
@@ -192,8 +526,266 @@ class RegistrationActivity(models.Model):
         return f"{self.registration.full_name} - {self.get_activity_type_display()}"
 
 
+class CounterManager(models.Manager):
+    """
+    Lossless counter updates that never read-modify-write in Python. A
+    counter row is identified by the model's COUNTER_FIELDS and holds the
+    number in `count`.
+    """
+
+    class _MissingCounters(Exception):
+        pass
+
+    def increment(self, counts):
+        """
+        Apply a mapping of counter key (values of COUNTER_FIELDS) -> amount.
+        Keys sharing an amount are bumped by a single UPDATE with F()
+        expressions; rows that don't exist yet are created first and the
+        update is retried. Decrements stop at zero and skip missing rows.
+        """
+        counts = {key: amount for key, amount in counts.items() if amount}
+        if not counts:
+            return
+
+        by_amount = defaultdict(list)
+        for key, amount in counts.items():
+            by_amount[amount].append(key)
+
+        with transaction.atomic(using=self.db):
+            try:
+                with transaction.atomic(using=self.db):
+                    self._apply(by_amount, strict=True)
+            except self._MissingCounters:
+                self.bulk_create(
+                    [self.model(**self._lookup(key))
+                     for key, amount in counts.items() if amount > 0],
+                    ignore_conflicts=True)
+                self._apply(by_amount)
+
+    def _lookup(self, key):
+        return dict(zip(self.model.COUNTER_FIELDS, key))
+
+    def _apply(self, by_amount, strict=False):
+        for amount, keys in by_amount.items():
+            condition = Q()
+            for key in keys:
+                condition |= Q(**self._lookup(key))
+            if amount < 0:
+                self.filter(condition).update(
+                    count=Greatest(F('count') + amount, 0))
+                continue
+            updated = self.filter(condition).update(count=F('count') + amount)
+            if strict and updated != len(keys):
+                raise self._MissingCounters()
+
+
+class StatisticCounterManager(CounterManager):
+    """Daily counters, kept in step with the hourly and weekly rollups"""
+
+    def add_registrations(self, registrations):
+        """Count one or more new registrations in the counters and rollups"""
+        self._count([(registration, 1) for registration in registrations])
+
+    def remove_registrations(self, registrations):
+        """Take counted registrations back out of the counters and rollups"""
+        self._count([(registration, -1) for registration in registrations])
+
+    def move_registration(self, before, after):
+        """
+        Recount a counted registration whose event, age group or city was
+        edited: `before` holds the values (and created_at) it was counted
+        under, `after` the new ones
+        """
+        dimension_values = self.model.dimension_values
+        if dimension_values(before) == dimension_values(after):
+            return
+        if not RegistrationActivity.objects.using(self.db).filter(
+                registration=after.pk, activity_type='registration').exists():
+            return
+        self._count([(before, -1), (after, 1)])
+
+    def _count(self, changes):
+        """Apply (registration, amount) pairs to the counters and rollups"""
+        daily = Counter()
+        rollups = Counter()
+        for registration, amount in changes:
+            date = timezone.localdate(registration.created_at)
+            periods = StatisticRollup.periods(registration.created_at)
+            for dimension, value in self.model.dimension_values(registration):
+                daily[(date, dimension, value)] += amount
+                for granularity, period in periods.items():
+                    rollups[(granularity, period, dimension, value)] += amount
+
+        with transaction.atomic(using=self.db):
+            # Taken first so rebuild() never interleaves with this update
+            self.bump_version()
+            self.increment(daily)
+            StatisticRollup.objects.db_manager(self.db).increment(rollups)
+
+    def rebuild(self):
+        """
+        Recount all counters and rollups from the registrations with one
+        aggregate query, grouped by hour. Only registrations already
+        counted by `record_registration` (or imported) are included, so
+        pending jobs still add theirs afterwards. Returns the number of
+        daily counter and rollup rows written.
+        """
+        from django.db.models import Exists, OuterRef
+        from django.db.models.functions import TruncHour
+
+        counted = RegistrationActivity.objects.filter(
+            registration=OuterRef('pk'), activity_type='registration')
+        daily = Counter()
+        rollups = Counter()
+
+        with transaction.atomic(using=self.db):
+            self.bump_version()
+            rows = (TalentEventRegistration.objects.using(self.db)
+                    .filter(Exists(counted))
+                    .annotate(hour=TruncHour('created_at'))
+                    .values_list('hour', 'event', 'age_group', 'canonical_city')
+                    .annotate(registrations=Count('pk'))
+                    .order_by())
+            for hour, event, age_group, city_id, registrations in rows:
+                date = timezone.localdate(hour)
+                periods = StatisticRollup.periods(hour)
+                registration = TalentEventRegistration(
+                    event=event, age_group=age_group, canonical_city_id=city_id)
+                for dimension, value in self.model.dimension_values(registration):
+                    daily[(date, dimension, value)] += registrations
+                    for granularity, period in periods.items():
+                        rollups[(granularity, period, dimension, value)] += registrations
+
+            rollup_manager = StatisticRollup.objects.db_manager(self.db)
+            self.all().delete()
+            rollup_manager.all().delete()
+            self.bulk_create(
+                [self.model(count=count, **self._lookup(key))
+                 for key, count in daily.items()], batch_size=1000)
+            rollup_manager.bulk_create(
+                [StatisticRollup(count=count, **rollup_manager._lookup(key))
+                 for key, count in rollups.items()], batch_size=1000)
+        return len(daily), len(rollups)
+
+    def version(self):
+        """Number that changes whenever the statistics change"""
+        return Sequence.objects.using(self.db).filter(
+            name=self.model.VERSION_SEQUENCE).values_list(
+                'value', flat=True).first() or 0
+
+    def bump_version(self):
+        """Mark cached statistics (see views.registration_stats) as outdated"""
+        return Sequence.objects.db_manager(self.db).allocate(
+            self.model.VERSION_SEQUENCE)
+
+
+class StatisticCounter(models.Model):
+    """
+    One counter row per (date, dimension, value), e.g. (today, event,
+    singing). City counters are keyed by City id.
+    """
+
+    DIMENSION_CHOICES = [
+        ('total', 'Total Registrations'),
+        ('event', 'Event'),
+        ('age_group', 'Age Group'),
+        ('city', 'City'),
+    ]
+
+    date = models.DateField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    value = models.CharField(max_length=100, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = ('date', 'dimension', 'value')
+
+    # Registration field counted by each dimension
+    DIMENSION_FIELDS = {
+        'event': 'event', 'age_group': 'age_group', 'city': 'canonical_city'}
+
+    # Sequence row bumped on every counter change
+    VERSION_SEQUENCE = 'stats_version'
+
+    objects = StatisticCounterManager()
+
+    class Meta:
+        verbose_name = "Statistic Counter"
+        verbose_name_plural = "Statistic Counters"
+        ordering = ['-date', 'dimension', 'value']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'dimension', 'value'],
+                name='unique_statistic_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.dimension}={self.value}: {self.count}"
+
+    @staticmethod
+    def dimension_values(registration):
+        """The (dimension, value) pairs a registration is counted under"""
+        return [
+            ('total', ''),
+            ('event', registration.event),
+            ('age_group', registration.age_group),
+            ('city', str(registration.canonical_city_id or '')),
+        ]
+
+
+class StatisticRollup(models.Model):
+    """
+    Hourly and weekly counterparts of StatisticCounter, updated together
+    with it. `period` is the start of the hour or week (Monday) in local
+    time.
+    """
+
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hour'),
+        ('week', 'Week'),
+    ]
+
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    period = models.DateTimeField()
+    dimension = models.CharField(
+        max_length=20, choices=StatisticCounter.DIMENSION_CHOICES)
+    value = models.CharField(max_length=100, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = ('granularity', 'period', 'dimension', 'value')
+
+    objects = CounterManager()
+
+    class Meta:
+        verbose_name = "Statistic Rollup"
+        verbose_name_plural = "Statistic Rollups"
+        ordering = ['granularity', '-period', 'dimension', 'value']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'period', 'dimension', 'value'],
+                name='unique_statistic_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.period} {self.dimension}={self.value}: {self.count}"
+
+    @staticmethod
+    def periods(moment):
+        """Start of the hour and of the week containing `moment`, in local time"""
+        local = timezone.localtime(moment)
+        monday = local.date() - timedelta(days=local.weekday())
+        return {
+            'hour': local.replace(minute=0, second=0, microsecond=0),
+            'week': timezone.make_aware(datetime.combine(monday, time.min)),
+        }
+
+
 class EventStatistics(models.Model):
-    """Model to store event statistics"""
+    """
+    Daily statistics snapshot. The live numbers are kept in
+    StatisticCounter rows; this model is built from them on demand, and a
+    day's row is refreshed whenever record_registration counts a
+    registration of that day.
+    """
 
     date = models.DateField(default=timezone.now)
     total_registrations = models.IntegerField(default=0)
@@ -209,3 +801,355 @@ class EventStatistics(models.Model):
 
     def __str__(self):
         return f"Statistics for {self.date}"
+
+    @classmethod
+    def from_counters(cls, date):
+        """Build an (unsaved) statistics object for `date` from the counters"""
+        stats = cls(date=date)
+        by_dimension = {
+            'event': stats.registrations_by_event,
+            'age_group': stats.registrations_by_age_group,
+            'city': stats.registrations_by_city,
+        }
+        counters = StatisticCounter.objects.filter(date=date).values_list(
+            'dimension', 'value', 'count')
+        for dimension, value, count in counters:
+            if dimension == 'total':
+                stats.total_registrations = count
+            elif dimension in by_dimension:
+                by_dimension[dimension][value] = count
+        stats.registrations_by_city = cls.name_cities(stats.registrations_by_city)
+        return stats
+
+    @staticmethod
+    def name_cities(counts):
+        """City counts keyed by City id (as counted) re-keyed by city name"""
+        names = City.objects.names(counts)
+        return {names.get(value, value): count for value, count in counts.items()}
+
+    # Granularities accepted by series()
+    SERIES_GRANULARITIES = ('hour', 'day', 'week', 'event')
+
+    @classmethod
+    def series(cls, granularity, start, end):
+        """
+        Statistics per hour, day or week from `start` to `end` (dates,
+        inclusive), or a single bucket for the whole range ('event'). Read
+        from the counters and rollups only; periods without registrations
+        are included with zero counts.
+        """
+        if granularity == 'event':
+            periods = [start]
+            rows = (StatisticCounter.objects.filter(date__range=(start, end))
+                    .values_list('dimension', 'value')
+                    .annotate(total=Sum('count')).order_by())
+            rows = ((start, dimension, value, total)
+                    for dimension, value, total in rows)
+        elif granularity == 'day':
+            periods = [start + timedelta(days=offset)
+                       for offset in range((end - start).days + 1)]
+            rows = StatisticCounter.objects.filter(
+                date__range=(start, end)).values_list(
+                    'date', 'dimension', 'value', 'count')
+        elif granularity in ('hour', 'week'):
+            first = StatisticRollup.periods(
+                timezone.make_aware(datetime.combine(start, time.min)))[granularity]
+            stop = timezone.make_aware(
+                datetime.combine(end + timedelta(days=1), time.min))
+            step = timedelta(hours=1) if granularity == 'hour' else timedelta(weeks=1)
+            periods = []
+            while first < stop:
+                periods.append(first)
+                first = timezone.localtime(first + step)
+            rows = StatisticRollup.objects.filter(
+                granularity=granularity, period__gte=periods[0] if periods else stop,
+                period__lt=stop).values_list('period', 'dimension', 'value', 'count')
+        else:
+            raise ValueError(f"Unknown granularity '{granularity}'")
+
+        by_dimension = {
+            'event': 'registrations_by_event',
+            'age_group': 'registrations_by_age_group',
+            'city': 'registrations_by_city',
+        }
+        buckets = {
+            period: {
+                'period': period.isoformat(),
+                'total_registrations': 0,
+                'registrations_by_event': {},
+                'registrations_by_age_group': {},
+                'registrations_by_city': {},
+            } for period in periods
+        }
+        for period, dimension, value, count in rows:
+            bucket = buckets.get(period)
+            if bucket is None:
+                continue
+            if dimension == 'total':
+                bucket['total_registrations'] += count
+            elif dimension in by_dimension:
+                values = bucket[by_dimension[dimension]]
+                values[value] = values.get(value, 0) + count
+
+        names = City.objects.names({
+            value for bucket in buckets.values()
+            for value in bucket['registrations_by_city']})
+        for bucket in buckets.values():
+            bucket['registrations_by_city'] = {
+                names.get(value, value): count
+                for value, count in bucket['registrations_by_city'].items()}
+        return list(buckets.values())
+
+    @classmethod
+    def refresh(cls, date):
+        """Store the current counter values for `date` as a snapshot row"""
+        stats = cls.from_counters(date)
+        snapshot, _ = cls.objects.update_or_create(
+            date=date,
+            defaults={
+                'total_registrations': stats.total_registrations,
+                'registrations_by_event': stats.registrations_by_event,
+                'registrations_by_age_group': stats.registrations_by_age_group,
+                'registrations_by_city': stats.registrations_by_city,
+            }
+        )
+        return snapshot
+
+
+class Job(models.Model):
+    """A unit of deferred work stored in the database and run by `run_jobs`"""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=50, verbose_name="Task")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Background Job"
+        verbose_name_plural = "Background Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class PhotoBlobManager(models.Manager):
+    """Reference counting for content-addressed photo files"""
+
+    def retain(self, name, count=1):
+        """Record `count` more registrations using the file `name`"""
+        with transaction.atomic(using=self.db):
+            updated = self.filter(name=name).update(
+                refcount=F('refcount') + count, released_at=None)
+            if not updated:
+                try:
+                    with transaction.atomic(using=self.db):
+                        self.create(name=name, refcount=count)
+                except IntegrityError:
+                    self.filter(name=name).update(
+                        refcount=F('refcount') + count, released_at=None)
+
+    def release(self, name):
+        """
+        Drop one reference to `name`. Unreferenced files are deleted by a
+        background job after PHOTO_BLOB_GRACE_PERIOD seconds, so a retry
+        uploading the same bytes meanwhile can still reuse them.
+        """
+        with transaction.atomic(using=self.db):
+            self.filter(name=name, refcount__gt=0).update(
+                refcount=F('refcount') - 1)
+            self.discard(name)
+
+    def discard(self, name):
+        """Schedule deletion of `name` if nothing references it"""
+        from . import jobs
+
+        with transaction.atomic(using=self.db):
+            blob, _ = self.get_or_create(name=name)
+            if blob.refcount or blob.released_at:
+                return
+            grace = getattr(settings, 'PHOTO_BLOB_GRACE_PERIOD', 3600)
+            blob.released_at = timezone.now()
+            blob.save(update_fields=['released_at'])
+            jobs.enqueue('delete_photo_blob', photo_name=name,
+                         run_after=blob.released_at + timedelta(seconds=grace))
+
+
+class PhotoBlob(models.Model):
+    """A stored photo file and how many registrations point to it"""
+
+    name = models.CharField(max_length=255, primary_key=True)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    released_at = models.DateTimeField(null=True, blank=True)
+
+    objects = PhotoBlobManager()
+
+    class Meta:
+        verbose_name = "Photo Blob"
+        verbose_name_plural = "Photo Blobs"
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+class ExportJobManager(models.Manager):
+    """Queues exports and finds earlier results that can be reused"""
+
+    def filter_key(self, kind, queryset):
+        """Hash of the export kind and the registrations it selects"""
+        sql, params = queryset.order_by().query.sql_with_params()
+        return hashlib.sha256(
+            f'{kind}|{sql}|{params!r}'.encode()).hexdigest()
+
+    def watermark(self, queryset):
+        """
+        Changes whenever a selected registration is added, changed or
+        deleted. Bulk updates of exported fields must therefore set
+        updated_at too.
+        """
+        data = queryset.order_by().aggregate(
+            count=Count('pk'), latest=Max('updated_at'))
+        latest = data['latest'].isoformat() if data['latest'] else '-'
+        return f"{data['count']}@{latest}"
+
+    def cached(self, kind, cache_key, watermark):
+        """A finished export of the same data whose file still exists"""
+        for export in self.filter(
+                kind=kind, cache_key=cache_key, watermark=watermark,
+                status='done').exclude(file='').order_by('-finished_at'):
+            if export.file.storage.exists(export.file.name):
+                return export
+        return None
+
+    def request(self, kind, queryset, selection, user=None):
+        """
+        Create an export of `queryset` for `user`; `selection` describes it
+        for the worker (see ExportJob.selection). It is finished at once
+        when the same data was already exported, otherwise it is built by
+        the `build_export` job. Exports are deleted EXPORT_RETENTION
+        seconds after they were requested.
+        """
+        from . import jobs
+
+        export = self.model(
+            kind=kind,
+            requested_by=user if user and user.is_authenticated else None,
+            cache_key=self.filter_key(kind, queryset),
+            watermark=self.watermark(queryset),
+            selection=selection,
+        )
+        cached = self.cached(kind, export.cache_key, export.watermark)
+        with transaction.atomic(using=self.db):
+            if cached is not None:
+                export.reuse(cached)
+            export.save()
+            if cached is None:
+                jobs.enqueue('build_export', export_id=export.pk)
+            jobs.enqueue('expire_exports', run_after=export.created_at + timedelta(
+                seconds=getattr(settings, 'EXPORT_RETENTION', 7 * 86400)))
+        return export
+
+
+class ExportJob(models.Model):
+    """An admin export built in the background, downloadable when done"""
+
+    KIND_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+        ('zip', 'Photos ZIP'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default='pending')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True,
+        on_delete=models.SET_NULL, related_name='registration_exports')
+    # Same cache_key and watermark means the same registrations, unchanged
+    cache_key = models.CharField(max_length=64, editable=False)
+    watermark = models.CharField(max_length=100, editable=False)
+    # The registrations to export: the changelist query string ('filters')
+    # and, unless all matching rows were selected, the chosen 'pks'
+    selection = models.JSONField(default=dict, editable=False)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    file = models.FileField(storage=export_storage, blank=True, editable=False)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    reused = models.BooleanField(
+        default=False, help_text="Served from an earlier export of the same data")
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ExportJobManager()
+
+    class Meta:
+        verbose_name = "Export"
+        verbose_name_plural = "My Exports"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['cache_key', 'watermark']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
+
+    def get_queryset(self):
+        """The registrations this export covers, rebuilt from the selection"""
+        from django.contrib import admin
+
+        if not self.selection:
+            raise ValueError(
+                'This export was requested before an upgrade; please export again.')
+        if self.requested_by is None:
+            raise ValueError('The user who requested this export no longer exists.')
+        model_admin = admin.site._registry[TalentEventRegistration]
+        return model_admin.selection_queryset(self.selection, self.requested_by)
+
+    def reuse(self, other):
+        """Point this export at the finished file of `other`"""
+        self.file.name = other.file.name
+        self.file_size = other.file_size
+        self.total = self.processed = other.total
+        self.watermark = other.watermark
+        self.status = 'done'
+        self.reused = True
+        self.finished_at = timezone.now()
+
+    @property
+    def progress_percent(self):
+        if self.status == 'done':
+            return 100
+        return int(100 * self.processed / self.total) if self.total else 0
+
+    @property
+    def download_name(self):
+        stamp = timezone.localtime(self.created_at).strftime('%Y%m%d_%H%M%S')
+        if self.kind == 'zip':
+            return f'talent_event_photos_{stamp}.zip'
+        return f'talent_registrations_{stamp}.{self.kind}'
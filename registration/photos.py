@@ -0,0 +1,166 @@
+"""
+Participant photo processing.
+
+Uploads are normalized once after they are stored (EXIF orientation applied,
+metadata stripped, longest edge capped, re-encoded at PHOTO_JPEG_QUALITY).
+Every photo also gets small thumbnails stored next to the original, e.g.
+``participant_photos/<name>_64.webp`` and ``participant_photos/<name>_400.jpg``,
+so list pages never download full-size uploads.
+"""
+from dataclasses import dataclass
+import io
+import os
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Longest edge in pixels of each derivative
+THUMBNAIL_SIZES = (64, 400)
+
+# EXIF tag telling how the camera was held
+ORIENTATION = 0x0112
+
+# File extension -> Pillow format and save options
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True}),
+}
+
+
+def derivative_name(photo_name, size, ext):
+    """Storage name of the `size` px derivative of `photo_name`"""
+    root, _ = os.path.splitext(photo_name)
+    return f'{root}_{size}.{ext}'
+
+
+def derivative_names(photo_name):
+    """All derivative names for a photo"""
+    return [derivative_name(photo_name, size, ext)
+            for size in THUMBNAIL_SIZES for ext in THUMBNAIL_FORMATS]
+
+
+@dataclass
+class NormalizedPhoto:
+    """Outcome of normalize_photo()"""
+    name: str
+    image: Image.Image
+    original_bytes: int
+    stored_bytes: int
+
+    @property
+    def bytes_saved(self):
+        return max(0, self.original_bytes - self.stored_bytes)
+
+
+def photo_storage():
+    """Storage of the registration photo field, used when none is passed"""
+    from .models import TalentEventRegistration
+
+    return TalentEventRegistration._meta.get_field('photo').storage
+
+
+def load_image(photo_name, storage=None):
+    """Decode a stored photo upright and in an RGB(A) mode"""
+    storage = storage or photo_storage()
+    with storage.open(photo_name, 'rb') as source:
+        image = Image.open(source)
+        animated = getattr(image, 'is_animated', False)
+        rotated = image.getexif().get(ORIENTATION, 1) != 1
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    image.info['animated'] = animated
+    image.info['rotated'] = rotated
+    return image
+
+
+def normalize_photo(photo_name, storage=None):
+    """
+    Re-encode a stored photo without metadata, upright and no larger than
+    PHOTO_MAX_EDGE pixels. Photos with transparency stay PNG, everything
+    else becomes JPEG. The new file is saved next to the original, which is
+    left for the caller to delete once the new name is recorded. Animated
+    GIFs, and photos that needed neither resizing nor rotating and would
+    not get smaller, are returned as they are.
+    """
+    storage = storage or photo_storage()
+    original_bytes = storage.size(photo_name)
+    image = load_image(photo_name, storage)
+    if image.info.get('animated'):
+        return NormalizedPhoto(photo_name, image, original_bytes, original_bytes)
+
+    max_edge = getattr(settings, 'PHOTO_MAX_EDGE', 2048)
+    original_size = image.size
+    image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    changed = image.info['rotated'] or image.size != original_size
+
+    buffer = io.BytesIO()
+    icc_profile = image.info.get('icc_profile')
+    if image.mode == 'RGBA':
+        ext = 'png'
+        image.save(buffer, 'PNG', optimize=True, icc_profile=icc_profile)
+    else:
+        ext = 'jpg'
+        image.save(buffer, 'JPEG', icc_profile=icc_profile, optimize=True,
+                   progressive=True,
+                   quality=getattr(settings, 'PHOTO_JPEG_QUALITY', 85))
+
+    if not changed and buffer.tell() >= original_bytes:
+        return NormalizedPhoto(photo_name, image, original_bytes, original_bytes)
+
+    root, _ = os.path.splitext(photo_name)
+    name = storage.save(f'{root}.{ext}', ContentFile(buffer.getvalue()))
+    return NormalizedPhoto(name, image, original_bytes, buffer.tell())
+
+
+def generate_derivatives(photo_name, storage=None, image=None):
+    """
+    Write every thumbnail size and format. Pass an already decoded `image`
+    to skip reading the photo again.
+    """
+    storage = storage or photo_storage()
+    if image is None:
+        image = load_image(photo_name, storage)
+    image = image.copy()
+
+    names = []
+    for size in sorted(THUMBNAIL_SIZES, reverse=True):
+        # Shrink step by step from the previous (larger) derivative
+        image.thumbnail((size, size), Image.LANCZOS)
+        for ext, (image_format, options) in THUMBNAIL_FORMATS.items():
+            output = image.convert('RGB') if image_format == 'JPEG' else image
+            buffer = io.BytesIO()
+            output.save(buffer, image_format, **options)
+
+            name = derivative_name(photo_name, size, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            names.append(storage.save(name, ContentFile(buffer.getvalue())))
+    return names
+
+
+def delete_derivatives(photo_name, storage=None):
+    """Remove the thumbnails of a photo"""
+    storage = storage or photo_storage()
+    for name in derivative_names(photo_name):
+        if storage.exists(name):
+            storage.delete(name)
+
+
+def init_worker(settings_module):
+    """ProcessPoolExecutor initializer for processes started with spawn"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def generate_in_worker(photo_name):
+    """Process pool entry point; returns (photo_name, error or None)"""
+    try:
+        generate_derivatives(photo_name)
+    except Exception as e:
+        return photo_name, str(e)
+    return photo_name, None
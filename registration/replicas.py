@@ -0,0 +1,175 @@
+"""
+Read replica routing.
+
+With DATABASE_REPLICA set to a DATABASES alias, reads that can be a little
+stale go there: the stats API, the registration changelist and admin
+exports. They opt in with `replica_reads()` or by passing `read_alias()`
+to QuerySet.using(). Every other query and every write stays on the
+primary ('default').
+
+- Lag: the replica is checked at most every DATABASE_REPLICA_CHECK_INTERVAL
+  seconds. When it is unreachable or more than DATABASE_REPLICA_MAX_LAG
+  seconds behind, reads stay on the primary. A PostgreSQL standby reports
+  its replay lag; for any other replica (such as a second SQLite file
+  filled by ``python manage.py sync_replica``) the lag is the age of the
+  last heartbeat stamped on the primary.
+- Read-your-writes: ReplicaPinMiddleware notices requests that wrote to
+  the primary and keeps that client's reads on the primary for
+  DATABASE_REPLICA_PIN_SECONDS, so an admin sees their own edits.
+"""
+import logging
+import math
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .models import Sequence
+
+logger = logging.getLogger(__name__)
+
+# Sequence row holding the time (epoch seconds) of the last heartbeat
+HEARTBEAT = 'replica_heartbeat'
+
+PIN_COOKIE = 'db_primary_pin'
+
+WRITE_SQL = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+# Seconds a PostgreSQL standby is behind; NULL when it is not a standby
+POSTGRES_LAG = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN NULL"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END")
+
+# Alias for reads routed by ReplicaRouter (None: the primary)
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+# Last lag measured by this process and when (monotonic)
+_health = {'alias': None, 'lag': math.inf, 'checked_at': 0.0}
+
+
+def replica():
+    """The replica's alias, or None when there is none"""
+    return getattr(settings, 'DATABASE_REPLICA', None)
+
+
+def stamp_heartbeat(using=DEFAULT_DB_ALIAS):
+    Sequence.objects.db_manager(using).advance(HEARTBEAT, int(time.time()))
+
+
+def replica_lag(alias):
+    """Seconds the replica `alias` is behind the primary (inf if unknown)"""
+    connection = connections[alias]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_LAG)
+            lag = cursor.fetchone()[0]
+        if lag is not None:
+            return float(lag)
+    stamped = Sequence.objects.using(alias).filter(
+        name=HEARTBEAT).values_list('value', flat=True).first()
+    if stamped is None:
+        return math.inf
+    return max(0.0, time.time() - stamped)
+
+
+def replica_available():
+    """True if the replica is reachable and within DATABASE_REPLICA_MAX_LAG"""
+    alias = replica()
+    if not alias:
+        return False
+    now = time.monotonic()
+    if (_health['alias'] != alias or now - _health['checked_at']
+            >= getattr(settings, 'DATABASE_REPLICA_CHECK_INTERVAL', 5)):
+        try:
+            lag = replica_lag(alias)
+        except DatabaseError as e:
+            logger.warning(f"Replica '{alias}' unavailable: {e}")
+            lag = math.inf
+        _health.update(alias=alias, lag=lag, checked_at=now)
+    return _health['lag'] <= getattr(settings, 'DATABASE_REPLICA_MAX_LAG', 30)
+
+
+def read_alias(request=None):
+    """
+    Alias for reads that tolerate lag: the replica, unless it is missing or
+    lagging or `request` comes from a client pinned to the primary
+    """
+    if request is not None and PIN_COOKIE in request.COOKIES:
+        return DEFAULT_DB_ALIAS
+    if not replica_available():
+        return DEFAULT_DB_ALIAS
+    return replica()
+
+
+@contextmanager
+def replica_reads(request=None):
+    """Route reads inside the block to read_alias(request)"""
+    token = _read_alias.set(read_alias(request))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def copy_sqlite(path, using=DEFAULT_DB_ALIAS):
+    """Copy the SQLite database `using` to the file `path` (online backup)"""
+    connection = connections[using]
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+
+
+class ReplicaRouter:
+    """
+    Sends reads inside replica_reads() to the replica; everything else
+    to the primary, the only database that is migrated
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Also for objects read from the replica, which Django would
+        # otherwise save back where they came from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """Keeps a client's replica reads on the primary for a while after it wrote"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica():
+            return self.get_response(request)
+
+        wrote = []
+
+        def detect_writes(execute, sql, params, many, context):
+            if not wrote and WRITE_SQL.match(sql):
+                wrote.append(sql)
+            return execute(sql, params, many, context)
+
+        with connections[DEFAULT_DB_ALIAS].execute_wrapper(detect_writes):
+            response = self.get_response(request)
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', httponly=True, samesite='Lax',
+                max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10))
+        return response
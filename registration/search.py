@@ -0,0 +1,206 @@
+"""
+Registration search.
+
+The admin search box goes through `search()`: serial numbers, ``BK2025-XXXX``
+registration IDs, UUIDs and whole WhatsApp numbers (by their E.164 form) are
+matched exactly; anything else goes to the search index of the database's
+backend. On SQLite that is the FTS5 table ``registration_search`` (one row
+per registration, rowid = serial number) over name, city, WhatsApp digits
+and talent details; other databases use SearchBackend, which has no index
+and filters with LIKE. A different backend can be configured with
+REGISTRATION_SEARCH_BACKEND (dotted path).
+
+The index is kept in sync by the registration signals and the importer;
+``python manage.py rebuild_search_index`` rebuilds it from scratch.
+"""
+import re
+import uuid
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import TalentEventRegistration, normalize_whatsapp
+
+# Columns of the search index, in order
+INDEXED_FIELDS = ['full_name', 'city', 'whatsapp_number', 'talent_details']
+
+# Digit-only searches this short are serial numbers, longer ones phone numbers
+MAX_SERIAL_DIGITS = 6
+
+REGISTRATION_ID = re.compile(r'^BK\d{4}-(\d+)$', re.IGNORECASE)
+PHONE = re.compile(r'^\+?[\s()-]*\d[\d\s()-]*$')
+WORD = re.compile(r'\w+')
+
+
+def city_text(city, canonical_name):
+    """Indexed city: as typed, plus the canonical name when it differs"""
+    if canonical_name and canonical_name != city:
+        return f'{city} {canonical_name}'
+    return city
+
+
+def phone_digits(number):
+    """Indexed form of a WhatsApp number: all digits, plus the last ten"""
+    digits = re.sub(r'\D', '', number or '')
+    if len(digits) > 10:
+        return f'{digits} {digits[-10:]}'
+    return digits
+
+
+class SearchBackend:
+    """Search without an index; terms are matched with LIKE"""
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def index(self, registrations):
+        """Add or refresh registrations in the index"""
+
+    def remove(self, serial_numbers):
+        """Drop the index entries of these serial numbers"""
+
+    def rebuild(self, batch_size=2000):
+        """Recreate the index from the registrations; returns the row count"""
+        return 0
+
+    def filter(self, queryset, words, phone=None):
+        """Registrations of `queryset` matching all `words` (or the phone digits)"""
+        if phone:
+            return queryset.filter(whatsapp_number__contains=phone)
+        for word in words:
+            condition = Q()
+            for field in INDEXED_FIELDS:
+                condition |= Q(**{f'{field}__icontains': word})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """SQLite FTS5 index; words match as prefixes, in any indexed column"""
+
+    table = 'registration_search'
+
+    def index(self, registrations):
+        rows = [
+            (registration.serial_number, registration.full_name,
+             city_text(registration.city, registration.city_name),
+             phone_digits(registration.whatsapp_number),
+             registration.talent_details or '')
+            for registration in registrations
+            if registration.serial_number is not None
+        ]
+        self._insert(rows)
+
+    def remove(self, serial_numbers):
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(serial_number,) for serial_number in serial_numbers])
+
+    def rebuild(self, batch_size=2000):
+        rows = (TalentEventRegistration.objects.using(self.using)
+                .exclude(serial_number__isnull=True)
+                .values_list('serial_number', 'canonical_city__name', *INDEXED_FIELDS)
+                .iterator(chunk_size=batch_size))
+        total = 0
+        with transaction.atomic(using=self.using):
+            with connections[self.using].cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table}')
+            batch = []
+            for (serial_number, canonical_name, full_name, city,
+                 whatsapp_number, talent_details) in rows:
+                batch.append((serial_number, full_name, city_text(city, canonical_name),
+                              phone_digits(whatsapp_number), talent_details or ''))
+                if len(batch) >= batch_size:
+                    total += self._insert(batch)
+                    batch = []
+            total += self._insert(batch)
+            with connections[self.using].cursor() as cursor:
+                # Merge the index segments written above into one
+                cursor.execute(
+                    f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')")
+        return total
+
+    def _insert(self, rows):
+        if rows:
+            with connections[self.using].cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT OR REPLACE INTO {self.table} '
+                    f'(rowid, {", ".join(INDEXED_FIELDS)}) VALUES (%s, %s, %s, %s, %s)',
+                    rows)
+        return len(rows)
+
+    def filter(self, queryset, words, phone=None):
+        if phone:
+            match = f'whatsapp_number : "{phone}"*'
+        else:
+            match = ' '.join(f'"{word}"*' for word in words)
+        return queryset.filter(serial_number__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s',
+            [match]))
+
+
+_backends = {}
+
+
+def get_backend(using='default'):
+    """Search backend for the database `using`"""
+    path = getattr(settings, 'REGISTRATION_SEARCH_BACKEND', None)
+    if (using, path) not in _backends:
+        connection = connections[using]
+        if path:
+            backend_class = import_string(path)
+        elif (connection.vendor == 'sqlite' and SQLiteSearchBackend.table
+              in connection.introspection.table_names()):
+            backend_class = SQLiteSearchBackend
+        else:
+            # No FTS5 (or not SQLite): search without an index
+            backend_class = SearchBackend
+        _backends[(using, path)] = backend_class(using)
+    return _backends[(using, path)]
+
+
+def search(queryset, term):
+    """Registrations of `queryset` matching the admin search `term`"""
+    term = term.strip()
+    if not term:
+        return queryset
+
+    registration_id = REGISTRATION_ID.match(term)
+    if registration_id:
+        return queryset.filter(serial_number=int(registration_id.group(1)))
+
+    try:
+        return queryset.filter(pk=uuid.UUID(term))
+    except ValueError:
+        pass
+
+    backend = get_backend(queryset.db)
+    if PHONE.match(term):
+        digits = re.sub(r'\D', '', term)
+        if len(digits) <= MAX_SERIAL_DIGITS:
+            return queryset.filter(serial_number=int(digits))
+        e164 = normalize_whatsapp(term)
+        if e164 and len(digits) >= 10:
+            # A whole number, however it is typed: indexed E.164 lookup
+            return queryset.filter(whatsapp_e164=e164)
+        # Part of a number. Numbers are indexed with their last ten digits
+        # too, so a search with a country code also finds numbers stored
+        # without one
+        return backend.filter(queryset, [], phone=digits[-10:])
+
+    words = WORD.findall(term)
+    if not words:
+        return queryset.none()
+    return backend.filter(queryset, words)
+
+
+def index_registrations(registrations, using='default'):
+    get_backend(using).index(registrations)
+
+
+def remove_registrations(serial_numbers, using='default'):
+    get_backend(using).remove(serial_numbers)
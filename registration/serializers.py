@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import TalentEventRegistration, RegistrationActivity
+from .models import (
+    TalentEventRegistration, RegistrationActivity, normalize_whatsapp)
 
 
 class TalentEventRegistrationSerializer(serializers.ModelSerializer):
@@ -12,10 +14,12 @@ class TalentEventRegistrationSerializer(serializers.ModelSerializer):
         model = TalentEventRegistration
         fields = [
             'id', 'registration_id', 'full_name', 'gender', 'date_of_birth',
-            'age_group', 'event', 'city', 'whatsapp_number', 'photo',
-            'photo_size_mb', 'terms', 'created_at', 'updated_at'
+            'age_group', 'event', 'city', 'whatsapp_number', 'whatsapp_e164',
+            'photo', 'photo_size_mb', 'photo_width', 'photo_height', 'terms',
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'whatsapp_e164', 'photo_width', 'photo_height', 'created_at', 'updated_at']
 
     def validate_terms(self, value):
         """Validate that terms are agreed to"""
@@ -27,10 +31,11 @@ class TalentEventRegistrationSerializer(serializers.ModelSerializer):
     def validate_photo(self, value):
         """Validate photo file"""
         if value:
-            # Check file size (max 100MB)
-            if value.size > 100 * 1024 * 1024:
+            # Check file size (PHOTO_UPLOAD_MAX_SIZE, 100MB by default)
+            max_size = settings.PHOTO_UPLOAD_MAX_SIZE
+            if value.size > max_size:
                 raise serializers.ValidationError(
-                    "Photo size should not exceed 100MB.")
+                    f"Photo size should not exceed {max_size // (1024 * 1024)}MB.")
 
             # Check file type
             allowed_types = ['image/jpeg',
@@ -50,13 +55,10 @@ class TalentEventRegistrationSerializer(serializers.ModelSerializer):
         return value
 
     def validate_whatsapp_number(self, value):
-        """Validate WhatsApp number"""
-        import re
-        # Remove any non-digit characters
-        cleaned_number = re.sub(r'\D', '', value)
-
-        # Check if it's a valid length (10-15 digits)
-        if len(cleaned_number) < 10 or len(cleaned_number) > 15:
+        """Validate WhatsApp number (stored as typed, plus its E.164 form)"""
+        # 10 digits, or a country code and up to 15
+        e164 = normalize_whatsapp(value)
+        if not e164 or len(e164) < 11:
             raise serializers.ValidationError(
                 "Please enter a valid WhatsApp number.")
 
@@ -90,3 +92,14 @@ class RegistrationSummarySerializer(serializers.ModelSerializer):
             'id', 'registration_id', 'full_name', 'gender_display',
             'age_group_display', 'event_display', 'city', 'created_at'
         ]
+
+
+class RegistrationImportSerializer(TalentEventRegistrationSerializer):
+    """Validates offline (paper / on-site desk) registrations for bulk import"""
+
+    class Meta:
+        model = TalentEventRegistration
+        fields = [
+            'full_name', 'gender', 'date_of_birth', 'age_group', 'event',
+            'talent_details', 'city', 'whatsapp_number', 'terms'
+        ]
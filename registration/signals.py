@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import search
+from .models import TalentEventRegistration, PhotoBlob, ExportJob, StatisticCounter
+
+
+@receiver(post_delete, sender=TalentEventRegistration)
+def release_photo(sender, instance, **kwargs):
+    """Drop the deleted registration's reference to its photo file"""
+    if instance.photo:
+        PhotoBlob.objects.release(instance.photo.name)
+
+
+@receiver(pre_delete, sender=TalentEventRegistration)
+def uncount_registration(sender, instance, **kwargs):
+    """Keep the statistics exact when a counted registration is deleted"""
+    if instance.activities.filter(activity_type='registration').exists():
+        StatisticCounter.objects.remove_registrations([instance])
+
+
+@receiver(post_delete, sender=TalentEventRegistration)
+def invalidate_stats(sender, instance, **kwargs):
+    """Deleted registrations must leave the cached recent registrations"""
+    StatisticCounter.objects.bump_version()
+
+
+@receiver(post_save, sender=TalentEventRegistration)
+def index_registration(sender, instance, using, **kwargs):
+    """Keep the search index in step with the registration"""
+    search.index_registrations([instance], using=using)
+
+
+@receiver(post_delete, sender=TalentEventRegistration)
+def unindex_registration(sender, instance, using, **kwargs):
+    if instance.serial_number is not None:
+        search.remove_registrations([instance.serial_number], using=using)
+
+
+@receiver(post_delete, sender=ExportJob)
+def delete_export_file(sender, instance, **kwargs):
+    """Remove an export's file unless a reused export still points to it"""
+    name = instance.file.name
+    if name and not ExportJob.objects.filter(file=name).exists():
+        instance.file.storage.delete(name)
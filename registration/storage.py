@@ -0,0 +1,83 @@
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+# Thumbnails are named after the photo they were made from
+# (<sha256>_<size>.<ext>, or <uuid>_<size>.<ext> for photos not yet
+# rehashed) and are stored under that exact name
+DERIVED_NAME = re.compile(r'(^|/)[0-9a-f-]{36,64}_\d+\.\w+$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names uploads by the SHA-256 of their content,
+    e.g. ``participant_photos/3f/a2/3fa2...c1.jpg``. Identical uploads map to
+    one file, which is written only once; PhotoBlob rows count the
+    registrations sharing it.
+    """
+
+    def content_name(self, name, content):
+        """Content-addressed name for `content` uploaded as `name`"""
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+
+        sha = digest.hexdigest()
+        directory = os.path.dirname(name)
+        # Sharded path relative to the upload directory, never nested twice
+        if re.search(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}$', directory):
+            directory = os.path.dirname(os.path.dirname(directory))
+        ext = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, sha[:2], sha[2:4], f'{sha}{ext}')
+
+    def is_content_addressed(self, name):
+        """Whether `name` already has the sharded SHA-256 form"""
+        return re.search(
+            r'(^|/)([0-9a-f]{2})/([0-9a-f]{2})/\2\3[0-9a-f]{60}\.\w+$',
+            name) is not None
+
+    def _save(self, name, content):
+        if DERIVED_NAME.search(name):
+            return super()._save(name, content)
+
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Same bytes are already stored; nothing to write
+            return name
+        return super()._save(name, content)
+
+
+def photo_storage():
+    """Storage used for participant photos"""
+    return ContentAddressedStorage()
+
+
+class ExportStorage(FileSystemStorage):
+    """
+    Private storage for finished exports under EXPORT_ROOT. Files have no
+    public URL and are downloaded through the admin.
+    """
+
+    @property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.EXPORT_ROOT)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        return None
+
+
+def export_storage():
+    """Storage used for export files"""
+    return ExportStorage()
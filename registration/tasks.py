@@ -0,0 +1,198 @@
+"""Background tasks run by the job queue (see jobs.py)"""
+import logging
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from . import exports, jobs, photos, replicas
+from .models import (
+    TalentEventRegistration, RegistrationActivity, EventStatistics,
+    StatisticCounter, PhotoBlob, ExportJob)
+
+logger = logging.getLogger(__name__)
+
+
+@jobs.register('record_registration')
+def record_registration(registration_id):
+    """
+    Log the registration activity, count it in the statistics and refresh
+    the day's EventStatistics snapshot
+    """
+    with transaction.atomic():
+        registration = TalentEventRegistration.objects.filter(
+            pk=registration_id).first()
+        if registration is None:
+            return
+
+        # The activity row doubles as the "already processed" marker, so a
+        # job delivered twice doesn't count the registration twice
+        activity, created = RegistrationActivity.objects.get_or_create(
+            registration=registration,
+            activity_type='registration',
+            defaults={
+                'description': f"Registration created for {registration.full_name}",
+            }
+        )
+        if created:
+            StatisticCounter.objects.add_registrations([registration])
+            # Keep the admin's daily snapshot in step with the counters
+            EventStatistics.refresh(timezone.localdate(registration.created_at))
+
+
+@jobs.register('generate_photo_derivatives')
+def generate_photo_derivatives(registration_id):
+    """Create the thumbnails of a registration's photo"""
+    registration = TalentEventRegistration.objects.filter(
+        pk=registration_id).only('photo').first()
+    if registration is None or not registration.photo:
+        return
+
+    photos.generate_derivatives(
+        registration.photo.name, registration.photo.storage)
+    # Only flag the photo we processed, in case it was replaced meanwhile
+    TalentEventRegistration.objects.filter(
+        pk=registration_id, photo=registration.photo.name).update(
+            has_thumbnails=True)
+
+
+@jobs.register('process_photo')
+def process_photo(registration_id):
+    """Normalize a newly uploaded photo, then build its thumbnails"""
+    registration = TalentEventRegistration.objects.filter(
+        pk=registration_id).only('full_name', 'photo').first()
+    if registration is None or not registration.photo:
+        return
+
+    original_name = registration.photo.name
+    # The activity metadata records which file is already normalized, so a
+    # redelivered job doesn't re-encode (and degrade) the photo again
+    if registration.activities.filter(
+            activity_type='photo_uploaded', metadata__photo=original_name).exists():
+        return generate_photo_derivatives(registration_id)
+
+    storage = registration.photo.storage
+    result = photos.normalize_photo(original_name, storage)
+    photos.generate_derivatives(result.name, storage, image=result.image)
+
+    with transaction.atomic():
+        updated = TalentEventRegistration.objects.filter(
+            pk=registration_id, photo=original_name).update(
+                photo=result.name, has_thumbnails=True,
+                photo_bytes=result.stored_bytes,
+                photo_width=result.image.width,
+                photo_height=result.image.height,
+                updated_at=timezone.now())
+        if not updated:
+            # The photo was replaced while we worked; drop our output
+            if result.name != original_name:
+                PhotoBlob.objects.discard(result.name)
+            return
+        if result.name != original_name:
+            PhotoBlob.objects.retain(result.name)
+            PhotoBlob.objects.release(original_name)
+        RegistrationActivity.objects.create(
+            registration=registration,
+            activity_type='photo_uploaded',
+            description=f"Photo normalized for {registration.full_name}",
+            metadata={
+                'photo': result.name,
+                'original_bytes': result.original_bytes,
+                'stored_bytes': result.stored_bytes,
+                'bytes_saved': result.bytes_saved,
+                'width': result.image.width,
+                'height': result.image.height,
+            }
+        )
+
+    logger.info(
+        f"Photo {result.name} normalized: {result.original_bytes} -> "
+        f"{result.stored_bytes} bytes ({result.bytes_saved} saved)")
+
+
+@jobs.register('delete_photo_blob')
+def delete_photo_blob(photo_name):
+    """Delete a photo file and its thumbnails once nothing references it"""
+    with transaction.atomic():
+        deleted, _ = PhotoBlob.objects.filter(
+            name=photo_name, refcount=0).delete()
+    if deleted:
+        storage = TalentEventRegistration._meta.get_field('photo').storage
+        photos.delete_derivatives(photo_name, storage)
+        if storage.exists(photo_name):
+            storage.delete(photo_name)
+
+
+@jobs.register('build_export')
+def build_export(export_id):
+    """Build the file of a queued admin export, reporting progress"""
+    export = ExportJob.objects.filter(pk=export_id).first()
+    if export is None or export.status == 'done':
+        return
+
+    try:
+        queryset = export.get_queryset().using(replicas.read_alias())
+    except ValueError as e:
+        ExportJob.objects.filter(pk=export.pk).update(
+            status='failed', error=str(e))
+        return
+    # Taken before reading, so later changes always invalidate the file
+    export.watermark = ExportJob.objects.watermark(queryset)
+    cached = ExportJob.objects.cached(
+        export.kind, export.cache_key, export.watermark)
+    if cached is not None:
+        export.reuse(cached)
+        export.save()
+        return
+
+    export.status = 'running'
+    export.total = queryset.count()
+    export.processed = 0
+    export.error = ''
+    export.save(update_fields=['status', 'total', 'processed', 'error', 'watermark'])
+
+    last_report = time.monotonic()
+
+    def progress(count):
+        nonlocal last_report
+        if time.monotonic() - last_report >= 1:
+            last_report = time.monotonic()
+            ExportJob.objects.filter(pk=export.pk).update(processed=count)
+            jobs.heartbeat()
+
+    exported_by = export.requested_by.username if export.requested_by else 'Unknown'
+    try:
+        with tempfile.TemporaryFile() as spool:
+            exports.write_export(
+                export.kind, queryset, spool, exported_by, progress)
+            export.file_size = spool.tell()
+            spool.seek(0)
+            export.file.save(f'{export.pk}.{export.kind}', File(spool), save=False)
+    except Exception as e:
+        ExportJob.objects.filter(pk=export.pk).update(
+            status='failed', error=str(e))
+        raise
+
+    export.status = 'done'
+    export.processed = export.total
+    export.finished_at = timezone.now()
+    export.save()
+    logger.info(
+        f"Export {export.pk} built: {export.total} registrations, "
+        f"{export.file_size} bytes")
+
+
+@jobs.register('expire_exports')
+def expire_exports():
+    """Delete exports older than EXPORT_RETENTION, with their files"""
+    cutoff = timezone.now() - timedelta(
+        seconds=getattr(settings, 'EXPORT_RETENTION', 7 * 86400))
+    # post_delete (delete_export_file) removes files no export still shares
+    deleted, _ = ExportJob.objects.filter(
+        created_at__lt=cutoff, status__in=['done', 'failed']).delete()
+    if deleted:
+        logger.info(f"Expired {deleted} exports")
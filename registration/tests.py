@@ -1,11 +1,67 @@
-from django.test import TestCase, Client
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import csv
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from unittest import mock
+
+import openpyxl
+from PIL import Image
+
+from asgiref.sync import sync_to_async
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase
-from rest_framework import status
+from rest_framework import serializers as drf_serializers, status
+from datetime import date, datetime, timedelta
 import json
 
-from .models import TalentEventRegistration, RegistrationActivity
+from django.core.management import call_command
+
+from talent_event_backend.sqlite3 import gate
+
+from . import (
+    exports, feed, jobs, photos, replicas, search, serializers, tasks, views)
+from .models import (
+    TalentEventRegistration, RegistrationActivity, EventStatistics,
+    StatisticCounter, StatisticRollup, Job, PhotoBlob, ExportJob, City, CityAlias,
+    Sequence, normalize_whatsapp)
+from .storage import ContentAddressedStorage
+
+
+def make_photo(name='photo.png', size=(32, 32), image_format='PNG'):
+    """Create a real, decodable image upload"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(200, 120, 40)).save(buffer, image_format)
+    content_type = 'image/png' if image_format == 'PNG' else 'image/jpeg'
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=content_type)
+
+
+class TempMediaMixin:
+    """Store uploads in a throwaway MEDIA_ROOT"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root
 
 
 class TalentEventRegistrationModelTest(TestCase):
@@ -194,3 +250,1683 @@ class RegistrationActivityTest(TestCase):
 
         expected = f"{self.registration.full_name} - Registration Submitted"
         self.assertEqual(str(activity), expected)
+
+
+class SerialNumberAllocationTest(TransactionTestCase):
+    """Test cases for the serial number sequence"""
+
+    def _create(self, index):
+        """Create one registration from a worker thread"""
+        try:
+            return TalentEventRegistration.objects.create(
+                full_name=f'Parallel Participant {index}',
+                gender='female',
+                date_of_birth='01-01-2000',
+                age_group='21-40',
+                event='dancing',
+                city='Surat',
+                whatsapp_number=f'98{index:08d}',
+                photo='participant_photos/test.jpg',
+                terms='yes'
+            ).serial_number
+        finally:
+            connection.close()
+
+    def test_sequential_serials(self):
+        """Serial numbers continue from the highest one in use"""
+        photo = 'participant_photos/test.jpg'
+        first = TalentEventRegistration.objects.create(
+            full_name='First', gender='male', date_of_birth='01-01-2000',
+            age_group='21-40', event='singing', city='Surat',
+            whatsapp_number='9800000001', photo=photo, terms='yes')
+        second = TalentEventRegistration.objects.create(
+            full_name='Second', gender='male', date_of_birth='01-01-2000',
+            age_group='21-40', event='singing', city='Surat',
+            whatsapp_number='9800000002', photo=photo, terms='yes')
+
+        self.assertEqual(first.serial_number, 1)
+        self.assertEqual(second.serial_number, 2)
+        self.assertEqual(
+            TalentEventRegistration.allocate_serial_numbers(count=10), 3)
+        self.assertEqual(TalentEventRegistration.allocate_serial_numbers(), 13)
+
+    def test_parallel_inserts_have_no_collisions_or_gaps(self):
+        """Hundreds of concurrent inserts get unique, contiguous serials"""
+        total = 200
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            serials = list(pool.map(self._create, range(total)))
+
+        self.assertEqual(sorted(serials), list(range(1, total + 1)))
+        self.assertEqual(
+            TalentEventRegistration.objects.count(), total)
+
+
+class StatisticCounterTest(TransactionTestCase):
+    """Test cases for the per-day statistic counters"""
+
+    def _registration(self, **overrides):
+        data = {
+            'full_name': 'Counter Participant',
+            'event': 'singing',
+            'age_group': '11-20',
+            'city': 'Vadodara',
+            'created_at': timezone.now(),
+        }
+        data.update(overrides)
+        # Counted by canonical city, which save() would resolve
+        data['canonical_city'] = City.objects.resolve(data['city'])
+        return TalentEventRegistration(**data)
+
+    def test_counters_build_event_statistics(self):
+        """EventStatistics is built from the counter rows"""
+        StatisticCounter.objects.add_registrations([
+            self._registration(),
+            self._registration(event='dancing'),
+            self._registration(city='Rajkot'),
+        ])
+
+        stats = EventStatistics.from_counters(timezone.localdate())
+        self.assertEqual(stats.total_registrations, 3)
+        self.assertEqual(stats.registrations_by_event,
+                         {'singing': 2, 'dancing': 1})
+        self.assertEqual(stats.registrations_by_age_group, {'11-20': 3})
+        self.assertEqual(stats.registrations_by_city,
+                         {'Vadodara': 2, 'Rajkot': 1})
+        self.assertFalse(EventStatistics.objects.exists())
+
+    def test_parallel_increments_are_lossless(self):
+        """Concurrent increments of the same counters are all kept"""
+        registration = self._registration()
+
+        def increment(_):
+            try:
+                StatisticCounter.objects.add_registrations([registration])
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(increment, range(100)))
+
+        stats = EventStatistics.from_counters(timezone.localdate())
+        self.assertEqual(stats.total_registrations, 100)
+        self.assertEqual(stats.registrations_by_city, {'Vadodara': 100})
+
+
+class DuplicateDetectionTest(TempMediaMixin, TestCase):
+    """Test cases for the normalized duplicate key"""
+
+    def setUp(self):
+        super().setUp()
+        self.form_data = {
+            'fullName': 'Riya  Shah',
+            'gender': 'female',
+            'dateOfBirth': '01-02-2001',
+            'ageGroup': '21-40',
+            'event': 'singing',
+            'Talent': 'Classical',
+            'city': 'Surat',
+            'whatsappNumber': '98765 43210',
+            'terms': 'yes',
+        }
+
+    def test_duplicate_key_normalization(self):
+        """Case, spacing and phone punctuation don't change the key"""
+        self.assertEqual(
+            TalentEventRegistration.build_duplicate_key(
+                '  Riya   SHAH ', '(98765) 43-210'),
+            TalentEventRegistration.build_duplicate_key(
+                'riya shah', '9876543210'))
+
+    def test_duplicate_insert_raises_validation_error(self):
+        """A second insert with the same normalized identity fails"""
+        TalentEventRegistration.objects.create(
+            full_name='Riya Shah', gender='female', date_of_birth='01-02-2001',
+            age_group='21-40', event='singing', city='Surat',
+            whatsapp_number='9876543210', photo=make_photo(), terms='yes')
+
+        with self.assertRaises(ValidationError):
+            TalentEventRegistration.objects.create(
+                full_name='RIYA shah', gender='female',
+                date_of_birth='01-02-2001', age_group='21-40', event='singing',
+                city='Surat', whatsapp_number='98765-43210',
+                photo=make_photo(), terms='yes')
+        self.assertEqual(TalentEventRegistration.objects.count(), 1)
+
+    def test_submit_rejects_duplicate(self):
+        """The form submission redirects back on a duplicate"""
+        response = self.client.post(
+            reverse('submit_registration'),
+            dict(self.form_data, photo=make_photo()))
+        self.assertRedirects(response, reverse('confirmation'))
+
+        response = self.client.post(
+            reverse('submit_registration'),
+            dict(self.form_data, fullName='riya shah', photo=make_photo()))
+        self.assertRedirects(response, reverse('registration_form'))
+        self.assertEqual(TalentEventRegistration.objects.count(), 1)
+
+
+@jobs.register('test_always_fails')
+def always_fails():
+    raise RuntimeError('boom')
+
+
+@jobs.register('test_heartbeat')
+def sends_heartbeat(job_id):
+    Job.objects.filter(pk=job_id).update(locked_at=timezone.now() - timedelta(hours=1))
+    jobs.heartbeat()
+    job = Job.objects.get(pk=job_id)
+    if job.locked_at < timezone.now() - timedelta(minutes=1):
+        raise RuntimeError('heartbeat not recorded')
+
+
+class JobQueueTest(TempMediaMixin, TestCase):
+    """Test cases for the database-backed job queue"""
+
+    def submit(self):
+        return self.client.post(reverse('submit_registration'), {
+            'fullName': 'Queue Participant',
+            'gender': 'male',
+            'dateOfBirth': '05-06-1990',
+            'ageGroup': '21-40',
+            'event': 'musical-instrument',
+            'Talent': 'Tabla',
+            'city': 'Bhavnagar',
+            'whatsappNumber': '9123456789',
+            'terms': 'yes',
+            'photo': make_photo(),
+        })
+
+    def test_submit_defers_follow_up_work(self):
+        """Submitting only queues the activity and statistics work"""
+        self.submit()
+        registration = TalentEventRegistration.objects.get()
+        self.assertFalse(registration.activities.exists())
+        self.assertEqual(jobs.queue_depth(), 2)
+
+        self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(Job.objects.filter(status='done').count(), 2)
+        self.assertTrue(registration.activities.filter(
+            activity_type='registration').exists())
+        stats = EventStatistics.from_counters(timezone.localdate())
+        self.assertEqual(stats.total_registrations, 1)
+        # The admin's snapshot for the day is kept current too
+        snapshot = EventStatistics.objects.get(date=timezone.localdate())
+        self.assertEqual(snapshot.total_registrations, 1)
+        self.assertEqual(snapshot.registrations_by_event,
+                         stats.registrations_by_event)
+
+    def test_redelivered_job_is_idempotent(self):
+        """Running the same job twice counts the registration once"""
+        self.submit()
+        registration = TalentEventRegistration.objects.get()
+        tasks.record_registration(str(registration.id))
+        tasks.record_registration(str(registration.id))
+
+        stats = EventStatistics.from_counters(timezone.localdate())
+        self.assertEqual(stats.total_registrations, 1)
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_failed_job_is_retried_then_marked_failed(self):
+        """A failing job backs off and gives up after max_attempts"""
+        job = jobs.enqueue('test_always_fails')
+
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('boom', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_stale_running_job_is_reclaimed(self):
+        """A job whose worker died is handed out again"""
+        job = jobs.enqueue('test_always_fails')
+        Job.objects.filter(pk=job.pk).update(
+            status='running', locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(jobs.run_pending(), 1)
+
+    def test_heartbeat_keeps_long_job_locked(self):
+        job = Job.objects.create(name='test_heartbeat')
+        job.payload = {'job_id': job.pk}
+        job.save()
+
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done', job.last_error)
+
+
+class PhotoUploadHandlerTest(TempMediaMixin, TestCase):
+    """Test cases for the streaming photo upload handler"""
+
+    def submit(self, photo):
+        return self.client.post(reverse('submit_registration'), {
+            'fullName': 'Upload Participant',
+            'gender': 'female',
+            'dateOfBirth': '10-10-2010',
+            'ageGroup': '11-20',
+            'event': 'dancing',
+            'Talent': 'Garba',
+            'city': 'Anand',
+            'whatsappNumber': '9988776655',
+            'terms': 'yes',
+            'photo': photo,
+        })
+
+    def test_valid_photo_is_stored(self):
+        """A real image passes the signature check and is saved"""
+        response = self.submit(make_photo())
+        self.assertRedirects(response, reverse('confirmation'))
+        registration = TalentEventRegistration.objects.get()
+        self.assertTrue(os.path.exists(registration.photo.path))
+
+    def test_photo_is_stored_before_the_write_transaction(self):
+        """Copying and hashing the upload doesn't hold the write lock"""
+        depth = len(connection.atomic_blocks)
+        save = ContentAddressedStorage._save
+        depths = []
+
+        def recording_save(storage, name, content):
+            depths.append(len(connection.atomic_blocks))
+            return save(storage, name, content)
+
+        with mock.patch.object(ContentAddressedStorage, '_save', recording_save):
+            response = self.submit(make_photo())
+        self.assertRedirects(response, reverse('confirmation'))
+        self.assertEqual(depths, [depth])
+        registration = TalentEventRegistration.objects.get()
+        self.assertEqual(registration.photo_width, 32)
+        self.assertEqual(PhotoBlob.objects.get(
+            name=registration.photo.name).refcount, 1)
+        self.assertEqual(Job.objects.filter(name='process_photo').count(), 1)
+
+    def test_rejected_submission_discards_stored_photo(self):
+        """A duplicate leaves its stored photo to the blob cleanup"""
+        self.submit(make_photo())
+        response = self.submit(make_photo(size=(48, 48)))
+        self.assertRedirects(response, reverse('registration_form'))
+        (discarded,) = PhotoBlob.objects.filter(refcount=0)
+        self.assertIsNotNone(discarded.released_at)
+        self.assertTrue(Job.objects.filter(name='delete_photo_blob').exists())
+
+    def test_non_image_is_rejected(self):
+        """A file without an image signature is refused"""
+        fake = SimpleUploadedFile(
+            'photo.jpg', b'<?php echo "hi"; ?>', content_type='image/jpeg')
+        response = self.submit(fake)
+        self.assertRedirects(response, reverse('registration_form'))
+        self.assertFalse(TalentEventRegistration.objects.exists())
+
+    def test_empty_photo_is_rejected(self):
+        """A zero-byte upload is refused like a non-image"""
+        empty = SimpleUploadedFile('photo.jpg', b'', content_type='image/jpeg')
+        response = self.submit(empty)
+        self.assertRedirects(response, reverse('registration_form'))
+        self.assertFalse(TalentEventRegistration.objects.exists())
+        self.assertFalse(PhotoBlob.objects.exists())
+
+    @override_settings(PHOTO_UPLOAD_MAX_SIZE=100 * 1024)
+    def test_oversized_photo_is_rejected_early(self):
+        """Uploads past the configured limit are dropped"""
+        noise = Image.frombytes('RGB', (300, 300), os.urandom(300 * 300 * 3))
+        buffer = io.BytesIO()
+        noise.save(buffer, 'PNG')
+        large = SimpleUploadedFile(
+            'large.png', buffer.getvalue(), content_type='image/png')
+
+        response = self.submit(large)
+        self.assertRedirects(response, reverse('registration_form'))
+        self.assertFalse(TalentEventRegistration.objects.exists())
+
+
+class PhotoDerivativeTest(TempMediaMixin, TestCase):
+    """Test cases for photo thumbnails"""
+
+    def setUp(self):
+        super().setUp()
+        self.registration = TalentEventRegistration.objects.create(
+            full_name='Thumb Participant', gender='male',
+            date_of_birth='01-01-1999', age_group='21-40', event='others',
+            city='Jamnagar', whatsapp_number='9000000001',
+            photo=make_photo(size=(1200, 800)), terms='yes')
+
+    def test_background_job_generates_thumbnails(self):
+        """The queued job writes every size and format next to the photo"""
+        self.assertEqual(
+            self.registration.thumbnail_url(), self.registration.photo.url)
+        jobs.run_pending()
+        self.registration.refresh_from_db()
+
+        self.assertTrue(self.registration.has_thumbnails)
+        for name in photos.derivative_names(self.registration.photo.name):
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        thumb = os.path.join(self.media_root, photos.derivative_name(
+            self.registration.photo.name, 400, 'jpg'))
+        self.assertEqual(Image.open(thumb).size, (400, 267))
+        self.assertTrue(self.registration.thumbnail_url().endswith('_64.webp'))
+
+    def test_defaults_to_the_photo_field_storage(self):
+        """Thumbnails go through the same storage as the photo itself"""
+        save = ContentAddressedStorage._save
+        saved = []
+
+        def recording_save(storage, name, content):
+            saved.append(name)
+            return save(storage, name, content)
+
+        with mock.patch.object(ContentAddressedStorage, '_save', recording_save):
+            names = photos.generate_derivatives(self.registration.photo.name)
+        self.assertEqual(saved, names)
+        self.assertEqual(sorted(names), sorted(
+            photos.derivative_names(self.registration.photo.name)))
+
+    def test_backfill_command(self):
+        """generate_thumbnails fills in missing derivatives"""
+        # A photo stored before content addressing keeps its uuid name
+        legacy = 'participant_photos/0b8a4c1e-2f61-4d8e-9a1b-3c5d7e9f0a12.png'
+        os.makedirs(os.path.join(self.media_root, 'participant_photos'),
+                    exist_ok=True)
+        with open(os.path.join(self.media_root, legacy), 'wb') as f:
+            f.write(make_photo(size=(600, 600)).read())
+        other = TalentEventRegistration.objects.create(
+            full_name='Legacy Participant', gender='male',
+            date_of_birth='01-01-1999', age_group='21-40', event='others',
+            city='Jamnagar', whatsapp_number='9000000003', photo=legacy,
+            terms='yes')
+
+        call_command('generate_thumbnails', workers=2, stdout=io.StringIO())
+        for registration in (self.registration, other):
+            registration.refresh_from_db()
+            self.assertTrue(registration.has_thumbnails)
+            for name in photos.derivative_names(registration.photo.name):
+                self.assertTrue(
+                    os.path.exists(os.path.join(self.media_root, name)), name)
+
+
+class PhotoNormalizationTest(TempMediaMixin, TestCase):
+    """Test cases for upload normalization and recompression"""
+
+    def create(self, photo):
+        return TalentEventRegistration.objects.create(
+            full_name='Normalize Participant', gender='female',
+            date_of_birth='02-02-2002', age_group='21-40', event='singing',
+            city='Morbi', whatsapp_number='9000000002', photo=photo,
+            terms='yes')
+
+    @override_settings(PHOTO_MAX_EDGE=1000, PHOTO_BLOB_GRACE_PERIOD=0)
+    def test_photo_is_rotated_stripped_and_capped(self):
+        """EXIF orientation is applied, metadata dropped and size capped"""
+        image = Image.new('RGB', (3000, 1500), color=(10, 200, 30))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+        exif[0x010F] = 'Test Camera'  # Make
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=100, exif=exif)
+        registration = self.create(SimpleUploadedFile(
+            'tall.jpg', buffer.getvalue(), content_type='image/jpeg'))
+        original_path = registration.photo.path
+
+        jobs.run_pending()
+        jobs.run_pending()  # deletes the unreferenced original
+        registration.refresh_from_db()
+
+        stored = Image.open(registration.photo.path)
+        self.assertEqual(stored.size, (500, 1000))
+        self.assertFalse(stored.getexif())
+        self.assertFalse(os.path.exists(original_path))
+
+        activity = registration.activities.get(activity_type='photo_uploaded')
+        self.assertEqual(activity.metadata['photo'], registration.photo.name)
+        self.assertEqual(activity.metadata['original_bytes'], len(buffer.getvalue()))
+        self.assertGreater(activity.metadata['bytes_saved'], 0)
+
+    def test_original_kept_when_reencoding_does_not_help(self):
+        """A small upright PNG stays as it is rather than a bigger JPEG"""
+        registration = self.create(make_photo())
+        name = registration.photo.name
+        tasks.process_photo(str(registration.id))
+        registration.refresh_from_db()
+
+        self.assertEqual(registration.photo.name, name)
+        self.assertTrue(registration.has_thumbnails)
+        activity = registration.activities.get(activity_type='photo_uploaded')
+        self.assertEqual(activity.metadata['stored_bytes'],
+                         activity.metadata['original_bytes'])
+        self.assertEqual(activity.metadata['bytes_saved'], 0)
+
+    def test_redelivered_job_does_not_reencode(self):
+        """Processing the same photo twice leaves it untouched"""
+        registration = self.create(make_photo())
+        tasks.process_photo(str(registration.id))
+        registration.refresh_from_db()
+        name = registration.photo.name
+
+        tasks.process_photo(str(registration.id))
+        registration.refresh_from_db()
+        self.assertEqual(registration.photo.name, name)
+        self.assertEqual(registration.activities.filter(
+            activity_type='photo_uploaded').count(), 1)
+
+
+@override_settings(PHOTO_BLOB_GRACE_PERIOD=0)
+class ContentAddressedStorageTest(TempMediaMixin, TestCase):
+    """Test cases for content-addressed photo storage"""
+
+    def create(self, index, photo):
+        return TalentEventRegistration.objects.create(
+            full_name=f'Blob Participant {index}', gender='male',
+            date_of_birth='03-03-2003', age_group='11-20', event='dancing',
+            city='Junagadh', whatsapp_number=f'900000010{index}',
+            photo=photo, terms='yes')
+
+    def test_identical_uploads_share_one_file(self):
+        """The same bytes are stored once, named by their SHA-256"""
+        first = self.create(1, make_photo('a.png'))
+        second = self.create(2, make_photo('b.png'))
+
+        self.assertEqual(first.photo.name, second.photo.name)
+        self.assertRegex(
+            first.photo.name,
+            r'^participant_photos/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.png$')
+        self.assertEqual(PhotoBlob.objects.get(name=first.photo.name).refcount, 2)
+
+    def test_file_deleted_with_last_reference(self):
+        """A shared file outlives one registration but not both"""
+        first = self.create(1, make_photo())
+        second = self.create(2, make_photo())
+        Job.objects.all().delete()
+        path = first.photo.path
+
+        first.delete()
+        jobs.run_pending()
+        self.assertTrue(os.path.exists(path))
+
+        second.delete()
+        jobs.run_pending()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(PhotoBlob.objects.exists())
+
+    def test_rehash_command_moves_legacy_files(self):
+        """rehash_photos renames uuid-named files to their content hash"""
+        legacy_dir = os.path.join(self.media_root, 'participant_photos')
+        os.makedirs(legacy_dir)
+        for name in ('one.png', 'two.png'):
+            with open(os.path.join(legacy_dir, name), 'wb') as f:
+                f.write(make_photo().read())
+        for index, name in enumerate(('one.png', 'two.png')):
+            self.create(index, f'participant_photos/{name}')
+
+        call_command('rehash_photos', stdout=io.StringIO())
+
+        names = set(TalentEventRegistration.objects.values_list('photo', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertFalse(os.path.exists(os.path.join(legacy_dir, 'one.png')))
+        self.assertEqual(PhotoBlob.objects.get(name=name).refcount, 2)
+
+
+class PhotoMetadataTest(TempMediaMixin, TestCase):
+    """Test cases for stored photo size and dimensions"""
+
+    def create(self, photo):
+        return TalentEventRegistration.objects.create(
+            full_name='Metadata Participant', gender='female',
+            date_of_birth='04-04-2004', age_group='11-20', event='singing',
+            city='Porbandar', whatsapp_number='9000000003', photo=photo,
+            terms='yes')
+
+    def test_metadata_stored_on_upload(self):
+        """Size and dimensions are read once, when the photo is saved"""
+        photo = make_photo(size=(120, 90))
+        registration = self.create(photo)
+        registration.refresh_from_db()
+
+        self.assertEqual(registration.photo_bytes, photo.size)
+        self.assertEqual(
+            (registration.photo_width, registration.photo_height), (120, 90))
+        os.remove(registration.photo.path)
+        self.assertEqual(registration.photo_size_mb,
+                         round(photo.size / (1024 * 1024), 2))
+
+    def test_backfill_command(self):
+        """backfill_photo_metadata fills rows saved before the columns existed"""
+        registration = self.create(make_photo(size=(40, 30)))
+        TalentEventRegistration.objects.update(
+            photo_bytes=None, photo_width=None, photo_height=None)
+
+        call_command('backfill_photo_metadata', stdout=io.StringIO())
+        registration.refresh_from_db()
+        self.assertEqual(
+            (registration.photo_width, registration.photo_height), (40, 30))
+        self.assertEqual(registration.photo_bytes,
+                         os.path.getsize(registration.photo.path))
+
+
+class AssignSerialNumbersCommandTest(TestCase):
+    """Test cases for the assign_serial_numbers command"""
+
+    def setUp(self):
+        start = timezone.now() - timedelta(days=1)
+        # Created in this order, but with gaps, swaps and a missing serial
+        for index, serial_number in enumerate([7, 3, None, 12, 2]):
+            TalentEventRegistration.objects.create(
+                full_name=f'Serial Participant {index}', gender='male',
+                date_of_birth='01-01-2000', age_group='21-40', event='singing',
+                city='Surat', whatsapp_number=f'970000000{index}',
+                photo='participant_photos/test.jpg', terms='yes',
+                serial_number=serial_number,
+                created_at=start + timedelta(minutes=index))
+
+    def serials(self):
+        return list(TalentEventRegistration.objects.order_by(
+            'created_at').values_list('serial_number', flat=True))
+
+    def test_dry_run_changes_nothing(self):
+        before = self.serials()
+        out = io.StringIO()
+        call_command('assign_serial_numbers', dry_run=True, stdout=out)
+        self.assertEqual(self.serials(), before)
+        self.assertIn('7 -> 1', out.getvalue())
+
+    def test_serials_compacted_in_created_order(self):
+        call_command('assign_serial_numbers', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(self.serials(), [1, 2, 3, 4, 5])
+        # The sequence continues right after the compacted range
+        self.assertEqual(TalentEventRegistration.allocate_serial_numbers(), 6)
+
+
+class ImportRegistrationsCommandTest(TestCase):
+    """Test cases for the import_registrations command"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        TalentEventRegistration.objects.create(
+            full_name='Existing Participant', gender='male',
+            date_of_birth='01-01-2000', age_group='21-40', event='singing',
+            city='Surat', whatsapp_number='9800000000',
+            photo='participant_photos/test.jpg', terms='yes')
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_csv_import(self):
+        path = self.write('desk.csv', (
+            'fullName,gender,dateOfBirth,ageGroup,event,Talent,city,whatsappNumber,terms\n'
+            'Desk One,female,02-02-2001,21-40,dancing,Kathak,Surat,9811111111,yes\n'
+            'Desk Two,male,03-03-2002,21-40,singing,Ghazal,Vapi,9822222222,yes\n'
+            'Bad Row,male,03-03-2002,21-40,juggling,,Vapi,9833333333,yes\n'
+            'desk  one,female,02-02-2001,21-40,dancing,Kathak,Surat,98111 11111,yes\n'
+            'Existing Participant,male,01-01-2000,21-40,singing,Bhajan,Surat,9800000000,yes\n'
+        ))
+        out = io.StringIO()
+        call_command('import_registrations', path, batch_size=2, stdout=out)
+        self.assertIn('Imported 2 registrations', out.getvalue())
+
+        imported = TalentEventRegistration.objects.filter(
+            full_name__startswith='Desk').order_by('serial_number')
+        self.assertEqual(
+            [r.full_name for r in imported], ['Desk One', 'Desk Two'])
+        first = imported[0].serial_number
+        self.assertEqual(imported[1].serial_number, first + 1)
+        self.assertEqual(RegistrationActivity.objects.filter(
+            registration__in=imported, activity_type='registration').count(), 2)
+        self.assertEqual(StatisticCounter.objects.get(
+            date=timezone.localdate(), dimension='total').count, 2)
+        self.assertEqual(
+            list(search.search(TalentEventRegistration.objects.all(), 'ghazal')),
+            [imported[1]])
+        self.assertEqual(imported[0].canonical_city.name, 'Surat')
+
+        with open(f'{path}.rejects.csv', encoding='utf-8') as f:
+            rejects = list(csv.DictReader(f))
+        self.assertEqual([r['line'] for r in rejects], ['4', '5', '6'])
+        self.assertIn('event', rejects[0]['error'])
+        self.assertIn('line 2', rejects[1]['error'])
+        self.assertIn('Already registered', rejects[2]['error'])
+
+    def test_jsonl_dry_run(self):
+        path = self.write('desk.jsonl', (
+            '{"full_name": "Json One", "gender": "male", "date_of_birth": "01-01-2000",'
+            ' "age_group": "21-40", "event": "singing", "talent_details": "Ghazal",'
+            ' "city": "Surat",'
+            ' "whatsapp_number": "9844444444", "terms": "yes"}\n'
+            'not json\n'
+        ))
+        out = io.StringIO()
+        call_command('import_registrations', path, dry_run=True, stdout=out)
+        self.assertIn('Validated 1 registrations', out.getvalue())
+        self.assertIn('1 rejected', out.getvalue())
+        self.assertFalse(TalentEventRegistration.objects.filter(
+            full_name='Json One').exists())
+
+
+class RegistrationExportTest(TestCase):
+    """Test cases for the CSV and Excel exports"""
+
+    def setUp(self):
+        for index, event in enumerate(['singing', 'dancing', 'singing']):
+            TalentEventRegistration.objects.create(
+                full_name=f'Export Participant {index}', gender='female',
+                date_of_birth='01-01-2000', age_group='21-40', event=event,
+                talent_details='Details', city='Surat',
+                whatsapp_number=f'960000000{index}',
+                photo='participant_photos/test.jpg', terms='yes',
+                photo_bytes=1024 * 1024)
+        admin_user = User.objects.create_superuser(
+            'exporter', 'exporter@example.com', 'password')
+        self.client.force_login(admin_user)
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_export_all_matching_uses_changelist_filters(self):
+        url = reverse('admin:registration_talenteventregistration_export_csv')
+        changelist = self.client.get(
+            reverse('admin:registration_talenteventregistration_changelist'),
+            {'event__exact': 'singing'})
+        self.assertContains(changelist, f'{url}?event__exact=singing')
+        rows = self.read_csv(self.client.get(url, {'event__exact': 'singing'}))
+        self.assertEqual(rows[0], exports.EXPORT_HEADERS)
+        self.assertEqual(
+            [row[2] for row in rows[1:]],
+            ['Export Participant 0', 'Export Participant 2'])
+        self.assertEqual(rows[1][3], 'Female')
+        self.assertEqual(rows[1][6], 'Singing')
+        self.assertEqual(rows[1][12], '1.0')
+
+    def test_export_action(self):
+        registration = TalentEventRegistration.objects.get(
+            full_name='Export Participant 1')
+        response = self.client.post(
+            reverse('admin:registration_talenteventregistration_changelist'),
+            {'action': 'export_to_csv', '_selected_action': [registration.pk]})
+        rows = self.read_csv(response)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], registration.registration_id)
+
+    def test_export_to_excel(self):
+        response = self.client.post(
+            reverse('admin:registration_talenteventregistration_changelist'),
+            {'action': 'export_to_excel',
+             '_selected_action': list(TalentEventRegistration.objects.values_list(
+                 'pk', flat=True))})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('talent_registrations.xlsx', response['Content-Disposition'])
+
+        workbook = openpyxl.load_workbook(
+            io.BytesIO(b''.join(response.streaming_content)))
+        worksheet = workbook['Talent Event Registrations']
+        rows = list(worksheet.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), exports.EXPORT_HEADERS)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][2], 'Export Participant 0')
+        self.assertEqual(rows[1][6], 'Singing')
+        self.assertTrue(worksheet['A1'].font.bold)
+        self.assertEqual(worksheet['C2'].alignment.horizontal, 'center')
+        # Longest of the header and the values, plus two
+        self.assertEqual(worksheet.column_dimensions['C'].width,
+                         len('Export Participant 0') + 2)
+
+
+class PhotoZipExportTest(TempMediaMixin, TestCase):
+    """Test cases for the streaming photo ZIP download"""
+
+    def setUp(self):
+        super().setUp()
+        self.with_photo = TalentEventRegistration.objects.create(
+            full_name='Zip Participant', gender='male',
+            date_of_birth='01-01-2000', age_group='21-40', event='singing',
+            talent_details='Details', city='Surat', whatsapp_number='9500000000',
+            photo=make_photo('zip.jpg', image_format='JPEG'), terms='yes')
+        self.missing_file = TalentEventRegistration.objects.create(
+            full_name='Missing Photo', gender='male',
+            date_of_birth='01-01-2000', age_group='21-40', event='dancing',
+            talent_details='Details', city='Surat', whatsapp_number='9500000001',
+            photo='participant_photos/missing.jpg', terms='yes')
+        admin_user = User.objects.create_superuser(
+            'zipper', 'zipper@example.com', 'password')
+        self.client.force_login(admin_user)
+
+    def test_zip_is_streamed_with_readme(self):
+        response = self.client.post(
+            reverse('admin:registration_talenteventregistration_changelist'),
+            {'action': 'download_photos_zip',
+             '_selected_action': [self.with_photo.pk, self.missing_file.pk]})
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+
+        photo_name = f'{self.with_photo.serial_number:03d}_Zip_Participant_Singing.jpg'
+        self.assertEqual(archive.namelist(), [photo_name, 'README.txt'])
+        # JPEGs are stored, not deflated again
+        self.assertEqual(archive.getinfo(photo_name).compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.read(photo_name), self.with_photo.photo.read())
+
+        readme = archive.read('README.txt').decode()
+        self.assertIn('Total Photos: 1', readme)
+        self.assertIn('Export by: zipper', readme)
+        self.assertNotIn('Missing Photo', readme)
+
+    def test_read_ahead_keeps_order_and_bound(self):
+        started = []
+        consumed = []
+
+        def load(item):
+            started.append(item)
+            # Never more than `window` items loaded ahead of the writer
+            self.assertLessEqual(len(started) - len(consumed), 3)
+            time.sleep(0.001 * (item % 3))
+            return item * 2
+
+        for item, value in exports.read_ahead(range(20), load, threads=4, window=3):
+            consumed.append(item)
+            self.assertEqual(value, item * 2)
+        self.assertEqual(consumed, list(range(20)))
+
+
+class ExportJobTest(TempMediaMixin, TestCase):
+    """Test cases for exports built by the job worker"""
+
+    def setUp(self):
+        super().setUp()
+        export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_root, ignore_errors=True)
+        settings_override = self.settings(
+            EXPORT_ROOT=export_root, EXPORT_INLINE_LIMIT=1)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for index in range(3):
+            TalentEventRegistration.objects.create(
+                full_name=f'Queued Participant {index}', gender='male',
+                date_of_birth='01-01-2000', age_group='21-40', event='singing',
+                talent_details='Details', city='Surat',
+                whatsapp_number=f'940000000{index}',
+                photo='participant_photos/test.jpg', terms='yes',
+                photo_bytes=1024)
+        self.user = User.objects.create_superuser(
+            'queuer', 'queuer@example.com', 'password')
+        self.client.force_login(self.user)
+        self.changelist = reverse(
+            'admin:registration_talenteventregistration_changelist')
+
+    def export_all(self):
+        return self.client.post(self.changelist, {
+            'action': 'export_to_excel', 'select_across': '1',
+            '_selected_action': list(
+                TalentEventRegistration.objects.values_list('pk', flat=True)),
+        })
+
+    def build_jobs(self):
+        return Job.objects.filter(name='build_export').count()
+
+    def test_large_export_is_built_by_worker(self):
+        response = self.export_all()
+        self.assertRedirects(
+            response, reverse('admin:registration_exportjob_changelist'))
+        export = ExportJob.objects.get()
+        self.assertEqual((export.status, export.requested_by), ('pending', self.user))
+
+        jobs.run_pending()
+        export.refresh_from_db()
+        self.assertEqual(export.status, 'done')
+        self.assertEqual((export.total, export.processed), (3, 3))
+
+        listing = self.client.get(
+            reverse('admin:registration_exportjob_changelist'))
+        download_url = reverse(
+            'admin:registration_exportjob_download', args=[export.pk])
+        self.assertContains(listing, download_url)
+
+        response = self.client.get(download_url)
+        workbook = openpyxl.load_workbook(
+            io.BytesIO(b''.join(response.streaming_content)))
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(len(rows), 4)
+
+    def test_unchanged_data_reuses_file(self):
+        self.export_all()
+        jobs.run_pending()
+        first = ExportJob.objects.get()
+
+        self.export_all()
+        second = ExportJob.objects.latest('pk')
+        self.assertTrue(second.reused)
+        self.assertEqual(second.status, 'done')
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertEqual(self.build_jobs(), 1)
+
+        # Any change to the exported registrations needs a new file
+        registration = TalentEventRegistration.objects.first()
+        registration.city = 'Vapi'
+        registration.save()
+        self.export_all()
+        self.assertEqual(self.build_jobs(), 2)
+        self.assertFalse(ExportJob.objects.latest('pk').reused)
+
+    def test_bulk_backfill_invalidates_file(self):
+        # Rows saved before photo metadata was stored
+        os.makedirs(os.path.join(self.media_root, 'participant_photos'))
+        with open(os.path.join(
+                self.media_root, 'participant_photos', 'test.jpg'), 'wb') as f:
+            f.write(make_photo(size=(40, 30)).read())
+        TalentEventRegistration.objects.update(photo_bytes=None)
+        self.export_all()
+        jobs.run_pending()
+
+        call_command('backfill_photo_metadata', stdout=io.StringIO())
+        self.export_all()
+        self.assertEqual(self.build_jobs(), 2)
+        self.assertFalse(ExportJob.objects.latest('pk').reused)
+
+    def test_worker_rebuilds_filters_and_selection(self):
+        TalentEventRegistration.objects.filter(
+            full_name__endswith='2').update(gender='female')
+        pks = list(TalentEventRegistration.objects.order_by(
+            'full_name').values_list('pk', flat=True))
+
+        # All rows matching the changelist filters...
+        self.client.post(self.changelist + '?gender__exact=male', {
+            'action': 'export_to_excel', 'select_across': '1',
+            '_selected_action': pks[:1]})
+        # ...or just the ticked ones
+        self.client.post(self.changelist, {
+            'action': 'export_to_excel', 'select_across': '0',
+            '_selected_action': pks[1:]})
+        by_filters, by_pks = ExportJob.objects.order_by('pk')
+        self.assertEqual(by_filters.selection, {'filters': 'gender__exact=male'})
+        self.assertEqual(by_pks.selection['pks'], [str(pk) for pk in pks[1:]])
+
+        jobs.run_pending()
+        self.assertEqual(
+            set(by_filters.get_queryset().values_list('pk', flat=True)),
+            set(pks[:2]))
+        self.assertEqual(
+            [export.total for export in ExportJob.objects.order_by('pk')],
+            [2, 2])
+
+    def test_old_exports_expire(self):
+        self.export_all()
+        jobs.run_pending()
+        self.export_all()
+        first, reused = ExportJob.objects.order_by('pk')
+        path = first.file.path
+        self.assertEqual(reused.file.name, first.file.name)
+
+        # Each export schedules the cleanup for when it expires
+        expiry = Job.objects.filter(name='expire_exports')
+        self.assertEqual(expiry.count(), 2)
+        self.assertEqual(expiry.order_by('pk').first().run_after,
+                         first.created_at + timedelta(days=7))
+
+        # The file outlives the first export while the reused one points to it
+        ExportJob.objects.filter(pk=first.pk).update(
+            created_at=timezone.now() - timedelta(days=8))
+        tasks.expire_exports()
+        self.assertEqual(list(ExportJob.objects.all()), [reused])
+        self.assertTrue(os.path.exists(path))
+
+        ExportJob.objects.update(created_at=timezone.now() - timedelta(days=8))
+        tasks.expire_exports()
+        self.assertFalse(ExportJob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_exports_are_private(self):
+        self.export_all()
+        jobs.run_pending()
+        export = ExportJob.objects.get()
+
+        other = User.objects.create_superuser(
+            'other', 'other@example.com', 'password')
+        self.client.force_login(other)
+        response = self.client.get(reverse(
+            'admin:registration_exportjob_download', args=[export.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class RegistrationStatsViewTest(TestCase):
+    """Test cases for the cached, conditional stats endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        views._stats_snapshot.update(snapshot=None, checked_at=0.0)
+        self.url = reverse('registration_stats')
+
+    def register(self, index):
+        registration = TalentEventRegistration.objects.create(
+            full_name=f'Stats Participant {index}', gender='male',
+            date_of_birth='01-01-2000', age_group='21-40', event='singing',
+            talent_details='Details', city='Surat',
+            whatsapp_number=f'930000000{index}',
+            photo='participant_photos/test.jpg', terms='yes')
+        tasks.record_registration(str(registration.pk))
+
+    @override_settings(STATS_MAX_STALENESS=0)
+    def test_conditional_get(self):
+        self.register(0)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stats']['total_registrations'], 1)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        # Unchanged stats: one version read, then 304 from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # A newly counted registration changes the version and the ETag
+        self.register(1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['stats']['total_registrations'], 2)
+
+    @override_settings(STATS_MAX_STALENESS=60)
+    def test_polling_within_staleness_bound_is_free(self):
+        self.client.get(self.url)
+        self.register(0)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['stats']['total_registrations'], 0)
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+
+class StatisticRollupTest(TestCase):
+    """Test cases for the hourly/weekly rollups and the series API"""
+
+    def setUp(self):
+        cache.clear()
+        # Wednesday 10:15 and 10:45, Wednesday 12:00, next Monday 09:30
+        base = timezone.make_aware(datetime(2025, 8, 6, 10, 15))
+        self.times = [base, base + timedelta(minutes=30),
+                      base + timedelta(hours=1, minutes=45),
+                      base + timedelta(days=4, hours=23, minutes=15)]
+        self.registrations = []
+        for index, (created_at, event) in enumerate(
+                zip(self.times, ['singing', 'dancing', 'singing', 'acting'])):
+            registration = TalentEventRegistration.objects.create(
+                full_name=f'Rollup Participant {index}', gender='male',
+                date_of_birth='01-01-2000', age_group='21-40', event=event,
+                talent_details='Details', city='Surat',
+                whatsapp_number=f'920000000{index}',
+                photo='participant_photos/test.jpg', terms='yes',
+                created_at=created_at)
+            tasks.record_registration(str(registration.pk))
+            self.registrations.append(registration)
+
+    def counters(self):
+        # Rows decremented to zero count the same as missing rows
+        return (
+            set(StatisticCounter.objects.exclude(count=0).values_list(
+                'date', 'dimension', 'value', 'count')),
+            set(StatisticRollup.objects.exclude(count=0).values_list(
+                'granularity', 'period', 'dimension', 'value', 'count')),
+        )
+
+    def totals(self, series):
+        return [bucket['total_registrations'] for bucket in series]
+
+    def test_series_granularities(self):
+        start, end = date(2025, 8, 6), date(2025, 8, 11)
+        self.assertEqual(
+            self.totals(EventStatistics.series('day', start, end)),
+            [3, 0, 0, 0, 0, 1])
+        self.assertEqual(
+            self.totals(EventStatistics.series('week', start, end)), [3, 1])
+
+        hourly = EventStatistics.series('hour', start, start)
+        self.assertEqual(len(hourly), 24)
+        self.assertEqual(hourly[10]['total_registrations'], 2)
+        self.assertEqual(hourly[10]['registrations_by_event'],
+                         {'singing': 1, 'dancing': 1})
+        self.assertEqual(hourly[12]['total_registrations'], 1)
+
+        (whole,) = EventStatistics.series('event', start, end)
+        self.assertEqual(whole['total_registrations'], 4)
+        self.assertEqual(whole['registrations_by_event'],
+                         {'singing': 2, 'dancing': 1, 'acting': 1})
+
+    def test_rebuild_matches_incremental_counts(self):
+        before = self.counters()
+        # An uncounted registration (no record_registration job yet)
+        TalentEventRegistration.objects.create(
+            full_name='Pending Participant', gender='male',
+            date_of_birth='01-01-2000', age_group='21-40', event='singing',
+            talent_details='Details', city='Surat', whatsapp_number='9200000009',
+            photo='participant_photos/test.jpg', terms='yes',
+            created_at=self.times[0])
+        StatisticRollup.objects.filter(granularity='hour').delete()
+        StatisticCounter.objects.filter(dimension='city').update(count=99)
+
+        out = io.StringIO()
+        call_command('rebuild_statistics', stdout=out)
+        self.assertIn('Rebuilt', out.getvalue())
+        self.assertEqual(self.counters(), before)
+
+    def test_deleted_registration_is_uncounted(self):
+        self.registrations[1].delete()
+        (whole,) = EventStatistics.series(
+            'event', date(2025, 8, 6), date(2025, 8, 11))
+        self.assertEqual(whole['total_registrations'], 3)
+        self.assertEqual(whole['registrations_by_event']['dancing'], 0)
+
+    def test_edited_registration_moves_its_counts(self):
+        registration = self.registrations[1]
+        registration.event = 'singing'
+        registration.city = 'Vadodara'
+        registration.save()
+        incremental = self.counters()
+        call_command('rebuild_statistics', stdout=io.StringIO())
+        self.assertEqual(self.counters(), incremental)
+
+        registration.delete()
+        (whole,) = EventStatistics.series(
+            'event', date(2025, 8, 6), date(2025, 8, 11))
+        self.assertEqual(whole['total_registrations'], 3)
+        self.assertEqual(whole['registrations_by_event']['singing'], 2)
+        self.assertEqual(whole['registrations_by_city'].get('Vadodara', 0), 0)
+
+    def test_delete_with_missing_counters(self):
+        StatisticCounter.objects.filter(dimension='event').delete()
+        StatisticRollup.objects.filter(dimension='total').update(count=0)
+        self.registrations[0].delete()
+        self.assertFalse(StatisticCounter.objects.filter(dimension='event').exists())
+        self.assertFalse(StatisticRollup.objects.exclude(count__gte=0).exists())
+
+    def test_series_api(self):
+        url = reverse('registration_stats_series')
+        response = self.client.get(url, {
+            'start': '2025-08-06', 'end': '2025-08-11', 'granularity': 'week'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.totals(response.json()['series']), [3, 1])
+
+        response = self.client.get(url, {
+            'start': '2025-08-06', 'end': '2025-08-11', 'granularity': 'week'},
+            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        for params in ({'granularity': 'month'},
+                       {'start': '2025-08-11', 'end': '2025-08-06'},
+                       {'start': '2025-01-01', 'end': '2025-08-06',
+                        'granularity': 'hour'},
+                       {'start': '1900-01-01', 'end': '2100-12-31'},
+                       {'start': '0001-01-01', 'end': '9999-12-31',
+                        'granularity': 'week'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+
+        # The whole event unless a start is given
+        response = self.client.get(url, {'granularity': 'event', 'end': '2025-08-11'})
+        self.assertEqual(response.json()['start'], '2025-08-06')
+        self.assertEqual(self.totals(response.json()['series']), [4])
+
+
+class RegistrationFeedTest(TestCase):
+    """Test cases for the live Server-Sent Events feed"""
+
+    def register(self, index):
+        registration = TalentEventRegistration.objects.create(
+            full_name=f'Feed Participant {index}', gender='male',
+            date_of_birth='01-01-2000', age_group='21-40', event='singing',
+            talent_details='Details', city='Surat',
+            whatsapp_number=f'910000000{index}',
+            photo='participant_photos/test.jpg', terms='yes')
+        tasks.record_registration(str(registration.pk))
+        return registration
+
+    def test_one_poll_serves_all_subscribers(self):
+        hub = feed.FeedHub()
+        self.register(0)
+        self.assertEqual(hub.poll(), [])  # starts from the current state
+
+        registration = self.register(1)
+        messages = hub.poll()
+        self.assertEqual(len(messages), 2)
+        self.assertIn('event: registration', messages[0])
+        self.assertIn(registration.registration_id, messages[0])
+        self.assertIn('event: counters', messages[1])
+        self.assertIn('"total_registrations": 1', messages[1])
+
+        # Nothing new: a single version lookup
+        with self.assertNumQueries(1):
+            self.assertEqual(hub.poll(), [])
+
+    def test_slow_subscriber_is_told_to_resync(self):
+        hub = feed.FeedHub()
+        slow, fast = asyncio.Queue(maxsize=2), asyncio.Queue(maxsize=10)
+        hub.subscribers.update([slow, fast])
+        for index in range(3):
+            hub.publish(f'message {index}')
+        self.assertEqual(slow.qsize(), 1)
+        self.assertIs(slow.get_nowait(), feed.RESYNC)
+        self.assertEqual(fast.qsize(), 3)
+
+    @override_settings(FEED_MAX_DURATION=0)
+    async def test_view_streams_events(self):
+        staff = await sync_to_async(User.objects.create_user)(
+            'feeder', password='password', is_staff=True)
+        await sync_to_async(self.async_client.force_login)(staff)
+        response = await self.async_client.get(reverse('registration_feed'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertTrue(body.startswith(b'retry: 3000'))
+        self.assertIn(b'event: snapshot\ndata: {"success": true', body)
+        self.assertEqual(feed.hub.subscribers, set())
+
+    async def test_view_requires_staff(self):
+        response = await self.async_client.get(reverse('registration_feed'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(feed.hub.subscribers, set())
+
+    def test_view_refuses_wsgi(self):
+        """Under WSGI the stream would be buffered, so it isn't served"""
+        staff = User.objects.create_user(
+            'feeder', password='password', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('registration_feed'))
+        self.assertEqual(response.status_code, 501)
+
+    @override_settings(FEED_MAX_DURATION=5)
+    async def test_stream_pushes_new_registrations(self):
+        hub = feed.FeedHub(interval=0.01)
+        stream = feed.stream(lambda: '{}', hub)
+        self.assertIn('retry:', await anext(stream))
+        self.assertIn('event: snapshot', await anext(stream))
+
+        # Let the hub take its baseline, then register someone
+        await asyncio.sleep(0.05)
+        registration = await sync_to_async(self.register)(0)
+        message = await asyncio.wait_for(anext(stream), 2)
+        self.assertIn('event: registration', message)
+        self.assertIn(registration.registration_id, message)
+
+        await stream.aclose()
+        self.assertEqual(hub.subscribers, set())
+        self.assertIsNone(hub._task)
+
+    @override_settings(FEED_MAX_DURATION=5, FEED_KEEPALIVE=0.2)
+    async def test_idle_hub_does_not_replay(self):
+        """Registrations counted while nobody listened are in the snapshot"""
+        hub = feed.FeedHub(interval=0.01)
+        stream = feed.stream(lambda: '{}', hub)
+        await anext(stream)
+        await anext(stream)
+        await asyncio.sleep(0.05)
+        await stream.aclose()
+
+        await sync_to_async(self.register)(0)
+        stream = feed.stream(lambda: '{}', hub)
+        await anext(stream)
+        await anext(stream)
+        self.assertEqual(await asyncio.wait_for(anext(stream), 2), ': keepalive\n\n')
+        await stream.aclose()
+
+
+class RegistrationChangeListTest(TestCase):
+    """Test cases for keyset pages and counter-backed filters in the admin"""
+
+    def setUp(self):
+        self.registrations = [
+            TalentEventRegistration.objects.create(
+                full_name=f'Listed Participant {index}', gender='male',
+                date_of_birth='01-01-2000', age_group='21-40',
+                event='singing' if index % 2 else 'dancing',
+                talent_details='Details', city='Surat',
+                whatsapp_number=f'950000000{index}',
+                photo='participant_photos/test.jpg', terms='yes')
+            for index in range(7)
+        ]
+        model_admin = admin.site._registry[TalentEventRegistration]
+        self.addCleanup(setattr, model_admin, 'list_per_page', model_admin.list_per_page)
+        model_admin.list_per_page = 2
+        admin_user = User.objects.create_superuser(
+            'lister', 'lister@example.com', 'password')
+        self.client.force_login(admin_user)
+        self.url = reverse('admin:registration_talenteventregistration_changelist')
+        cache.clear()
+
+    def serials(self, response):
+        return [registration.serial_number
+                for registration in response.context['cl'].result_list]
+
+    def test_small_results_use_page_numbers(self):
+        response = self.client.get(self.url, {'p': 2})
+        cl = response.context['cl']
+        self.assertFalse(cl.keyset)
+        self.assertEqual(cl.result_count, 7)
+        self.assertEqual(self.serials(response), [3, 4])
+
+    @override_settings(ADMIN_KEYSET_THRESHOLD=3)
+    def test_large_results_use_keyset_pages(self):
+        response = self.client.get(self.url)
+        cl = response.context['cl']
+        self.assertTrue(cl.keyset)
+        self.assertTrue(cl.count_is_approximate)
+        self.assertEqual(cl.result_count, 7)  # highest serial number
+        self.assertEqual(self.serials(response), [1, 2])
+        self.assertIsNone(cl.previous_url)
+        self.assertContains(response, 'About 7 results')
+
+        response = self.client.get(self.url + cl.next_url)
+        cl = response.context['cl']
+        self.assertEqual(self.serials(response), [3, 4])
+        self.assertEqual(cl.next_url, '?after=4')
+
+        response = self.client.get(self.url + cl.previous_url)
+        self.assertEqual(self.serials(response), [1, 2])
+
+        response = self.client.get(self.url, {'after': 6})
+        cl = response.context['cl']
+        self.assertEqual(self.serials(response), [7])
+        self.assertIsNone(cl.next_url)
+
+        # Descending serial numbers page the other way
+        response = self.client.get(self.url, {'o': '-1', 'after': 6})
+        self.assertEqual(self.serials(response), [5, 4])
+
+    @override_settings(ADMIN_KEYSET_THRESHOLD=3)
+    def test_filtered_counts_are_cached(self):
+        response = self.client.get(self.url, {'event__exact': 'dancing'})
+        self.assertEqual(response.context['cl'].result_count, 4)
+        self.assertEqual(self.serials(response), [1, 3])
+
+        self.registrations[1].event = 'dancing'
+        self.registrations[1].save()
+        response = self.client.get(self.url, {'event__exact': 'dancing'})
+        self.assertEqual(response.context['cl'].result_count, 4)
+        self.assertEqual(self.serials(response), [1, 2])
+
+    def test_filter_options_are_counted_by_the_statistic_counters(self):
+        StatisticCounter.objects.add_registrations(self.registrations[:3])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertFalse([
+            query['sql'] for query in queries.captured_queries
+            if 'GROUP BY' in query['sql'] or 'DISTINCT' in query['sql']
+            if 'registration_talenteventregistration' in query['sql']])
+        self.assertContains(response, 'Singing (1)')
+        self.assertContains(response, 'Dancing (2)')
+        self.assertContains(response, 'Surat (3)')
+        response = self.client.get(self.url, {'city__exact': 'Surat'})
+        self.assertEqual(response.context['cl'].result_count, 7)
+
+
+class RegistrationSearchTest(TestCase):
+    """Test cases for the registration search index"""
+
+    def setUp(self):
+        self.first = self.register('Riya Trivedi', 'Ahmedabad', '+91 98765 43210', 'Kathak dance')
+        self.second = self.register('Jay Patel', 'Surat', '9812345678', 'Classical vocals')
+
+    def register(self, full_name, city, whatsapp_number, talent_details):
+        return TalentEventRegistration.objects.create(
+            full_name=full_name, gender='female', date_of_birth='01-01-2000',
+            age_group='21-40', event='dancing', talent_details=talent_details,
+            city=city, whatsapp_number=whatsapp_number,
+            photo='participant_photos/test.jpg', terms='yes')
+
+    def find(self, term):
+        return list(search.search(
+            TalentEventRegistration.objects.order_by('serial_number'), term))
+
+    def test_uses_fts5_on_sqlite(self):
+        self.assertIsInstance(search.get_backend(), search.SQLiteSearchBackend)
+
+    def test_words_match_prefixes_in_any_column(self):
+        self.assertEqual(self.find('riya'), [self.first])
+        self.assertEqual(self.find('Triv ahmed'), [self.first])
+        self.assertEqual(self.find('classical'), [self.second])
+        self.assertEqual(self.find('surat patel'), [self.second])
+        self.assertEqual(self.find('surat riya'), [])
+
+    def test_exact_matches(self):
+        self.assertEqual(self.find(self.second.registration_id), [self.second])
+        self.assertEqual(self.find(str(self.second.serial_number)), [self.second])
+        self.assertEqual(self.find(str(self.first.pk)), [self.first])
+        self.assertEqual(self.find('9876543210'), [self.first])
+        self.assertEqual(self.find('+91 98123 45678'), [self.second])
+        self.assertEqual(self.find('98123'), [])  # five digits: a serial number
+
+    def test_index_follows_changes(self):
+        self.second.full_name = 'Jay Mehta'
+        self.second.save()
+        self.assertEqual(self.find('patel'), [])
+        self.assertEqual(self.find('mehta'), [self.second])
+
+        self.first.delete()
+        self.assertEqual(self.find('riya'), [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM registration_search')
+        self.assertEqual(self.find('riya'), [])
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 2 registrations', out.getvalue())
+        self.assertEqual(self.find('riya'), [self.first])
+
+    @override_settings(REGISTRATION_SEARCH_BACKEND='registration.search.SearchBackend')
+    def test_fallback_backend(self):
+        self.assertEqual(self.find('Trivedi kathak'), [self.first])
+        self.assertEqual(self.find('98123'), [])
+
+    def test_admin_search(self):
+        admin_user = User.objects.create_superuser(
+            'searcher', 'searcher@example.com', 'password')
+        self.client.force_login(admin_user)
+        response = self.client.get(
+            reverse('admin:registration_talenteventregistration_changelist'),
+            {'q': 'kathak'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.first])
+
+
+class CityTest(TestCase):
+    """Test cases for the canonical city dictionary"""
+
+    def register(self, index, city):
+        registration = TalentEventRegistration.objects.create(
+            full_name=f'City Participant {index}', gender='male',
+            date_of_birth='01-01-2000', age_group='21-40', event='singing',
+            talent_details='Details', city=city,
+            whatsapp_number=f'940000000{index}',
+            photo='participant_photos/test.jpg', terms='yes')
+        tasks.record_registration(str(registration.pk))
+        return registration
+
+    def test_spellings_resolve_to_one_city(self):
+        city = City.objects.resolve('Kutch')
+        self.assertEqual(City.objects.resolve(' kutch '), city)
+        self.assertEqual(City.objects.resolve('KUTCH.'), city)
+        self.assertEqual(City.objects.resolve('anjar').name, 'Anjar')
+        self.assertIsNone(City.objects.resolve('  '))
+
+        # Known aliases are seeded by the migration, new ones normalized
+        self.assertEqual(City.objects.resolve('Amdavad').name, 'Ahmedabad')
+        CityAlias.objects.create(key='Bhuj City ', city=city)
+        self.assertEqual(City.objects.resolve('bhuj city'), city)
+
+    def test_stats_are_counted_by_city(self):
+        first = self.register(0, 'Ahmedabad')
+        self.register(1, 'ahmedabad ')
+        self.register(2, 'Amdavad')
+        self.assertEqual(first.canonical_city.name, 'Ahmedabad')
+        self.assertEqual(first.city, 'Ahmedabad')
+
+        counter = StatisticCounter.objects.get(dimension='city')
+        self.assertEqual(counter.value, str(first.canonical_city_id))
+        self.assertEqual(counter.count, 3)
+        stats = EventStatistics.from_counters(timezone.localdate())
+        self.assertEqual(stats.registrations_by_city, {'Ahmedabad': 3})
+        series = EventStatistics.series(
+            'day', timezone.localdate(), timezone.localdate())
+        self.assertEqual(series[0]['registrations_by_city'], {'Ahmedabad': 3})
+
+    def test_admin_filter_uses_city_ids(self):
+        registration = self.register(0, 'Rajkot')
+        self.register(1, 'Surat')
+        admin_user = User.objects.create_superuser(
+            'cities', 'cities@example.com', 'password')
+        self.client.force_login(admin_user)
+        url = reverse('admin:registration_talenteventregistration_changelist')
+
+        response = self.client.get(url)
+        self.assertContains(response, 'Rajkot (1)')
+        response = self.client.get(
+            url, {'canonical_city__exact': registration.canonical_city_id})
+        self.assertEqual(list(response.context['cl'].result_list), [registration])
+
+    def test_merge_cities(self):
+        self.register(0, 'Ahmedabad')
+        misspelt = self.register(1, 'Ahmdabad')
+        self.assertEqual(misspelt.canonical_city.name, 'Ahmdabad')
+
+        out = io.StringIO()
+        call_command('merge_cities', 'Ahmedabad', 'Ahmdabad', stdout=out)
+        self.assertIn('Merged Ahmdabad into Ahmedabad', out.getvalue())
+        misspelt.refresh_from_db()
+        self.assertEqual(misspelt.canonical_city.name, 'Ahmedabad')
+        self.assertFalse(City.objects.filter(name='Ahmdabad').exists())
+        self.assertEqual(City.objects.resolve('ahmdabad').name, 'Ahmedabad')
+        self.assertEqual(
+            EventStatistics.from_counters(timezone.localdate()).registrations_by_city,
+            {'Ahmedabad': 2})
+        self.assertEqual(
+            search.search(TalentEventRegistration.objects.all(), 'Ahmedabad').count(), 2)
+
+
+class WhatsAppNumberTest(TestCase):
+    """Test cases for the E.164 WhatsApp number"""
+
+    def register(self, full_name, whatsapp_number):
+        return TalentEventRegistration.objects.create(
+            full_name=full_name, gender='male', date_of_birth='01-01-2000',
+            age_group='21-40', event='singing', talent_details='Details',
+            city='Surat', whatsapp_number=whatsapp_number,
+            photo='participant_photos/test.jpg', terms='yes')
+
+    def test_normalization(self):
+        for typed in ('9876543210', '+91 98765 43210', '098765-43210',
+                      '0091 98765 43210', '919876543210'):
+            self.assertEqual(normalize_whatsapp(typed), '+919876543210', typed)
+        self.assertEqual(normalize_whatsapp('+1 (415) 555-0100'), '+14155550100')
+        self.assertEqual(normalize_whatsapp('4155550100', country_code='1'),
+                         '+14155550100')
+        self.assertIsNone(normalize_whatsapp('12345'))
+        self.assertIsNone(normalize_whatsapp(''))
+
+    def test_stored_on_save_and_used_for_duplicates(self):
+        registration = self.register('Om Joshi', '+91 98765 43210')
+        self.assertEqual(registration.whatsapp_e164, '+919876543210')
+        with self.assertRaises(ValidationError):
+            self.register('om joshi', '9876543210')
+        self.assertEqual(
+            list(search.search(TalentEventRegistration.objects.all(), '098765 43210')),
+            [registration])
+
+    def test_serializer_validation(self):
+        serializer = serializers.RegistrationImportSerializer()
+        self.assertEqual(
+            serializer.validate_whatsapp_number('98765 43210'), '98765 43210')
+        for invalid in ('98765', '+91', '0000000000'):
+            with self.assertRaises(drf_serializers.ValidationError):
+                serializer.validate_whatsapp_number(invalid)
+
+    def test_backfill_command(self):
+        def make_legacy(registration, key):
+            # As stored before the E.164 column existed
+            TalentEventRegistration.objects.filter(pk=registration.pk).update(
+                whatsapp_e164=None, duplicate_key=key)
+
+        first = self.register('Om Joshi', '9876543210')
+        make_legacy(first, 'om joshi|9876543210')
+        second = self.register('Om Joshi', '+91 98765 43210')
+        make_legacy(second, 'om joshi|919876543210')
+        third = self.register('Ved Rao', '98123 45678')
+        make_legacy(third, 'ved rao|9812345678')
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command('backfill_whatsapp_e164', batch_size=2, stdout=out, stderr=err)
+        self.assertIn('Normalized 3 WhatsApp numbers', out.getvalue())
+        self.assertIn(f'Duplicate: {second.registration_id}', err.getvalue())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual(first.whatsapp_e164, '+919876543210')
+        self.assertEqual(first.duplicate_key, 'om joshi|+919876543210')
+        self.assertEqual(second.whatsapp_e164, '+919876543210')
+        self.assertIsNone(second.duplicate_key)
+        self.assertEqual(third.whatsapp_e164, '+919812345678')
+
+    def test_backfill_earliest_keeps_key_across_batches(self):
+        """A later, already normalized holder gives the key up"""
+        first = self.register('Om Joshi', '9876543210')
+        TalentEventRegistration.objects.filter(pk=first.pk).update(
+            whatsapp_e164=None, duplicate_key=None)
+        second = self.register('Om Joshi', '+91 98765 43210')
+
+        for options in ({}, {'all': True}):
+            TalentEventRegistration.objects.filter(pk=first.pk).update(
+                duplicate_key=None)
+            TalentEventRegistration.objects.filter(pk=second.pk).update(
+                duplicate_key='om joshi|+919876543210')
+            err = io.StringIO()
+            call_command('backfill_whatsapp_e164', batch_size=1,
+                         stdout=io.StringIO(), stderr=err, **options)
+            first.refresh_from_db()
+            second.refresh_from_db()
+            self.assertEqual(first.duplicate_key, 'om joshi|+919876543210')
+            self.assertIsNone(second.duplicate_key)
+            self.assertEqual(err.getvalue().count('Duplicate:'), 1)
+            self.assertIn(second.registration_id, err.getvalue())
+
+
+class SQLiteConcurrencyTest(TransactionTestCase):
+    """Test cases for the SQLite backend options and the write gate"""
+
+    def _submit(self, index):
+        """Submit the form from a worker thread"""
+        try:
+            response = Client().post(reverse('submit_registration'), {
+                'fullName': f'Concurrent Participant {index}', 'gender': 'male',
+                'dateOfBirth': '01-01-2000', 'ageGroup': '21-40',
+                'event': 'singing', 'Talent': 'Vocals', 'city': f'City {index % 3}',
+                'whatsappNumber': f'97{index:08d}', 'terms': 'yes'})
+            return response['Location']
+        finally:
+            connection.close()
+
+    def test_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_transactions_begin_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                City.objects.exists()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_concurrent_submissions(self):
+        """Submissions that read before writing queue rather than fail"""
+        for barrier in (False, True):
+            TalentEventRegistration.objects.all().delete()
+            with self.settings(SQLITE_WRITE_GATE=barrier), \
+                    ThreadPoolExecutor(max_workers=8) as pool:
+                locations = list(pool.map(self._submit, range(16)))
+            self.assertEqual(locations, [reverse('confirmation')] * 16)
+            self.assertEqual(TalentEventRegistration.objects.count(), 16)
+
+    @override_settings(SQLITE_WRITE_GATE=True, SQLITE_WRITE_GATE_TIMEOUT=0.01)
+    def test_gate_timeout(self):
+        lock = gate._lock('default')
+        lock.acquire()
+        try:
+            with self.assertRaises(OperationalError):
+                with gate.write_transaction():
+                    pass
+        finally:
+            lock.release()
+        with gate.write_transaction():
+            self.assertTrue(connection.in_atomic_block)
+
+
+@override_settings(DATABASE_REPLICA='replica')
+class ReplicaRoutingTest(TransactionTestCase):
+    """Test cases for read replica routing (the replica mirrors the test database)"""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        views._stats_snapshot.update(snapshot=None, checked_at=0.0)
+        replicas._health.update(alias=None, checked_at=0.0)
+        replicas.stamp_heartbeat()
+        self.registration = TalentEventRegistration.objects.create(
+            full_name='Replica Participant', gender='male',
+            date_of_birth='01-01-2000', age_group='21-40', event='singing',
+            city='Surat', whatsapp_number='9600000001',
+            photo='participant_photos/test.jpg', terms='yes')
+
+    def queries(self):
+        """Query captures of the primary and the replica"""
+        return (CaptureQueriesContext(connections['default']),
+                CaptureQueriesContext(connections['replica']))
+
+    def test_reads_inside_replica_reads_use_the_replica(self):
+        primary, replica = self.queries()
+        with primary, replica, replicas.replica_reads():
+            registration = TalentEventRegistration.objects.get()
+            self.assertEqual(registration._state.db, 'replica')
+            registration.is_active = False
+            registration.save()
+        self.assertTrue(any(q['sql'].startswith('SELECT') for q in replica))
+        self.assertFalse(any(q['sql'].startswith('UPDATE') for q in replica))
+        self.assertTrue(any(q['sql'].startswith('UPDATE') for q in primary))
+
+        with replica:
+            TalentEventRegistration.objects.count()
+        self.assertEqual(len(replica), 0)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.assertEqual(replicas.read_alias(), 'replica')
+        Sequence.objects.filter(name=replicas.HEARTBEAT).update(
+            value=int(time.time()) - 3600)
+        replicas._health.update(checked_at=0.0)
+        self.assertEqual(replicas.read_alias(), 'default')
+
+        Sequence.objects.filter(name=replicas.HEARTBEAT).delete()
+        replicas._health.update(checked_at=0.0)
+        self.assertEqual(replicas.read_alias(), 'default')
+
+    def test_stats_read_from_replica(self):
+        primary, replica = self.queries()
+        with primary, replica:
+            response = self.client.get(reverse('registration_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(replica), 0)
+        self.assertEqual(len(primary), 0)
+
+    def test_admin_reads_its_own_writes(self):
+        admin_user = User.objects.create_superuser(
+            'replica', 'replica@example.com', 'password')
+        self.client.force_login(admin_user)
+        changelist_url = reverse('admin:registration_talenteventregistration_changelist')
+
+        primary, replica = self.queries()
+        with primary, replica:
+            response = self.client.get(changelist_url)
+        self.assertEqual(list(response.context['cl'].result_list), [self.registration])
+        self.assertFalse(any('talenteventregistration' in q['sql'] for q in primary))
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+        response = self.client.post(changelist_url, {
+            'action': 'make_inactive', '_selected_action': [self.registration.pk]})
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+
+        primary, replica = self.queries()
+        with primary, replica:
+            self.client.get(changelist_url)
+        self.assertFalse(any('talenteventregistration' in q['sql'] for q in replica))
+
+    def test_copy_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            replicas.copy_sqlite(path)
+            with sqlite3.connect(path) as copy:
+                count, = copy.execute(
+                    'SELECT COUNT(*) FROM registration_talenteventregistration').fetchone()
+            self.assertEqual(count, 1)
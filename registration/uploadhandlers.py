@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler, SkipFile, StopFutureHandlers, StopUpload)
+
+
+# Leading bytes of the image formats we accept
+PHOTO_SIGNATURES = {
+    b'\xff\xd8\xff': 'image/jpeg',
+    b'\x89PNG\r\n\x1a\n': 'image/png',
+    b'GIF87a': 'image/gif',
+    b'GIF89a': 'image/gif',
+}
+
+
+def sniff_image_type(header):
+    """Return the image MIME type for the first bytes of a file, or None"""
+    for signature, content_type in PHOTO_SIGNATURES.items():
+        if header.startswith(signature):
+            return content_type
+    return None
+
+
+class PhotoUploadHandler(FileUploadHandler):
+    """
+    Stream the participant photo straight to a temporary file in fixed-size
+    chunks. The upload must not be empty, the first chunk must carry a known
+    image signature and the upload is dropped as soon as it grows past
+    PHOTO_UPLOAD_MAX_SIZE, so memory use per request stays at one chunk
+    however large the upload is. Other file fields are left to the next
+    handlers.
+
+    A rejected photo is left out of request.FILES and the reason is stored
+    on request.photo_upload_error.
+    """
+
+    chunk_size = 64 * 1024
+    field_name = 'photo'
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.active = field_name == self.field_name
+        if not self.active:
+            return
+
+        self.max_size = getattr(
+            settings, 'PHOTO_UPLOAD_MAX_SIZE', 100 * 1024 * 1024)
+        self.size = 0
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset,
+            self.content_type_extra)
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        if start == 0:
+            detected = sniff_image_type(raw_data)
+            if detected is None:
+                self._reject("Only JPEG, PNG, and GIF images are allowed.")
+            self.file.content_type = detected
+
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            limit_mb = self.max_size // (1024 * 1024)
+            self._reject(f"Photo size should not exceed {limit_mb}MB.")
+
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        if file_size == 0:
+            # No chunk ever arrived, so the signature check never ran. The
+            # parser only honours SkipFile while reading chunks, and
+            # returning None would hand the part to the next handlers, so
+            # the (rejected) request is not parsed any further.
+            self.file.close()
+            if self.request is not None:
+                self.request.photo_upload_error = "The uploaded photo is empty."
+            raise StopUpload()
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+    def upload_interrupted(self):
+        if getattr(self, 'active', False):
+            self.file.close()
+
+    def _reject(self, message):
+        self.active = False
+        if self.request is not None:
+            self.request.photo_upload_error = message
+        # The parser closes (and so deletes) self.file and discards the rest
+        # of this part without buffering it
+        raise SkipFile()
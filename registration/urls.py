@@ -10,4 +10,8 @@ urlpatterns = [
     # Admin API (optional - for future use)
     path('admin-api/stats/',
          views.registration_stats, name='registration_stats'),
+    path('admin-api/stats/series/',
+         views.registration_stats_series, name='registration_stats_series'),
+    path('admin-api/feed/',
+         views.registration_feed, name='registration_feed'),
 ]
@@ -1,18 +1,31 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
 from django.urls import reverse
-from django.db.models import Count
+from django.db.models import Count, Min
 from django.utils import timezone
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from datetime import date, timedelta
+import hashlib
+import json
 import logging
+import time
 import uuid
 
-from .models import TalentEventRegistration, RegistrationActivity, EventStatistics
+from talent_event_backend.sqlite3.gate import write_transaction
+
+from . import feed, jobs, replicas
+from .models import (
+    TalentEventRegistration, EventStatistics, StatisticCounter, PhotoBlob)
 
 logger = logging.getLogger(__name__)
 
@@ -40,24 +53,21 @@ def submit_registration(request):
             'terms': request.POST.get('terms'),
         }
 
-        # Handle photo upload
+        # Handle photo upload (streamed to disk by PhotoUploadHandler)
         photo = request.FILES.get('photo')
-
-        # Check for duplicate registration (same name AND WhatsApp number)
-        existing_registration = TalentEventRegistration.objects.filter(
-            full_name__iexact=frontend_data['fullName'],
-            whatsapp_number=frontend_data['whatsappNumber']
-        ).first()
-
-        if existing_registration:
-            error_message = "A participant with both the same name and WhatsApp number already exists. Please check your details or contact support if this is an error."
-            logger.warning(
-                f"Duplicate registration attempt: {frontend_data.get('fullName')} - {frontend_data.get('whatsappNumber')}")
-            messages.error(request, error_message)
+        upload_error = getattr(request, 'photo_upload_error', None)
+        if upload_error:
+            logger.warning(f"Photo upload rejected: {upload_error}")
+            messages.error(request, f"Registration failed: {upload_error}")
             return redirect('registration_form')
 
-        # Create registration record with proper field mapping
-        registration = TalentEventRegistration.objects.create(
+        # Create registration record with proper field mapping. Duplicates
+        # (same name AND WhatsApp number) are rejected by the unique
+        # duplicate_key constraint and surface as a ValidationError.
+        # Activity logging and statistics are queued in the same
+        # transaction and done by the `run_jobs` worker. Concurrent
+        # submissions of this process queue on the write gate.
+        registration = TalentEventRegistration(
             full_name=frontend_data['fullName'],
             gender=frontend_data['gender'],
             date_of_birth=frontend_data['dateOfBirth'],
@@ -69,44 +79,20 @@ def submit_registration(request):
             terms=frontend_data['terms'],
             photo=photo
         )
-
-        # Log activity
-        RegistrationActivity.objects.create(
-            registration=registration,
-            activity_type='registration',
-            description=f"Registration created for {frontend_data['fullName']}"
-        )        # Update statistics
-        today = timezone.now().date()
-        stats, created = EventStatistics.objects.get_or_create(
-            date=today,
-            defaults={
-                'total_registrations': 0,
-                'registrations_by_event': {},
-                'registrations_by_age_group': {},
-                'registrations_by_city': {}
-            }
-        )
-        stats.total_registrations += 1
-
-        # Update event-specific stats
-        if frontend_data['event'] in stats.registrations_by_event:
-            stats.registrations_by_event[frontend_data['event']] += 1
-        else:
-            stats.registrations_by_event[frontend_data['event']] = 1
-
-        # Update age group stats
-        if frontend_data['ageGroup'] in stats.registrations_by_age_group:
-            stats.registrations_by_age_group[frontend_data['ageGroup']] += 1
-        else:
-            stats.registrations_by_age_group[frontend_data['ageGroup']] = 1
-
-        # Update city stats
-        if frontend_data['city'] in stats.registrations_by_city:
-            stats.registrations_by_city[frontend_data['city']] += 1
-        else:
-            stats.registrations_by_city[frontend_data['city']] = 1
-
-        stats.save()
+        # Copy and hash the photo before taking the write lock, so only
+        # the INSERT and the enqueue hold it
+        registration.store_photo()
+        try:
+            with write_transaction():
+                registration.save(force_insert=True)
+                jobs.enqueue('record_registration',
+                             registration_id=str(registration.id))
+        except Exception:
+            # Nothing references the stored photo; delete it after the
+            # grace period unless another registration uses the same file
+            if registration.photo:
+                PhotoBlob.objects.discard(registration.photo.name)
+            raise
 
         logger.info(f"Registration created successfully: ID {registration.id}")
 
@@ -138,47 +124,214 @@ def confirmation(request):
 # Admin/API views for dashboard
 
 
-def registration_stats(request):
-    """Get registration statistics"""
-    try:
-        # Get today's stats or create if doesn't exist
-        today = timezone.now().date()
-        stats, created = EventStatistics.objects.get_or_create(
-            date=today,
-            defaults={
-                'total_registrations': 0,
-                'registrations_by_event': {},
-                'registrations_by_age_group': {},
-                'registrations_by_city': {}
+def build_stats(date):
+    """Stats response payload for `date`"""
+    # Build today's stats from the counters (read-only)
+    stats = EventStatistics.from_counters(date)
+
+    recent_registrations = TalentEventRegistration.objects.select_related(
+        'canonical_city').order_by('-created_at')[:5]
+
+    return {
+        'success': True,
+        'stats': {
+            'total_registrations': stats.total_registrations,
+            'registrations_by_event': stats.registrations_by_event,
+            'registrations_by_age_group': stats.registrations_by_age_group,
+            'registrations_by_city': stats.registrations_by_city,
+            'date': stats.date.isoformat()
+        },
+        'queue_depth': jobs.queue_depth(),
+        'recent_registrations': [
+            {
+                'id': str(reg.id),
+                'full_name': reg.full_name,
+                'event': reg.event,
+                'age_group': reg.age_group,
+                'city': reg.city_name,
+                'photo_thumbnail': reg.thumbnail_url(400, 'jpg'),
+                'created_at': reg.created_at.isoformat()
+            } for reg in recent_registrations
+        ]
+    }
+
+
+# Last snapshot this process served and when it was checked (monotonic)
+_stats_snapshot = {'snapshot': None, 'checked_at': 0.0}
+
+
+def stats_snapshot():
+    """
+    Current stats response body with its ETag and build time.
+
+    Within STATS_MAX_STALENESS seconds of the last check the snapshot is
+    reused without touching the database. After that the stats version
+    counter (one primary key read) selects the cached body, which is only
+    rebuilt after new registrations were counted or STATS_CACHE_TIMEOUT
+    expired. Both are read from the replica when there is one.
+    """
+    now = time.monotonic()
+    staleness = getattr(settings, 'STATS_MAX_STALENESS', 5)
+    if (_stats_snapshot['snapshot'] is not None
+            and now - _stats_snapshot['checked_at'] < staleness):
+        return _stats_snapshot['snapshot']
+
+    today = timezone.localdate()
+    with replicas.replica_reads():
+        version = StatisticCounter.objects.version()
+        cache_key = f'registration_stats:{today.isoformat()}:{version}'
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            body = json.dumps(build_stats(today))
+            snapshot = {
+                'body': body,
+                'etag': f'"{hashlib.md5(body.encode()).hexdigest()}"',
+                'last_modified': timezone.now().replace(microsecond=0),
             }
-        )
+            cache.set(cache_key, snapshot, getattr(settings, 'STATS_CACHE_TIMEOUT', 60))
 
-        recent_registrations = TalentEventRegistration.objects.order_by(
-            '-created_at')[:5]
+    _stats_snapshot.update(snapshot=snapshot, checked_at=now)
+    return snapshot
 
-        return JsonResponse({
-            'success': True,
-            'stats': {
-                'total_registrations': stats.total_registrations,
-                'registrations_by_event': stats.registrations_by_event,
-                'registrations_by_age_group': stats.registrations_by_age_group,
-                'registrations_by_city': stats.registrations_by_city,
-                'date': stats.date.isoformat()
-            },
-            'recent_registrations': [
-                {
-                    'id': str(reg.id),
-                    'full_name': reg.full_name,
-                    'event': reg.event,
-                    'age_group': reg.age_group,
-                    'city': reg.city,
-                    'created_at': reg.created_at.isoformat()
-                } for reg in recent_registrations
-            ]
-        })
-    except Exception as e:
-        logger.error(f"Stats error: {str(e)}")
+
+def _request_stats_snapshot(request):
+    """stats_snapshot() taken once per request"""
+    if not hasattr(request, '_stats_snapshot'):
+        try:
+            request._stats_snapshot = stats_snapshot()
+        except Exception as e:
+            # Let the view report the error
+            request._stats_snapshot = e
+    return request._stats_snapshot
+
+
+def _stats_etag(request):
+    snapshot = _request_stats_snapshot(request)
+    return None if isinstance(snapshot, Exception) else snapshot['etag']
+
+
+def _stats_last_modified(request):
+    snapshot = _request_stats_snapshot(request)
+    return None if isinstance(snapshot, Exception) else snapshot['last_modified']
+
+
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=_stats_etag, last_modified_func=_stats_last_modified)
+def registration_stats(request):
+    """Get registration statistics; supports conditional GETs"""
+    snapshot = _request_stats_snapshot(request)
+    if isinstance(snapshot, Exception):
+        logger.error(f"Stats error: {str(snapshot)}")
         return JsonResponse({
             'success': False,
-            'error': str(e)
+            'error': str(snapshot)
         }, status=500)
+
+    response = HttpResponse(snapshot['body'], content_type='application/json')
+    patch_cache_control(
+        response, max_age=getattr(settings, 'STATS_MAX_STALENESS', 5))
+    return response
+
+
+def _feed_snapshot():
+    return stats_snapshot()['body']
+
+
+@staff_member_required
+def registration_feed(request):
+    """
+    Live feed of newly counted registrations and counter deltas as
+    Server-Sent Events (see feed.py). Needs the ASGI application: a WSGI
+    server would buffer the whole stream and hold a worker for
+    FEED_MAX_DURATION, so it gets a 501 instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            'success': False,
+            'error': 'The live feed is only served by the ASGI application.',
+        }, status=501)
+
+    response = StreamingHttpResponse(
+        feed.stream(_feed_snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx & co. from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Longest range (in days) served at each granularity; 'event' is a
+# single bucket and has no limit
+MAX_SERIES_DAYS = {'hour': 31, 'day': 3 * 366, 'week': 10 * 366}
+
+
+def _series_params(request):
+    """(granularity, start, end) from the query string; ValueError if invalid"""
+    granularity = request.GET.get('granularity', 'day')
+    if granularity not in EventStatistics.SERIES_GRANULARITIES:
+        raise ValueError(
+            "granularity must be one of: "
+            + ', '.join(EventStatistics.SERIES_GRANULARITIES))
+    try:
+        end = timezone.localdate()
+        if 'end' in request.GET:
+            end = date.fromisoformat(request.GET['end'])
+        start = end - timedelta(days=6)
+        if 'start' in request.GET:
+            start = date.fromisoformat(request.GET['start'])
+        elif granularity == 'event':
+            # The whole event: from the first counted day
+            start = min(end, StatisticCounter.objects.aggregate(
+                first=Min('date'))['first'] or end)
+    except ValueError:
+        raise ValueError("start and end must be dates (YYYY-MM-DD).")
+    if start > end:
+        raise ValueError("start must not be after end.")
+    max_days = MAX_SERIES_DAYS.get(granularity)
+    if max_days is not None and (end - start).days >= max_days:
+        raise ValueError(
+            f"Statistics by {granularity} cover at most {max_days} days.")
+    return granularity, start, end
+
+
+def _series_etag(request):
+    try:
+        granularity, start, end = _series_params(request)
+    except ValueError:
+        return None
+    version = StatisticCounter.objects.version()
+    return f'"{version}-{granularity}-{start.isoformat()}-{end.isoformat()}"'
+
+
+@replicas.replica_reads()
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=_series_etag)
+def registration_stats_series(request):
+    """
+    Statistics time series: ?start=YYYY-MM-DD&end=YYYY-MM-DD&granularity=
+    hour|day|week|event (defaults: the last 7 days, by day; the whole
+    event for 'event'). Ranges are limited per granularity
+    (MAX_SERIES_DAYS). Served from the precomputed counters and rollups,
+    cached per stats version.
+    """
+    try:
+        granularity, start, end = _series_params(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    cache_key = (f'registration_stats_series:{StatisticCounter.objects.version()}:'
+                 f'{granularity}:{start.isoformat()}:{end.isoformat()}')
+    body = cache.get(cache_key)
+    if body is None:
+        body = json.dumps({
+            'success': True,
+            'granularity': granularity,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'series': EventStatistics.series(granularity, start, end),
+        })
+        cache.set(cache_key, body, getattr(settings, 'STATS_CACHE_TIMEOUT', 60))
+
+    response = HttpResponse(body, content_type='application/json')
+    patch_cache_control(
+        response, max_age=getattr(settings, 'STATS_MAX_STALENESS', 5))
+    return response
@@ -55,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'registration.replicas.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'talent_event_backend.urls'
@@ -81,13 +82,52 @@ WSGI_APPLICATION = 'talent_event_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# talent_event_backend.sqlite3 is Django's SQLite backend plus connection
+# PRAGMAs and IMMEDIATE transactions, so several workers can write to the
+# one database file: WAL lets readers work while a write is in progress,
+# busy_timeout (ms) makes writers wait for the lock instead of failing,
+# synchronous=NORMAL syncs at checkpoints rather than every commit (safe
+# with WAL) and mmap_size (bytes) serves reads from memory-mapped pages
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'talent_event_backend.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'busy_timeout': 5000,
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+            },
+        },
+        # File-backed test database so tests that write from several
+        # threads see real SQLite locking (in-memory shared cache fails fast)
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# Read replica (see registration/replicas.py): with DATABASE_REPLICA set to
+# 'replica', stats, registration changelists and exports read from it unless
+# it is more than DATABASE_REPLICA_MAX_LAG seconds behind (checked every
+# DATABASE_REPLICA_CHECK_INTERVAL seconds). Clients that just wrote read from
+# the primary for DATABASE_REPLICA_PIN_SECONDS. The replica can be a copy of
+# db.sqlite3 refreshed by `python manage.py sync_replica --interval 10`, or a
+# standby when 'default' is PostgreSQL. Tests mirror it onto the test
+# database.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': BASE_DIR / 'db_replica.sqlite3',
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['registration.replicas.ReplicaRouter']
+DATABASE_REPLICA = os.environ.get('DATABASE_REPLICA') or None
+DATABASE_REPLICA_MAX_LAG = 30
+DATABASE_REPLICA_CHECK_INTERVAL = 5
+DATABASE_REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -164,8 +204,72 @@ REST_FRAMEWORK = {
 }
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100 MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100 MB
+# Photos are streamed to disk in 64 KB chunks by PhotoUploadHandler, so the
+# in-memory limits below only cover form fields and other small files.
+FILE_UPLOAD_HANDLERS = [
+    'registration.uploadhandlers.PhotoUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB
+PHOTO_UPLOAD_MAX_SIZE = 100 * 1024 * 1024  # 100 MB
+
+# Stored photos are re-encoded by the `process_photo` background job
+PHOTO_MAX_EDGE = 2048  # pixels, longest side
+PHOTO_JPEG_QUALITY = 85
+
+# Photos are stored by content hash and shared between registrations;
+# unreferenced files are deleted after this many seconds
+PHOTO_BLOB_GRACE_PERIOD = 3600
+
+# Background jobs (run with `python manage.py run_jobs`)
+JOBS_MAX_ATTEMPTS = 5
+JOBS_VISIBILITY_TIMEOUT = 300  # seconds before a stuck job is retried
+
+# Admin exports of more than EXPORT_INLINE_LIMIT registrations are built by
+# the job worker into EXPORT_ROOT, which is private (only served through
+# the admin's "My Exports" page). Exports and their files are deleted
+# EXPORT_RETENTION seconds after they were requested
+EXPORT_ROOT = BASE_DIR / 'exports'
+EXPORT_INLINE_LIMIT = 2000
+EXPORT_RETENTION = 7 * 24 * 3600
+
+# Registration changelists count at most ADMIN_KEYSET_THRESHOLD rows; larger
+# results show an estimated or cached (ADMIN_COUNT_CACHE_TIMEOUT seconds)
+# count and are paged by serial number instead of page offsets
+ADMIN_KEYSET_THRESHOLD = 10000
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+# Registration submissions of one process queue on a lock before writing
+# (see talent_event_backend/sqlite3/gate.py); a submission that waits longer
+# than SQLITE_WRITE_GATE_TIMEOUT seconds fails
+SQLITE_WRITE_GATE = True
+SQLITE_WRITE_GATE_TIMEOUT = 30
+
+# WhatsApp numbers typed without a country code are stored (as E.164) with
+# this one
+WHATSAPP_DEFAULT_COUNTRY_CODE = '91'
+
+# Photo ZIP downloads read files ahead on this many threads, keeping at most
+# PHOTO_ZIP_READ_AHEAD photos in memory
+PHOTO_ZIP_READ_THREADS = 4
+PHOTO_ZIP_READ_AHEAD = 16
+
+# admin-api/stats/ is served from a cached snapshot keyed by the stats
+# version counter. Each process reuses its last snapshot for
+# STATS_MAX_STALENESS seconds without any query; cached snapshots expire
+# after STATS_CACHE_TIMEOUT seconds (the queue depth is not versioned).
+STATS_MAX_STALENESS = 5
+STATS_CACHE_TIMEOUT = 60
+
+# Live feed (admin-api/feed/, Server-Sent Events, ASGI only): one poll per
+# process every FEED_POLL_INTERVAL seconds; subscribers more than
+# FEED_QUEUE_SIZE events behind are told to resync
+FEED_POLL_INTERVAL = 1.0
+FEED_QUEUE_SIZE = 100
+FEED_KEEPALIVE = 15
+FEED_MAX_DURATION = 1800
 
 # Email settings (for sending notifications)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For development
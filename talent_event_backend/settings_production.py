@@ -16,4 +16,5 @@ SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
 
 # Keep database as SQLite for simplicity
-# (SQLite works fine for small to medium applications)
+# (SQLite works fine for small to medium applications; the DATABASES
+# options in settings.py let several gunicorn workers write to it)
@@ -0,0 +1 @@
+"""SQLite backend with connection PRAGMAs, IMMEDIATE transactions and a write gate"""
@@ -0,0 +1,46 @@
+"""
+SQLite backend for several workers writing to one database file.
+
+Django's SQLite backend, plus two OPTIONS:
+
+- ``pragmas``: PRAGMAs run on every new connection (``journal_mode``,
+  ``busy_timeout``, ``synchronous``, ``mmap_size``...).
+- ``transaction_mode``: how atomic blocks BEGIN. With ``'IMMEDIATE'`` a
+  transaction takes the write lock when it starts, waiting up to
+  busy_timeout for it. A DEFERRED transaction that reads first and then
+  writes fails with "database is locked" straight away if another
+  connection has written since its read (Django 5.1 has this option built in).
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = settings_dict['OPTIONS']
+        self.pragmas = options.get('pragmas', {})
+        self.transaction_mode = options.get('transaction_mode')
+        if self.transaction_mode not in (None, 'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'):
+            raise ValueError(
+                f"Invalid transaction_mode {self.transaction_mode!r}: "
+                f"expected DEFERRED, IMMEDIATE or EXCLUSIVE")
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # Ours, not sqlite3.connect()'s
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
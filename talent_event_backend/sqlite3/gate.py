@@ -0,0 +1,46 @@
+"""
+In-process write gate.
+
+SQLite allows one writer at a time. Threads of one worker that write at
+once otherwise all wait in SQLite's busy handler, which sleeps and polls and
+wakes them in no particular order. With SQLITE_WRITE_GATE on they queue
+on a lock instead and each one starts as soon as the previous one commits.
+Other processes still wait through busy_timeout.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _lock(using):
+    with _locks_lock:
+        return _locks.setdefault(using, threading.Lock())
+
+
+@contextmanager
+def write_transaction(using=DEFAULT_DB_ALIAS):
+    """
+    transaction.atomic() for a short write. With SQLITE_WRITE_GATE it
+    first waits (up to SQLITE_WRITE_GATE_TIMEOUT seconds) for the other
+    writers of this process that use it.
+    """
+    connection = connections[using]
+    if (not getattr(settings, 'SQLITE_WRITE_GATE', False)
+            or connection.vendor != 'sqlite' or connection.in_atomic_block):
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    lock = _lock(using)
+    if not lock.acquire(timeout=getattr(settings, 'SQLITE_WRITE_GATE_TIMEOUT', 30)):
+        raise OperationalError('Timed out waiting for the write gate')
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        lock.release()